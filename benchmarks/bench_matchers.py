@@ -0,0 +1,87 @@
+"""
+Benchmark de recall x latência dos algoritmos de busca na galeria de rostos.
+
+Exemplo:
+    python -m benchmarks.bench_matchers --size 100000 --nprobe 1 --nprobe 4 --nprobe 8 --nprobe 16
+"""
+import time
+from typing import List, Tuple
+
+import click as cli
+import numpy as np
+
+from src.Face_Recognition.GalleryMatcher import GalleryMatcher
+from src.Face_Recognition.Matchers.BruteForceMatcher import BruteForceMatcher
+from src.Face_Recognition.Matchers.IVFFlatMatcher import IVFFlatMatcher
+from src.config import ENCODING_SIZE
+
+
+def synthetic_gallery(size: int, num_queries: int, noise: float, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Gera uma galeria sintética de encodings e consultas que são versões ruidosas de rostos da galeria.
+
+    :param size: Número de rostos da galeria.
+    :param num_queries: Número de consultas.
+    :param noise: Desvio padrão do ruído somado a cada coordenada das consultas.
+    :param seed: Semente do gerador aleatório.
+    :return: Uma tupla com a galeria (size, 128) e as consultas (num_queries, 128).
+    """
+
+    rng = np.random.default_rng(seed)
+    gallery = rng.normal(0.0, 0.09, size=(size, ENCODING_SIZE)).astype(np.float32)
+    queries = gallery[rng.integers(0, size, num_queries)]
+    queries = queries + rng.normal(0.0, noise, size=queries.shape).astype(np.float32)
+    return gallery, queries
+
+
+def measure(matcher: GalleryMatcher, queries: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Mede a latência média de uma busca com um único rosto, como ocorre a cada rosto detectado num frame.
+
+    :param matcher: Algoritmo de busca.
+    :param queries: Consultas.
+    :return: Uma tupla com o índice encontrado para cada consulta e a latência média em milissegundos.
+    """
+
+    indexes = np.empty(queries.shape[0], dtype=np.intp)
+    start = time.perf_counter()
+    for i in range(queries.shape[0]):
+        indexes[i] = matcher.match(queries[i:i + 1])[0][0]
+    elapsed = time.perf_counter() - start
+    return indexes, 1000 * elapsed / queries.shape[0]
+
+
+@cli.command()
+@cli.option('--size', '-s', 'size', type=int, default=100_000, help='Número de rostos da galeria sintética.')
+@cli.option('--queries', '-q', 'num_queries', type=int, default=1000, help='Número de consultas.')
+@cli.option('--noise', 'noise', type=float, default=0.03, help='Ruído das consultas em relação à galeria.')
+@cli.option('--nlist', 'nlist', type=int, default=None, help='Número de listas do índice IVF.')
+@cli.option('--nprobe', 'nprobes', type=int, multiple=True, default=[1, 4, 8, 16, 32],
+            help='Número de listas visitadas. Pode ser repetido.')
+@cli.option('--seed', 'seed', type=int, default=0)
+def main(size: int, num_queries: int, noise: float, nlist: int, nprobes: List[int], seed: int) -> None:
+    """
+    Compara a busca exata com o índice IVF em recall@1 e latência por consulta.
+    """
+
+    gallery, queries = synthetic_gallery(size=size, num_queries=num_queries, noise=noise, seed=seed)
+    names = [str(i) for i in range(size)]
+
+    exact = BruteForceMatcher(encodings=gallery, class_names=names)
+    expected, exact_ms = measure(exact, queries)
+    cli.echo(f'galeria: {size} rostos | consultas: {num_queries}')
+    cli.echo(f'{"algoritmo":<22}{"recall@1":>10}{"ms/consulta":>14}')
+    cli.echo(f'{"exact":<22}{1.0:>10.4f}{exact_ms:>14.4f}')
+
+    start = time.perf_counter()
+    ivf = IVFFlatMatcher(encodings=gallery, class_names=names, nlist=nlist, index_path=None)
+    cli.echo(f'(índice IVF construído em {time.perf_counter() - start:.1f}s)')
+    for nprobe in nprobes:
+        ivf.set_nprobe(nprobe)
+        found, ivf_ms = measure(ivf, queries)
+        recall = float(np.mean(found == expected))
+        cli.echo(f'{f"ivf nprobe={nprobe}":<22}{recall:>10.4f}{ivf_ms:>14.4f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Teste de carga do serviço HTTP de reconhecimento (POST /api/recognize).
+
+Várias threads enviam a mesma imagem ao serviço, cada uma aguardando a resposta antes de enviar a próxima, e o
+benchmark informa a latência p50/p99 e as requisições por segundo. Com --serve, o app de index.py é iniciado no
+próprio processo, numa porta livre.
+
+Exemplo:
+    python -m benchmarks.bench_recognition_service --serve --requests 200 --concurrency 8
+    python -m benchmarks.bench_recognition_service --url http://127.0.0.1:5000/api/recognize -i static/images/Obama.jpg
+"""
+import logging
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import click as cli
+import numpy as np
+
+from src.config import DIR_IMG
+
+
+def send(url: str, data: bytes, timeout: float) -> Tuple[float, int]:
+    """
+    Envia uma imagem ao serviço.
+
+    :param url: Endereço do serviço.
+    :param data: Conteúdo da imagem.
+    :param timeout: Tempo máximo de espera, em segundos.
+    :return: Uma tupla com a latência em milissegundos e o código HTTP da resposta (0 em caso de falha de conexão).
+    """
+
+    request = urllib.request.Request(url, data=data, method='POST',
+                                     headers={'Content-Type': 'application/octet-stream'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except OSError:
+        status = 0
+    return 1000 * (time.perf_counter() - start), status
+
+
+def serve() -> Tuple[str, object]:
+    """
+    Inicia o app de index.py numa thread, numa porta livre.
+
+    :return: Uma tupla com o endereço do serviço e o servidor, para ser encerrado ao final.
+    """
+
+    from werkzeug.serving import make_server
+    from index import app
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}/api/recognize', server
+
+
+@cli.command()
+@cli.option('--url', 'url', default='http://127.0.0.1:5000/api/recognize', help='Endereço do serviço.')
+@cli.option('--serve', 'serve_app', is_flag=True, default=False, help='Inicia o app de index.py no próprio processo.')
+@cli.option('--image', '-i', 'image', type=cli.Path(exists=True, dir_okay=False), default=str(DIR_IMG / 'Obama.jpg'),
+            help='Imagem enviada em todas as requisições.')
+@cli.option('--requests', '-n', 'num_requests', type=cli.IntRange(min=1), default=100, help='Número de requisições.')
+@cli.option('--concurrency', '-c', 'concurrency', type=cli.IntRange(min=1), default=8,
+            help='Número de requisições simultâneas.')
+@cli.option('--k', 'k', type=cli.IntRange(min=1), default=3, help='Identidades retornadas por rosto.')
+@cli.option('--timeout', 'timeout', type=float, default=60.0, help='Tempo máximo de cada requisição, em segundos.')
+def main(url: str, serve_app: bool, image: str, num_requests: int, concurrency: int, k: int, timeout: float) -> None:
+    """
+    Mede a latência e a vazão do serviço de reconhecimento.
+    """
+
+    server: Optional[object] = None
+    if serve_app:
+        url, server = serve()
+    url = f'{url}?k={k}'
+    with open(image, 'rb') as file:
+        data = file.read()
+
+    # Aquecimento: carrega a galeria e os modelos antes da medição
+    latency, status = send(url=url, data=data, timeout=timeout)
+    if status != 200:
+        raise cli.ClickException(f'O serviço respondeu {status} à requisição de aquecimento')
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results: List[Tuple[float, int]] = list(executor.map(lambda _: send(url=url, data=data, timeout=timeout),
+                                                             range(num_requests)))
+    elapsed = time.perf_counter() - start
+    if server is not None:
+        server.shutdown()
+
+    latencies = np.array([latency for latency, status in results if status == 200])
+    errors = {}
+    for _, status in results:
+        if status != 200:
+            errors[status] = errors.get(status, 0) + 1
+
+    cli.echo(f'requisições: {num_requests} | simultâneas: {concurrency} | tempo: {elapsed:.2f}s')
+    cli.echo(f'requisições/s: {len(latencies) / elapsed:.2f}')
+    if len(latencies):
+        cli.echo(f'latência ms: p50 {np.percentile(latencies, 50):.1f} | p99 {np.percentile(latencies, 99):.1f} | '
+                 f'média {latencies.mean():.1f} | máx. {latencies.max():.1f}')
+    if errors:
+        cli.echo('erros: ' + ', '.join(f'{status or "conexão"}: {count}' for status, count in sorted(errors.items())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark do tempo de inicialização da linha de comando (run.py).
+
+Cada comando é executado num processo novo, como nos scripts de provisionamento, e o tempo total do processo é
+medido. Com --max-ms o benchmark falha se a mediana de algum comando passar do limite.
+
+Exemplo:
+    python -m benchmarks.bench_startup --runs 10
+    python -m benchmarks.bench_startup --imports -c "database create table PeopleFaces"
+"""
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Optional, Tuple
+
+import click as cli
+
+from src.config import PATH_PROJECT
+
+# COMANDOS MEDIDOS POR PADRÃO: AJUDA E OPERAÇÕES DO BANCO DE DADOS QUE NÃO ALTERAM OS DADOS
+COMMANDS = (
+    '--help',
+    'database --help',
+    'database create table PeopleFaces',
+    'database create table BatchResults ImageManifest',
+)
+
+
+def run_command(command: str, env: Optional[dict] = None) -> Tuple[float, subprocess.CompletedProcess]:
+    """
+    Executa um comando do run.py num processo novo.
+
+    :param command: Argumentos do run.py.
+    :param env: Variáveis de ambiente do processo.
+    :return: Uma tupla com o tempo total em milissegundos e o processo concluído.
+    """
+
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, 'run.py', *shlex.split(command)], cwd=PATH_PROJECT, env=env,
+                             stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    return 1000 * (time.perf_counter() - start), process
+
+
+def heaviest_imports(command: str, top: int) -> List[Tuple[int, str]]:
+    """
+    Lista os módulos de nível mais alto com maior tempo de importação, segundo python -X importtime.
+
+    :param command: Argumentos do run.py.
+    :param top: Número de módulos listados.
+    :return: Lista com o tempo acumulado em microssegundos e o nome de cada módulo.
+    """
+
+    env = dict(os.environ, PYTHONPROFILEIMPORTTIME='1')
+    _, process = run_command(command=command, env=env)
+    modules = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):
+            modules.append((int(cumulative), name.strip()))
+    return sorted(modules, reverse=True)[:top]
+
+
+@cli.command()
+@cli.option('--command', '-c', 'commands', multiple=True, help='Argumentos do run.py. Pode ser repetido.')
+@cli.option('--runs', '-r', 'runs', type=cli.IntRange(min=1), default=5, help='Execuções de cada comando.')
+@cli.option('--max-ms', 'max_ms', type=float, default=None, help='Mediana máxima aceita, em milissegundos.')
+@cli.option('--imports', 'imports', is_flag=True, default=False,
+            help='Mostra os módulos mais lentos de importar em cada comando.')
+def main(commands: List[str], runs: int, max_ms: Optional[float], imports: bool) -> None:
+    """
+    Mede o tempo de inicialização dos comandos do run.py.
+    """
+
+    commands = commands or COMMANDS
+    cli.echo(f'{"comando":<52}{"mín. ms":>10}{"mediana ms":>12}')
+    slow = []
+    for command in commands:
+        times = []
+        for _ in range(runs):
+            elapsed, process = run_command(command=command)
+            if process.returncode != 0:
+                raise cli.ClickException(f'"{command}" terminou com código {process.returncode}:\n{process.stderr}')
+            times.append(elapsed)
+        median = statistics.median(times)
+        cli.echo(f'{command:<52}{min(times):>10.1f}{median:>12.1f}')
+        if imports:
+            for cumulative, name in heaviest_imports(command=command, top=5):
+                cli.echo(f'    {name:<48}{cumulative / 1000:>10.1f}')
+        if max_ms is not None and median > max_ms:
+            slow.append(command)
+
+    if slow:
+        raise cli.ClickException(f'Comandos acima de {max_ms} ms: {", ".join(slow)}')
+
+
+if __name__ == '__main__':
+    main()
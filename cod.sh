@@ -17,17 +17,47 @@
 ## Apagar Banco de Dados
 #python3 run.py database delete db -n Database.db
 #
+## -- MIGRAR
+#
+## Converter os encodings armazenados como texto para BLOB float32, em lotes
+#python3 run.py database migrate
+#python3 run.py database migrate -b 1000
+#
 ## -- RECOGNITION
 #
 ## iniciar Reconhecimento Facial
 python3 run.py recognition init
 #
+## Iniciar Reconhecimento Facial em várias câmeras, um processo por câmera
+#python3 run.py recognition init -s 0 -s 1 -s rtsp://camera/stream
+#
+## Reconhecimento Facial sem janela sobre vídeo, transmissão ou diretório de imagens, com saída em JSON Lines
+#python3 run.py recognition init --headless -s video.mp4 -o resultados.jsonl
+#python3 run.py recognition init --headless -s static/images
+#
+## Construir índice aproximado da galeria (MATCHER = "ivf" em src/config.py)
+#python3 run.py recognition index
+#
+## Reconhecimento Facial em lote de um diretório de imagens, em vários processos, gravando na tabela BatchResults
+## ou num arquivo CSV
+#python3 run.py recognition batch static/images
+#python3 run.py recognition batch /arquivo/snapshots -o resultados.csv -w 8
+#
 ### -- IMAGES
 #
 ## Executar tarefa
 #python3 run.py images execute-task capturar_imagem
 #python3 run.py images execute-task nomear_imagem
 #python3 run.py images execute-task recortar_imagem
+#
+## Nomear as imagens sem interação: o OCR grava os nomes propostos em names_review.csv, revisados depois
+## (enter confirma, "-" deixa para depois); com -c, aplica sem perguntas os nomes acima da confiança
+#python3 run.py images execute-task propor_nome
+#python3 run.py images review-names
+#python3 run.py images review-names -c 0.9
+#
+## Verificar, armazenar e recortar as imagens numa única passagem (leitura, detecção e encoding uma vez por imagem)
+#python3 run.py images execute-task cadastrar_imagem
 #python3 run.py images execute-task "*"
 #
 ## -- WEB
@@ -1,56 +1,239 @@
-from flask import Flask, render_template, request, session
-import os
-from src.config import DIR_IMG
+import threading
+
+from flask import Flask, Response, abort, jsonify, redirect, render_template, request, send_file, session, url_for
+from src.Database.execute import execute_people_page
+from src.config import API_MAX_PAGE_SIZE, API_PAGE_SIZE, PAGINATION_WINDOW, THUMBNAIL_MAX_AGE, SERVICE_TOP_K, \
+    SERVICE_MAX_TOP_K, SERVICE_MAX_IMAGE_BYTES, STREAM_SOURCES
+from src.web.DirectoryIndex import DirectoryIndex
+from src.utils import metrics
+from src.web.ThumbnailCache import ThumbnailCache
 
 app = Flask(__name__)
 app.secret_key = 'sua_chave_secreta_aqui'
-
-# Obtenha a lista de nomes de arquivo de imagens no diretório
-image_files = [f for f in os.listdir(DIR_IMG)]
+app.config['MAX_CONTENT_LENGTH'] = SERVICE_MAX_IMAGE_BYTES
+
+# Listagem do diretório em memória, refeita apenas quando o diretório muda, e miniaturas das imagens
+directory_index = DirectoryIndex()
+thumbnails = ThumbnailCache()
+# Varredura das miniaturas sem imagem, iniciada na primeira requisição
+thumbnails_sweep = None
+thumbnails_sweep_lock = threading.Lock()
 # Configurações padrão
 default_images_per_page = 10
 default_images_per_row = 4
 
 # Configurações do número mínimo e máximo de imagens por página
 min_images_per_page = 5
-max_images_per_page = len(image_files)
 
-# Calcule o número total de páginas
-total_pages = -(-len(image_files) // default_images_per_page)
+# Ordenações aceitas pela API de pessoas e a coluna usada como chave de paginação
+people_orders = {'id': 'ID', 'name': 'Nome'}
+
+# Serviço de reconhecimento, criado na primeira requisição para a galeria não carregar os modelos do dlib
+recognition_service = None
+recognition_service_lock = threading.Lock()
+
+# Transmissões MJPEG em andamento, uma por fonte, iniciadas pelo primeiro espectador, e a thread de cada uma
+streams = {}
+stream_threads = {}
+streams_lock = threading.Lock()
+
+
+@app.before_request
+def start_thumbnails_sweep():
+    # Miniaturas de imagens removidas enquanto o servidor estava parado apagadas em segundo plano, uma única vez.
+    # Iniciada aqui, e não na importação do módulo, para não varrer o diretório no processo de recarga do Flask nem
+    # em quem apenas importa o módulo
+    global thumbnails_sweep
+    with thumbnails_sweep_lock:
+        if thumbnails_sweep is None:
+            thumbnails_sweep = threading.Thread(
+                target=lambda: thumbnails.sweep(directory_index.page(0, len(directory_index))),
+                name='thumbnails-sweep', daemon=True)
+            thumbnails_sweep.start()
 
 
 def get_total_pages(images_per_page):
-    total_images = len(os.listdir(DIR_IMG))
+    total_images = len(directory_index)
     return max(1, (total_images + images_per_page - 1) // images_per_page)
 
 
+def get_page_numbers(current_page, total_pages):
+    # Apenas as páginas vizinhas, além da primeira e da última, para a paginação não crescer com o diretório
+    first = max(1, current_page - PAGINATION_WINDOW)
+    last = min(total_pages, current_page + PAGINATION_WINDOW)
+    return sorted({1, total_pages, *range(first, last + 1)})
+
+
 @app.route('/')
 def show_images():
     try:
         images_per_page = int(request.args.get('ipp', session.get('images_per_page', 5)))
         current_page = int(request.args.get('page', 1))
 
-        image_files = sorted([f for f in os.listdir(DIR_IMG)])
-
         total_pages = get_total_pages(images_per_page)
 
         start_index = (current_page - 1) * images_per_page
-        end_index = min(start_index + images_per_page, len(image_files))
+        end_index = start_index + images_per_page
 
-        visible_images = image_files[start_index:end_index]
+        # A versão da miniatura vai na URL, então o navegador pode guardá-la sem revalidar. Imagens removidas depois
+        # da última listagem do diretório são omitidas
+        thumbnail_versions = thumbnails.versions(directory_index.page(start_index, end_index))
+        visible_images = list(thumbnail_versions)
+        # Miniaturas da próxima página geradas em segundo plano
+        thumbnails.prefetch(directory_index.page(end_index, end_index + images_per_page))
 
         session['images_per_page'] = images_per_page  # Atualiza o valor do controle na sessão
 
         return render_template(
             'index.html',
             image_files=visible_images,
+            thumbnail_versions=thumbnail_versions,
             current_page=current_page,
             total_pages=total_pages,
+            page_numbers=get_page_numbers(current_page, total_pages),
             images_per_page=images_per_page
         )
     except Exception as e:
         return f"Erro: {str(e)}"
 
 
+@app.route('/thumbnails/<path:filename>')
+def show_thumbnail(filename):
+    if filename not in directory_index:
+        abort(404)
+    try:
+        path, version = thumbnails.get(filename)
+    except FileNotFoundError:
+        # Imagem removida depois da última listagem do diretório
+        abort(404)
+    except OSError:
+        # Imagem que não pode ser reduzida é enviada no tamanho original
+        return redirect(url_for('static', filename='images/' + filename))
+    response = send_file(path, mimetype='image/jpeg', etag=version, max_age=THUMBNAIL_MAX_AGE, conditional=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def get_image_urls(name):
+    # URLs da imagem e da miniatura da pessoa, se a imagem estiver no diretório
+    image_file = directory_index.find(name)
+    version = thumbnails.versions([image_file]).get(image_file) if image_file is not None else None
+    if version is None:
+        return None, None
+    return (url_for('static', filename='images/' + image_file),
+            url_for('show_thumbnail', filename=image_file, v=version))
+
+
+@app.route('/api/people')
+def list_people():
+    # Paginação por chave: "next" traz a URL da próxima página, a partir da última chave desta. O filtro por prefixo
+    # usa o índice dos nomes, então exige a ordem por nome, que passa a ser a padrão
+    prefix = request.args.get('prefix') or None
+    sort = request.args.get('sort', 'name' if prefix else 'id')
+    if sort not in people_orders:
+        abort(400)
+    if prefix and sort != 'name':
+        return jsonify(error='O filtro por prefixo exige sort=name'), 400
+    try:
+        limit = min(max(int(request.args.get('limit', API_PAGE_SIZE)), 1), API_MAX_PAGE_SIZE)
+        after = request.args.get('after')
+        if after is not None and sort == 'id':
+            after = int(after)
+    except ValueError:
+        abort(400)
+
+    # Um registro a mais indica se existe próxima página
+    rows = execute_people_page(order=people_orders[sort], after=after, prefix=prefix, limit=limit + 1)
+    people = []
+    for person_id, name, type_face, date_creation in rows[:limit]:
+        image_url, thumbnail_url = get_image_urls(name)
+        people.append({'id': person_id, 'name': name, 'type': type_face, 'created_at': date_creation,
+                       'image_url': image_url, 'thumbnail_url': thumbnail_url})
+
+    next_url = None
+    if len(rows) > limit:
+        last = people[-1]['id'] if sort == 'id' else people[-1]['name']
+        next_url = url_for('list_people', sort=sort, prefix=prefix, limit=limit, after=last)
+    return jsonify(people=people, next=next_url)
+
+
+def get_recognition_service():
+    global recognition_service
+    with recognition_service_lock:
+        if recognition_service is None:
+            from src.Face_Recognition.RecognitionService import RecognitionService
+            recognition_service = RecognitionService()
+            recognition_service.start()
+    return recognition_service
+
+
+@app.route('/api/recognize', methods=['POST'])
+def recognize():
+    # A imagem pode ser enviada no campo "image" de um formulário ou como corpo da requisição
+    from src.Face_Recognition.RecognitionService import ServiceBusyError
+    try:
+        k = min(max(int(request.args.get('k', SERVICE_TOP_K)), 1), SERVICE_MAX_TOP_K)
+    except ValueError:
+        abort(400)
+    data = request.files['image'].read() if 'image' in request.files else request.get_data()
+    if not data:
+        abort(400)
+    try:
+        faces = get_recognition_service().recognize(data, k=k)
+    except ServiceBusyError:
+        return jsonify(error='Serviço sobrecarregado, tente novamente'), 503, {'Retry-After': '1'}
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    return jsonify(faces=faces)
+
+
+def run_stream(camera, broadcaster, previous=None):
+    # Reconhecimento de uma fonte publicando na transmissão; ao terminar, a transmissão é encerrada e removida.
+    # A fonte só é reaberta depois que a transmissão anterior a liberar
+    from src.Face_Recognition.FaceRecognition import FaceRecognition
+    if previous is not None:
+        previous.join()
+    try:
+        FaceRecognition().run(source=STREAM_SOURCES[camera], broadcaster=broadcaster)
+    except BaseException as e:
+        app.logger.error(f'ERRO NA TRANSMISSÃO DA FONTE {STREAM_SOURCES[camera]}: {e!r}')
+    finally:
+        broadcaster.close()
+        with streams_lock:
+            if streams.get(camera) is broadcaster:
+                del streams[camera]
+
+
+def get_stream(camera):
+    with streams_lock:
+        # Uma transmissão encerrada por falta de espectadores é substituída, reabrindo a fonte
+        if camera not in streams or streams[camera].closed():
+            from src.Face_Recognition.FrameBroadcaster import FrameBroadcaster
+            streams[camera] = FrameBroadcaster()
+            stream_threads[camera] = threading.Thread(target=run_stream,
+                                                      args=(camera, streams[camera], stream_threads.get(camera)),
+                                                      name=f'stream-{camera}', daemon=True)
+            stream_threads[camera].start()
+        return streams[camera]
+
+
+@app.route('/stream/<int:camera>')
+def show_stream(camera):
+    # Apenas as fontes configuradas podem ser abertas pela web
+    if camera >= len(STREAM_SOURCES):
+        abort(404)
+    return Response(get_stream(camera).frames(), mimetype='multipart/x-mixed-replace; boundary=frame',
+                    headers={'Cache-Control': 'no-store'})
+
+
+@app.route('/metrics')
+def show_metrics():
+    # Métricas de desempenho no formato de texto do Prometheus, ou em JSON com ?format=json
+    if request.args.get('format') == 'json':
+        return Response(metrics.registry.to_json(), mimetype='application/json')
+    return Response(metrics.registry.to_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 if __name__ == '__main__':
     app.run(debug=True)
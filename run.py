@@ -1,16 +1,20 @@
+import atexit
 import os
 from pathlib import Path
-from typing import List, Union
+from typing import List, Optional, TextIO, Union
 
 import click as cli
 
 from src.Database.execute import execute_exist_tables, execute_create_database, execute_create_table, \
     execute_close_connection, execute_delete_table, \
-    execute_delete_data, execute_check_database_tables
+    execute_delete_data, execute_check_database_tables, execute_migrate_encodings
 from src.Database.options import EnumTables, EnumDB
-from src.Face_Recognition.execute import execute_face_recognition
-from src.config import PATH_PROJECT
-from src.images.execute import execute_get_images, execute_verify_images, execute_crop_images, execute_name_images
+from src.Face_Recognition.execute import execute_face_recognition, execute_build_index, \
+    execute_batch_recognition
+from src.config import PATH_PROJECT, MIGRATE_BATCH_SIZE
+from src.images.execute import execute_get_images, execute_verify_images, execute_crop_images, execute_name_images, \
+    execute_enroll_images, execute_propose_names, execute_review_names
+from src.utils import metrics
 from src.utils.logs import configura_logs
 
 
@@ -205,17 +209,39 @@ def db(name: str, path_db: str) -> None:
         pass
 
 
+@database.command()
+@cli.option(
+    '--batch-size',
+    '-b',
+    'batch_size',
+    type=cli.IntRange(min=1),
+    default=MIGRATE_BATCH_SIZE,
+    help='Número de registros convertidos por lote.'
+)
+def migrate(batch_size: int) -> None:
+    """
+    Converte, no próprio Banco de Dados, os encodings da tabela PeopleFaces armazenados como texto para BLOBs float32.
+
+    :param batch_size: Número de registros convertidos por lote.
+    """
+    configura_logs()
+    execute_check_database_tables()
+    num_migrated = execute_migrate_encodings(batch_size=batch_size)
+    cli.echo(f'{num_migrated} encodings convertidos com sucesso!')
+
+
 @images.command()
 @cli.argument(
     'task',
     nargs=1,
-    type=cli.Choice(['capturar_imagem', 'nomear_imagem', 'recortar_imagem', 'verificar_imagem', '*'],
-                    case_sensitive=False)
+    type=cli.Choice(['capturar_imagem', 'nomear_imagem', 'propor_nome', 'recortar_imagem', 'verificar_imagem',
+                     'cadastrar_imagem', '*'], case_sensitive=False)
 )
 def execute_task(task: str) -> None:
     """
     Executa uma ou um conjunto de etapas relacionadas a manipulação das imagens.
-    "*" é para executar todas as etapas.
+    "*" é para executar todas as etapas. "cadastrar_imagem" executa a verificação e o recorte numa única passagem.
+    "propor_nome" executa o OCR sem interação; os nomes são aplicados depois com "images review-names".
 
     :param task: etapas de manipulação das imagens.
     """
@@ -225,26 +251,118 @@ def execute_task(task: str) -> None:
         execute_get_images()
     elif task == 'nomear_imagem':
         execute_name_images()
+    elif task == 'propor_nome':
+        execute_propose_names()
     elif task == 'recortar_imagem':
         execute_crop_images()
     elif task == 'verificar_imagem':
         execute_verify_images()
+    elif task == 'cadastrar_imagem':
+        execute_enroll_images()
     elif task == '*':
         execute_get_images()
         execute_name_images()
-        execute_verify_images()
-        execute_crop_images()
+        execute_enroll_images()
     else:
         pass
 
 
+@images.command()
+@cli.option(
+    '--min-confidence',
+    '-c',
+    'min_confidence',
+    type=cli.FloatRange(min=0, max=1),
+    default=None,
+    help='Aplica sem perguntas os nomes com confiança maior ou igual a este valor; os demais ficam para depois.'
+)
+def review_names(min_confidence: Optional[float]) -> None:
+    """
+    Revisa os nomes propostos pela etapa "propor_nome" e renomeia as imagens.
+
+    :param min_confidence: Confiança mínima para aplicar o nome sem perguntas.
+    """
+    configura_logs()
+    num_renamed = execute_review_names(min_confidence=min_confidence)
+    cli.echo(f'{num_renamed} imagens renomeadas!')
+
+
 @recognition.command()
-def init() -> None:
+@cli.option(
+    '--source',
+    '-s',
+    'sources',
+    multiple=True,
+    help='Índice da câmera, endereço do vídeo ou diretório de imagens. Pode ser repetido para reconhecer várias fontes.'
+)
+@cli.option(
+    '--headless',
+    'headless',
+    is_flag=True,
+    default=False,
+    help='Executa sem janela, escrevendo o resultado de cada frame em JSON Lines.'
+)
+@cli.option(
+    '--output',
+    '-o',
+    'output',
+    type=cli.File('w', encoding='utf-8'),
+    default='-',
+    help='Arquivo de saída do modo sem janela. "-" para a saída padrão.'
+)
+def init(sources: List[str], headless: bool, output: TextIO) -> None:
     """
     Inicia o Reconhecimento Facial.
+
+    :param sources: Lista de índices de câmeras, endereços de vídeo ou diretórios de imagens.
+    :param headless: Flag indicando execução sem janela.
+    :param output: Arquivo de saída do modo sem janela.
+    """
+    configura_logs(file_name_log='face_recognition')
+    execute_face_recognition(sources=list(sources), headless=headless, output=output)
+
+
+@recognition.command()
+def index() -> None:
+    """
+    Constrói o índice aproximado (IVF) da galeria de rostos e o salva ao lado do Banco de Dados.
+    O índice é usado quando MATCHER = "ivf" em src/config.py.
+    """
+    configura_logs(file_name_log='face_recognition')
+    execute_build_index()
+
+
+@recognition.command()
+@cli.argument(
+    'input_dir',
+    type=cli.Path(exists=True, file_okay=False)
+)
+@cli.option(
+    '--output',
+    '-o',
+    'output',
+    type=cli.Path(dir_okay=False),
+    default=None,
+    help='Arquivo CSV de saída. Se omitido, os resultados são gravados na tabela BatchResults.'
+)
+@cli.option(
+    '--workers',
+    '-w',
+    'workers',
+    type=cli.IntRange(min=1),
+    default=None,
+    help='Número de processos. Se omitido, usa o número de núcleos.'
+)
+def batch(input_dir: str, output: Optional[str], workers: Optional[int]) -> None:
+    """
+    Reconhece em lote os rostos das imagens de um diretório, percorrido recursivamente.
+
+    :param input_dir: Diretório com as imagens.
+    :param output: Arquivo CSV de saída.
+    :param workers: Número de processos.
     """
     configura_logs(file_name_log='face_recognition')
-    execute_face_recognition()
+    execute_batch_recognition(input_dir=input_dir, output=output, workers=workers)
 
 
 @web.command()
@@ -260,5 +378,7 @@ def enter() -> None:
 
 
 if __name__ == '__main__':
+    # As métricas de desempenho do comando são gravadas em JSON na pasta de logs ao final da execução
+    atexit.register(metrics.registry.dump)
     grupo_principal()
     execute_close_connection()
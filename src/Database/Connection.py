@@ -0,0 +1,129 @@
+import atexit
+import logging
+import os
+import sqlite3 as sql
+import threading
+from pathlib import Path
+from typing import Dict, List, Union
+
+from src.config import PATH_DB, DB_BUSY_TIMEOUT, DB_SYNCHRONOUS, DB_CACHE_SIZE_KB, DB_MMAP_SIZE, DB_CACHED_STATEMENTS
+
+
+class ConnectionManager:
+    """
+    Classe responsável pelas conexões com um arquivo de Banco de Dados, compartilhadas por todas as tabelas.
+
+    Cada thread recebe a sua própria conexão, aberta uma única vez e reutilizada nas chamadas seguintes. As conexões
+    usam o modo WAL, em que leitores não bloqueiam o escritor, e ficam com as pragmas de desempenho já aplicadas e com
+    um cache de comandos preparados. Processos criados por fork abrem conexões novas, pois conexões do SQLite não
+    podem ser herdadas.
+    """
+
+    _path: Path
+    _local: threading.local
+    _lock: threading.Lock
+    _connections: List[sql.Connection]
+    _pid: int
+    _logger: logging.Logger
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        """
+        Método Construtor da classe.
+
+        :param path: Caminho do arquivo do Banco de Dados.
+        """
+
+        self._path = Path(path)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._pid = os.getpid()
+        self._logger = logging.getLogger(__name__)
+
+    def _open(self) -> sql.Connection:
+        """
+        Abre uma conexão e aplica as pragmas de desempenho.
+
+        :return: Retorna a conexão aberta.
+        """
+
+        connection = sql.connect(self._path, timeout=DB_BUSY_TIMEOUT, check_same_thread=False,
+                                 cached_statements=DB_CACHED_STATEMENTS)
+        connection.execute('pragma journal_mode = WAL;')
+        connection.execute(f'pragma synchronous = {DB_SYNCHRONOUS};')
+        connection.execute(f'pragma cache_size = -{DB_CACHE_SIZE_KB};')
+        connection.execute(f'pragma mmap_size = {DB_MMAP_SIZE};')
+        connection.execute('pragma temp_store = MEMORY;')
+        self._logger.debug(f'CONEXÃO COM {self._path.name} ABERTA NA THREAD {threading.current_thread().name}')
+        return connection
+
+    def connection(self) -> sql.Connection:
+        """
+        Acessa a conexão da thread atual, abrindo-a na primeira chamada.
+
+        :return: Retorna a conexão da thread atual.
+        """
+
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._local = threading.local()
+                    self._connections = []
+                    self._pid = os.getpid()
+
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._open()
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def close(self) -> None:
+        """
+        Fecha a conexão da thread atual, se existir.
+        """
+
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            return
+        self._local.connection = None
+        with self._lock:
+            if connection in self._connections:
+                self._connections.remove(connection)
+        connection.close()
+
+    def close_all(self) -> None:
+        """
+        Fecha as conexões de todas as threads. Deve ser chamado apenas quando nenhuma thread estiver usando o Banco.
+        Conexões herdadas de outro processo são apenas descartadas.
+        """
+
+        with self._lock:
+            connections, self._connections = self._connections, []
+        if self._pid == os.getpid():
+            for connection in connections:
+                connection.close()
+        self._local = threading.local()
+
+
+# Gerenciadores de conexão do processo, um por arquivo de Banco de Dados.
+_managers: Dict[Path, ConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_manager(path: Union[str, Path] = PATH_DB) -> ConnectionManager:
+    """
+    Recupera o gerenciador de conexões de um arquivo de Banco de Dados, criando-o na primeira chamada.
+
+    :param path: Caminho do arquivo do Banco de Dados.
+    :return: Retorna o gerenciador de conexões compartilhado pelo processo. As conexões são fechadas ao final do
+    processo, o que também incorpora o WAL ao arquivo principal.
+    """
+
+    path = Path(path).resolve()
+    with _managers_lock:
+        if path not in _managers:
+            _managers[path] = ConnectionManager(path=path)
+            atexit.register(_managers[path].close_all)
+        return _managers[path]
@@ -2,8 +2,9 @@ import logging
 import os
 import sqlite3 as sql
 from pathlib import Path
-from typing import Union, List
-from src.config import PATH_PROJECT
+from typing import Iterator, List, Optional, Sequence, Union
+from src.Database.Connection import get_manager
+from src.config import PATH_DB, READ_BLOCK_SIZE
 
 
 class DB:
@@ -18,15 +19,13 @@ class DB:
 
     def __init__(self) -> None:
         """
-        Instancia objeto da classe DB.
+        Instancia objeto da classe DB, usando a conexão da thread atual com o Banco de Dados.
         """
 
         try:
             self._logger = logging.getLogger(__name__)
-            db_name = 'Database.db'
-            if os.path.exists(PATH_PROJECT / db_name):
-                self._connection = sql.connect(os.path.join(PATH_PROJECT, db_name),
-                                               check_same_thread=False)
+            if os.path.exists(PATH_DB):
+                self._connection = get_manager(PATH_DB).connection()
                 self._cursor = self._connection.cursor()
         except sql.Error as e:
             print(e)
@@ -37,12 +36,13 @@ class DB:
 
         :param path_db: Caminho do Banco de Dados.
         :param db_name: Nome do Banco de Dados.
-        :param check_same_thread: Checa se a conexão e as demais operações do Banco de Dados devem ser executadas numa mesma Thread.
+        :param check_same_thread: Mantido por compatibilidade. As conexões são sempre por thread e podem ser usadas
+        em outras threads.
         """
 
         try:
             self._logger.info('CRIANDO BANCO DE DADOS...')
-            self._connection = sql.connect(os.path.join(path_db, db_name), check_same_thread=check_same_thread)
+            self._connection = get_manager(os.path.join(path_db, db_name)).connection()
         except sql.Error as e:
             self._logger.error('ERRO NA CRIAÇÃO DO BANCO DE DADOS.')
             self._logger.exception(f'EXCEÇÃO: {e}')
@@ -89,6 +89,49 @@ class DB:
         self._cursor.execute(query)
         return list(self.cursor().fetchall())
 
+    def iter_table(self, columns: Union[str, List[str]] = '*', where: Optional[str] = None, params: Sequence = (),
+                   block_size: int = READ_BLOCK_SIZE) -> Iterator[List[tuple]]:
+        """
+        Percorre os dados de uma tabela em blocos, com fetchmany, sem carregar a tabela inteira na memória.
+
+        :param columns: Colunas de dados que serão retornadas. "*" para retornar dados de todas as colunas.
+        :param where: Condição SQL opcional, sem a palavra "where", com "?" no lugar dos valores.
+        :param params: Valores da condição.
+        :param block_size: Número máximo de registros por bloco.
+        :return: Gerador de blocos de registros da tabela.
+        """
+
+        if isinstance(columns, list):
+            columns = ', '.join(columns)
+        query = f'select {columns} from {self._table_name}'
+        if where:
+            query += f' where {where}'
+
+        cursor = self._connection.cursor()
+        try:
+            cursor.execute(query, tuple(params))
+            while True:
+                rows = cursor.fetchmany(block_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+    def count(self, where: Optional[str] = None, params: Sequence = ()) -> int:
+        """
+        Conta os registros de uma tabela.
+
+        :param where: Condição SQL opcional, sem a palavra "where", com "?" no lugar dos valores.
+        :param params: Valores da condição.
+        :return: Retorna o número de registros.
+        """
+
+        query = f'select count(*) from {self._table_name}'
+        if where:
+            query += f' where {where}'
+        return self._cursor.execute(query, tuple(params)).fetchone()[0]
+
     def delete_all_data(self) -> None:
         """
         Deleta todos os dados de uma tabela.
@@ -121,8 +164,8 @@ class DB:
 
     def close_connection(self) -> None:
         """
-        Fecha a conexão com o Banco de Dados.
+        Fecha a conexão da thread atual com o Banco de Dados. Uma nova conexão é aberta no próximo uso.
         """
 
-        self._connection.close()
+        get_manager(PATH_DB).close()
         self._logger.info('DESCONEXÃO COM BANCO DE DADOS CONCLUÍDA')
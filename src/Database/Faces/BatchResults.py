@@ -0,0 +1,72 @@
+import sqlite3 as sql
+from typing import Iterable, Tuple
+
+from src.Database.DB import DB
+
+
+class BatchResults(DB):
+    """
+    Classe responsável por armazenar os resultados do reconhecimento facial em lote.
+    """
+
+    _table_name: str
+
+    def __init__(self, table_name: str) -> None:
+        """
+        Método construtor da classe
+
+        :param table_name: Nome da tabela.
+        """
+        super().__init__()
+        self._table_name = table_name
+
+    def create_table(self) -> None:
+        """
+        Cria a tabela com as respectivas colunas e suas informações
+        """
+
+        try:
+            self._cursor.execute(f"""
+            create table if not exists {self._table_name}
+            (
+            ID integer not null primary key autoincrement,
+            Arquivo text not null,
+            Nome text,
+            Distancia real,
+            Top integer,
+            Right integer,
+            Bottom integer,
+            Left integer,
+            Data_processamento text not null
+            )
+            """)
+        except sql.Error as e:
+            self._logger.error('ERRO NA CRIAÇÃO DA TABELA.')
+            self._logger.exception(f'EXCEÇÃO: {e}')
+        else:
+            self._connection.commit()
+            self._logger.info(f'TABELA {self._table_name} CRIADA')
+
+    def insert_many(self, rows: Iterable[Tuple]) -> bool:
+        """
+        Insere vários registros numa única transação.
+
+        :param rows: Registros no formato (Arquivo, Nome, Distancia, Top, Right, Bottom, Left, Data_processamento).
+        Arquivos sem rostos têm Nome, Distancia e a localização nulos.
+        :return: Retorna um valor booleano que indica se a inserção foi bem sucedida ou não.
+        """
+
+        try:
+            self._cursor.executemany(f"""
+            insert into {self._table_name} (Arquivo, Nome, Distancia, Top, Right, Bottom, Left, Data_processamento)
+            values
+            (?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+        except sql.Error as e:
+            self._connection.rollback()
+            self._logger.error('ERRO NA INSERÇÃO DA TABELA.')
+            self._logger.exception(f'EXCEÇÃO: {e}')
+            return False
+        else:
+            self._connection.commit()
+            return True
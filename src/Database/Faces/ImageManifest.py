@@ -0,0 +1,89 @@
+import sqlite3 as sql
+from typing import Iterable, Tuple
+
+from src.Database.DB import DB
+
+
+class ImageManifest(DB):
+    """
+    Classe responsável por registrar as imagens do diretório já processadas por cada etapa.
+    """
+
+    _table_name: str
+
+    def __init__(self, table_name: str) -> None:
+        """
+        Método construtor da classe
+
+        :param table_name: Nome da tabela.
+        """
+        super().__init__()
+        self._table_name = table_name
+
+    def create_table(self) -> None:
+        """
+        Cria a tabela com as respectivas colunas e suas informações
+        """
+
+        try:
+            self._cursor.execute(f"""
+            create table if not exists {self._table_name}
+            (
+            Arquivo text not null primary key,
+            Tamanho integer not null,
+            Data_modificacao integer not null,
+            Hash text not null,
+            Etapas text not null,
+            Data_atualizacao text not null
+            )
+            """)
+        except sql.Error as e:
+            self._logger.error('ERRO NA CRIAÇÃO DA TABELA.')
+            self._logger.exception(f'EXCEÇÃO: {e}')
+        else:
+            self._connection.commit()
+            self._logger.info(f'TABELA {self._table_name} CRIADA')
+
+    def insert_many(self, rows: Iterable[Tuple]) -> bool:
+        """
+        Insere ou substitui vários registros numa única transação.
+
+        :param rows: Registros no formato (Arquivo, Tamanho, Data_modificacao, Hash, Etapas, Data_atualizacao). O
+        tamanho é dado em bytes, a data de modificação em nanossegundos e as etapas separadas por vírgula.
+        :return: Retorna um valor booleano que indica se a inserção foi bem sucedida ou não.
+        """
+
+        try:
+            self._cursor.executemany(f"""
+            insert or replace into {self._table_name} (Arquivo, Tamanho, Data_modificacao, Hash, Etapas,
+            Data_atualizacao)
+            values
+            (?, ?, ?, ?, ?, ?)
+            """, rows)
+        except sql.Error as e:
+            self._connection.rollback()
+            self._logger.error('ERRO NA INSERÇÃO DA TABELA.')
+            self._logger.exception(f'EXCEÇÃO: {e}')
+            return False
+        else:
+            self._connection.commit()
+            return True
+
+    def delete_many(self, keys: Iterable[str]) -> bool:
+        """
+        Exclui os registros de vários arquivos numa única transação.
+
+        :param keys: Nome dos arquivos.
+        :return: Retorna um valor booleano que indica se a exclusão foi bem sucedida ou não.
+        """
+
+        try:
+            self._cursor.executemany(f'delete from {self._table_name} where Arquivo = ?;', [(key,) for key in keys])
+        except sql.Error as e:
+            self._connection.rollback()
+            self._logger.error('ERRO NA DELEÇÃO DOS DADOS.')
+            self._logger.exception(f'EXCEÇÃO: {e}')
+            return False
+        else:
+            self._connection.commit()
+            return True
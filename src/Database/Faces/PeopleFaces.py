@@ -1,5 +1,58 @@
+import itertools
+import json
 import sqlite3 as sql
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
 from src.Database.DB import DB
+from src.config import API_PAGE_SIZE, ENCODING_SIZE, ENROLL_CHUNK_SIZE, READ_BLOCK_SIZE
+
+# Tipo dos valores do encoding armazenado. Cada encoding ocupa um BLOB de ENCODING_SIZE * 4 bytes.
+ENCODING_DTYPE = np.float32
+
+
+def encoding_to_blob(face_encoding: Any) -> bytes:
+    """
+    Converte o encoding de um rosto para o BLOB armazenado na coluna Face_encoding.
+
+    :param face_encoding: Encoding do rosto, como array ou lista de ENCODING_SIZE valores.
+    :return: Retorna os bytes do encoding em float32.
+    """
+
+    encoding = np.asarray(face_encoding, dtype=ENCODING_DTYPE).reshape(-1)
+    if encoding.size != ENCODING_SIZE:
+        raise ValueError(f'O ENCODING DEVE TER {ENCODING_SIZE} VALORES, MAS TEM {encoding.size}')
+    return encoding.tobytes()
+
+
+def text_to_encoding(text: str) -> np.ndarray:
+    """
+    Converte um encoding no formato de texto antigo, a representação impressa do array, para um array float32.
+
+    :param text: Encoding em texto, como "[-0.12 0.14 ...]".
+    :return: Retorna o encoding como array float32.
+    """
+
+    return np.array(text.strip('[]').split(), dtype=ENCODING_DTYPE)
+
+
+def blobs_to_matrix(values: Sequence[Any]) -> np.ndarray:
+    """
+    Converte os valores lidos da coluna Face_encoding para uma matriz de encodings.
+
+    Os BLOBs são concatenados e interpretados de uma só vez com np.frombuffer. Valores no formato de texto antigo,
+    ainda não migrados com "database migrate", são convertidos um a um.
+
+    :param values: Valores da coluna Face_encoding, em BLOB ou texto.
+    :return: Retorna uma matriz float32 de formato (N, ENCODING_SIZE).
+    """
+
+    if all(isinstance(value, bytes) for value in values):
+        return np.frombuffer(b''.join(values), dtype=ENCODING_DTYPE).reshape(-1, ENCODING_SIZE)
+    encodings = [np.frombuffer(value, dtype=ENCODING_DTYPE) if isinstance(value, bytes) else text_to_encoding(value)
+                 for value in values]
+    return np.array(encodings, dtype=ENCODING_DTYPE).reshape(-1, ENCODING_SIZE)
 
 
 class PeopleFaces(DB):
@@ -30,7 +83,7 @@ class PeopleFaces(DB):
             ID integer not null primary key autoincrement,
             Nome text not null,
             Type_face text not null check (Type_face in ("KNOWN", "UNKNOWN")),
-            Face_encoding text not null,
+            Face_encoding blob not null,
             Data_criacao text not null,
             UNIQUE(Nome)
             )
@@ -42,13 +95,13 @@ class PeopleFaces(DB):
             self._connection.commit()
             self._logger.info(f'TABELA {self._table_name} CRIADA')
 
-    def insert(self, name: str = None, face_encoding: list = None, type_face: str = None,
+    def insert(self, name: str = None, face_encoding: Any = None, type_face: str = None,
                date_creation: str = None) -> bool:
         """
         Método responsável por inserir novos registros na tabela.
 
         :param name: Nome do indivíduo. Nomes que começam com "face_" indicam alguém que não possui identificação.
-        :param face_encoding: Encoding do rosto do indivíduo.
+        :param face_encoding: Encoding do rosto do indivíduo, armazenado como BLOB float32.
         :param type_face: Indica se o indivíduo é alguém conhecido ou desconhecido, representado pelos valores KNOWN e
         UNKNOWN, respectivamente.
         :param date_creation: Data de criação do registro.
@@ -60,7 +113,8 @@ class PeopleFaces(DB):
             insert into {self._table_name} (Nome, Face_encoding, Type_face, Data_criacao)
             values
             (?, ?, ?, ?)
-            """, (str(name), str(face_encoding), str(type_face), str(date_creation)))
+            """, (str(name), encoding_to_blob(face_encoding), str(type_face), str(date_creation)))
+            self._bump_data_version()
         except sql.Error as e:
             self._logger.error('ERRO NA INSERÇÃO DA TABELA.')
             self._logger.exception(f'EXCEÇÃO: {e}')
@@ -68,3 +122,205 @@ class PeopleFaces(DB):
         else:
             self._connection.commit()
             return True
+
+    def _bump_data_version(self) -> None:
+        """
+        Incrementa a versão dos dados (PRAGMA user_version) dentro da transação atual, sinalizando às cópias da
+        galeria, como o snapshot em disco, que a tabela mudou. Atualizações de registros existentes não alteram o
+        número de registros nem o maior ID, então precisam desse contador.
+        """
+
+        version = self._cursor.execute('pragma user_version;').fetchone()[0]
+        self._cursor.execute(f'pragma user_version = {version + 1};')
+
+    def watermark(self) -> Tuple[int, int, int]:
+        """
+        Resume o estado atual da tabela para detectar mudanças sem ler os registros.
+
+        :return: Retorna a versão dos dados, o número de registros e o maior ID da tabela.
+        """
+
+        version = self._cursor.execute('pragma user_version;').fetchone()[0]
+        num_rows, max_id = self._cursor.execute(f'select count(*), max(ID) from {self._table_name};').fetchone()
+        return version, num_rows, max_id or 0
+
+    def page(self, order: str = 'ID', after: Any = None, prefix: Optional[str] = None,
+             limit: int = API_PAGE_SIZE) -> List[Tuple[int, str, str, str]]:
+        """
+        Recupera uma página de pessoas com paginação por chave (keyset): em vez de OFFSET, a página continua a partir
+        da última chave da página anterior, então qualquer página custa o mesmo que a primeira. A ordem por ID usa a
+        chave primária e a ordem por nome usa o índice da restrição UNIQUE(Nome), que também atende o filtro por
+        prefixo, escrito como um intervalo de nomes para que o índice seja usado. O filtro por prefixo só é aceito na
+        ordem por nome: na ordem por ID, cada página leria e ordenaria todos os nomes do prefixo.
+
+        :param order: Coluna de ordenação e da chave de paginação: "ID" ou "Nome".
+        :param after: Última chave da página anterior. Se None, retorna a primeira página.
+        :param prefix: Prefixo do nome, com diferença entre maiúsculas e minúsculas. Exige a ordem por nome.
+        :param limit: Número máximo de registros.
+        :return: Retorna o ID, o nome, o tipo e a data de criação de cada pessoa.
+        """
+
+        if order not in ('ID', 'Nome'):
+            raise ValueError(f'Ordenação inválida: {order}')
+        if prefix and order != 'Nome':
+            raise ValueError('O filtro por prefixo exige a ordenação por nome')
+        conditions, params = [], []
+        if prefix:
+            conditions.append('Nome >= ? and Nome < ?')
+            params.extend([prefix, prefix + '\U0010ffff'])
+        if after is not None:
+            conditions.append(f'{order} > ?')
+            params.append(after)
+        query = f'select ID, Nome, Type_face, Data_criacao from {self._table_name}'
+        if conditions:
+            query += ' where ' + ' and '.join(conditions)
+        query += f' order by {order} limit ?;'
+        return self._cursor.execute(query, (*params, limit)).fetchall()
+
+    def iter_encodings(self, where: Optional[str] = None, params: Sequence = (),
+                       block_size: int = READ_BLOCK_SIZE) -> Iterator[Tuple[List[str], np.ndarray]]:
+        """
+        Percorre os nomes e encodings da tabela em blocos, já convertidos para matrizes NumPy.
+
+        :param where: Condição SQL opcional, sem a palavra "where", com "?" no lugar dos valores.
+        :param params: Valores da condição.
+        :param block_size: Número máximo de registros por bloco.
+        :return: Gerador de blocos com a lista de nomes e a matriz float32 (N, ENCODING_SIZE) de encodings.
+        """
+
+        for rows in self.iter_table(columns=['Nome', 'Face_encoding'], where=where, params=params,
+                                    block_size=block_size):
+            yield [row[0] for row in rows], blobs_to_matrix([row[1] for row in rows])
+
+    def _existing_names(self, names: List[str]) -> Set[str]:
+        """
+        Consulta quais nomes já existem na tabela, numa única consulta.
+
+        :param names: Nomes consultados.
+        :return: Retorna o conjunto de nomes já existentes.
+        """
+
+        rows = self._cursor.execute(f"""
+        select Nome from {self._table_name} where Nome in (select value from json_each(?));
+        """, (json.dumps(names),)).fetchall()
+        return {row[0] for row in rows}
+
+    def insert_many(self, records: Iterable[Tuple[str, Any, str, str]], chunk_size: int = ENROLL_CHUNK_SIZE,
+                    upsert: bool = False) -> Tuple[int, List[str]]:
+        """
+        Insere vários registros na tabela com executemany, numa transação por bloco de registros.
+
+        Registros cujo nome já existe (restrição UNIQUE(Nome)), na tabela ou repetidos nos próprios registros, são
+        reportados como conflitos: são ignorados na inserção ou substituídos com upsert. Os conflitos são resolvidos
+        antes da inserção, então qualquer outra restrição violada (CHECK, NOT NULL) gera um erro e o bloco não é
+        gravado, em vez de o registro ser descartado em silêncio.
+
+        :param records: Registros no formato (Nome, Face_encoding, Type_face, Data_criacao).
+        :param chunk_size: Número de registros gravados em cada transação.
+        :param upsert: Flag indicando que os registros em conflito devem substituir os existentes.
+        :return: Retorna o número de registros gravados e a lista de nomes em conflito.
+        """
+
+        insert_query = f"""
+        insert into {self._table_name} (Nome, Face_encoding, Type_face, Data_criacao)
+        values
+        (?, ?, ?, ?)
+        """
+        delete_query = f"""
+        delete from {self._table_name} where Nome in (select value from json_each(?));
+        """
+
+        num_written, conflicts = 0, []
+        records = iter(records)
+        while True:
+            chunk = list(itertools.islice(records, chunk_size))
+            if not chunk:
+                break
+
+            rows = []
+            for name, face_encoding, type_face, date_creation in chunk:
+                try:
+                    rows.append((str(name), encoding_to_blob(face_encoding), str(type_face), str(date_creation)))
+                except ValueError as e:
+                    self._logger.warning(f'REGISTRO {name} IGNORADO: {e}')
+            existing = self._existing_names([row[0] for row in rows])
+            # Um registro por nome: o primeiro na inserção simples e o último no upsert, como se fossem gravados
+            # um a um
+            chunk_conflicts, unique_rows = [], {}
+            for row in rows:
+                if row[0] in existing or row[0] in unique_rows:
+                    chunk_conflicts.append(row[0])
+                if upsert or row[0] not in unique_rows:
+                    unique_rows[row[0]] = row
+            new_rows = [row for row in unique_rows.values() if upsert or row[0] not in existing]
+
+            try:
+                # No upsert, o registro em conflito é apagado e inserido novamente, com um novo ID. Assim, quem
+                # acompanha a tabela pelo maior ID e pelo número de registros percebe que houve uma substituição, e
+                # não apenas inserções.
+                num_deleted = 0
+                if upsert and existing:
+                    num_deleted = self._cursor.execute(delete_query, (json.dumps(sorted(existing)),)).rowcount
+                self._cursor.executemany(insert_query, new_rows)
+                # Um bloco só de conflitos não altera a tabela e não deve invalidar as cópias da galeria
+                if new_rows or num_deleted:
+                    self._bump_data_version()
+            except sql.Error as e:
+                self._connection.rollback()
+                self._logger.error('ERRO NA INSERÇÃO DA TABELA.')
+                self._logger.exception(f'EXCEÇÃO: {e}')
+                continue
+            self._connection.commit()
+            num_written += len(new_rows)
+            conflicts.extend(chunk_conflicts)
+
+        if conflicts:
+            action = 'SUBSTITUÍDOS' if upsert else 'IGNORADOS'
+            self._logger.warning(f'{len(conflicts)} REGISTROS COM NOME JÁ EXISTENTE FORAM {action}: '
+                                 f'{", ".join(conflicts[:10])}{"..." if len(conflicts) > 10 else ""}')
+        self._logger.info(f'{num_written} REGISTROS GRAVADOS NA TABELA {self._table_name}')
+        return num_written, conflicts
+
+    def migrate_encodings(self, batch_size: int) -> int:
+        """
+        Converte, no próprio Banco de Dados, os encodings armazenados como texto para BLOBs float32.
+
+        Os registros são percorridos em ordem de ID e convertidos em lotes, com um commit por lote, de modo que a
+        migração pode ser interrompida e retomada.
+
+        :param batch_size: Número de registros convertidos por lote.
+        :return: Retorna o número de registros convertidos.
+        """
+
+        self._logger.info(f'MIGRANDO ENCODINGS DA TABELA {self._table_name} PARA BLOB...')
+        last_id, num_migrated = -1, 0
+        while True:
+            rows = self._cursor.execute(f"""
+            select ID, Face_encoding from {self._table_name}
+            where typeof(Face_encoding) = 'text' and ID > ?
+            order by ID
+            limit ?
+            """, (last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            updates: List[tuple] = []
+            for row_id, text in rows:
+                try:
+                    updates.append((encoding_to_blob(text_to_encoding(text)), row_id))
+                except ValueError as e:
+                    self._logger.warning(f'ENCODING DO REGISTRO {row_id} NÃO PÔDE SER CONVERTIDO: {e}')
+            try:
+                self._cursor.executemany(f'update {self._table_name} set Face_encoding = ? where ID = ?;', updates)
+            except sql.Error as e:
+                self._connection.rollback()
+                self._logger.error('ERRO NA MIGRAÇÃO DOS ENCODINGS.')
+                self._logger.exception(f'EXCEÇÃO: {e}')
+                break
+            self._connection.commit()
+            num_migrated += len(updates)
+            self._logger.info(f'{num_migrated} ENCODINGS MIGRADOS')
+
+        self._logger.info(f'MIGRAÇÃO CONCLUÍDA: {num_migrated} ENCODINGS CONVERTIDOS')
+        return num_migrated
@@ -1,10 +1,12 @@
 from pathlib import Path
-from typing import Tuple, Any, List, Union
+from typing import Tuple, Any, Iterable, Iterator, List, Optional, Sequence, Union
 import os
 
 import click
+import numpy as np
 
-from src.config import PATH_PROJECT
+from src.config import PATH_PROJECT, MIGRATE_BATCH_SIZE, READ_BLOCK_SIZE, API_PAGE_SIZE, ENROLL_CHUNK_SIZE
+from src.Database.Connection import get_manager
 from src.Database.options import TABLE_DICT, DB_DICT, EnumDB, EnumTables
 
 
@@ -93,11 +95,10 @@ def execute_check_database_tables() -> None:
 
 def execute_close_connection() -> None:
     """
-     Executa o término da conexão do Banco de Dados.
+     Executa o término da conexão da thread atual com o Banco de Dados, sem abrir uma conexão nova.
     """
 
-    obj = DB_DICT[EnumDB.database.value]()
-    obj.close_connection()
+    get_manager().close()
 
 
 def execute_insert(table: str, name: str, face_encoding: Any, type_face: str, date_creation: str) -> None:
@@ -120,6 +121,127 @@ def execute_insert(table: str, name: str, face_encoding: Any, type_face: str, da
     )
 
 
+def execute_insert_many(table: str, rows: Iterable[tuple]) -> bool:
+    """
+    Executa a inserção de vários registros dentro de uma tabela, numa única transação. Na tabela PeopleFaces, que
+    reporta os conflitos de nome, use execute_insert_faces.
+
+    :param table: Nome da tabela.
+    :param rows: Registros, na ordem de colunas esperada pelo método insert_many da tabela.
+    :return: Retorna um valor booleano que indica se a inserção foi bem sucedida ou não.
+    """
+
+    if EnumTables(table) == EnumTables.peoplefaces:
+        raise ValueError('Use execute_insert_faces para inserir na tabela PeopleFaces')
+    obj = TABLE_DICT[EnumTables(table)](table_name=table)
+    return obj.insert_many(rows)
+
+
+def execute_insert_faces(records: Iterable[Tuple[str, Any, str, str]], chunk_size: int = ENROLL_CHUNK_SIZE,
+                         upsert: bool = False) -> Tuple[int, List[str]]:
+    """
+    Executa a inserção de vários rostos na tabela PeopleFaces, numa transação por bloco de registros.
+
+    :param records: Registros no formato (Nome, Face_encoding, Type_face, Data_criacao).
+    :param chunk_size: Número de registros gravados em cada transação.
+    :param upsert: Flag indicando que os registros em conflito devem substituir os existentes.
+    :return: Retorna o número de registros gravados e a lista de nomes em conflito.
+    """
+
+    table = EnumTables.peoplefaces.value
+    obj = TABLE_DICT[EnumTables(table)](table_name=table)
+    return obj.insert_many(records, chunk_size=chunk_size, upsert=upsert)
+
+
+def execute_delete_many(table: str, keys: Iterable[str]) -> bool:
+    """
+    Executa a exclusão de vários registros de uma tabela, pela chave primária, numa única transação.
+
+    :param table: Nome da tabela.
+    :param keys: Chaves dos registros.
+    :return: Retorna um valor booleano que indica se a exclusão foi bem sucedida ou não.
+    """
+
+    obj = TABLE_DICT[EnumTables(table)](table_name=table)
+    return obj.delete_many(keys)
+
+
+def execute_migrate_encodings(batch_size: int = MIGRATE_BATCH_SIZE) -> int:
+    """
+    Executa a conversão dos encodings da tabela PeopleFaces, armazenados como texto, para BLOBs float32.
+
+    :param batch_size: Número de registros convertidos por lote.
+    :return: Retorna o número de registros convertidos.
+    """
+
+    table = EnumTables.peoplefaces.value
+    obj = TABLE_DICT[EnumTables(table)](table_name=table)
+    return obj.migrate_encodings(batch_size=batch_size)
+
+
+def execute_iter_table(table: str, columns: Union[str, List[str]] = '*', where: Optional[str] = None,
+                       params: Sequence = (), block_size: int = READ_BLOCK_SIZE) -> Iterator[List[tuple]]:
+    """
+    Executa a leitura de uma tabela em blocos, sem carregar a tabela inteira na memória.
+
+    :param table: Nome da tabela.
+    :param columns: Nome das colunas. "*" para retornar registros de todas as colunas.
+    :param where: Condição SQL opcional, sem a palavra "where", com "?" no lugar dos valores.
+    :param params: Valores da condição.
+    :param block_size: Número máximo de registros por bloco.
+    :return: Gerador de blocos de registros.
+    """
+
+    obj = TABLE_DICT[EnumTables(table)](table_name=table)
+    return obj.iter_table(columns=columns, where=where, params=params, block_size=block_size)
+
+
+def execute_iter_encodings(where: Optional[str] = None, params: Sequence = (),
+                           block_size: int = READ_BLOCK_SIZE) -> Tuple[int, Iterator[Tuple[List[str], np.ndarray]]]:
+    """
+    Executa a leitura dos nomes e encodings da tabela PeopleFaces em blocos de matrizes NumPy.
+
+    :param where: Condição SQL opcional, sem a palavra "where", com "?" no lugar dos valores.
+    :param params: Valores da condição.
+    :param block_size: Número máximo de registros por bloco.
+    :return: Retorna o número de registros esperado, contado antes da leitura, e o gerador de blocos com a lista de
+    nomes e a matriz de encodings.
+    """
+
+    table = EnumTables.peoplefaces.value
+    obj = TABLE_DICT[EnumTables(table)](table_name=table)
+    return obj.count(where=where, params=params), obj.iter_encodings(where=where, params=params, block_size=block_size)
+
+
+def execute_gallery_watermark() -> Tuple[int, int, int]:
+    """
+    Executa a leitura do estado atual da tabela PeopleFaces, usado para invalidar cópias da galeria.
+
+    :return: Retorna a versão dos dados, o número de registros e o maior ID da tabela.
+    """
+
+    table = EnumTables.peoplefaces.value
+    obj = TABLE_DICT[EnumTables(table)](table_name=table)
+    return obj.watermark()
+
+
+def execute_people_page(order: str = 'ID', after: Any = None, prefix: Optional[str] = None,
+                        limit: int = API_PAGE_SIZE) -> List[Tuple[int, str, str, str]]:
+    """
+    Executa a leitura de uma página da tabela PeopleFaces, com paginação por chave.
+
+    :param order: Coluna de ordenação e da chave de paginação: "ID" ou "Nome".
+    :param after: Última chave da página anterior. Se None, retorna a primeira página.
+    :param prefix: Prefixo do nome. Exige a ordem por nome.
+    :param limit: Número máximo de registros.
+    :return: Retorna o ID, o nome, o tipo e a data de criação de cada pessoa.
+    """
+
+    table = EnumTables.peoplefaces.value
+    obj = TABLE_DICT[EnumTables(table)](table_name=table)
+    return obj.page(order=order, after=after, prefix=prefix, limit=limit)
+
+
 def execute_read_table(table: str, columns: Union[str, List[str]]) -> Any:
     """
     Exxecuta a leitura de uma tabela, após a seleção das colunas que serão lidas.
@@ -1,3 +1,5 @@
+from src.Database.Faces.BatchResults import BatchResults
+from src.Database.Faces.ImageManifest import ImageManifest
 from src.Database.Faces.PeopleFaces import PeopleFaces
 from src.Database.DB import DB
 from enum import Enum
@@ -9,6 +11,8 @@ class EnumTables(Enum):
     """
 
     peoplefaces = 'PeopleFaces'
+    batchresults = 'BatchResults'
+    imagemanifest = 'ImageManifest'
 
 
 class EnumDB(Enum):
@@ -21,7 +25,9 @@ class EnumDB(Enum):
 
 # Dicionário que permite acesso aos objetos do tipo tabela que fazem parte do banco de Dados.
 TABLE_DICT = {
-    EnumTables.peoplefaces: PeopleFaces
+    EnumTables.peoplefaces: PeopleFaces,
+    EnumTables.batchresults: BatchResults,
+    EnumTables.imagemanifest: ImageManifest
 }
 
 # Dicionário que permite o acesso aos objeto do tipo BD.
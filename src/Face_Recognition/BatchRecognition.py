@@ -0,0 +1,228 @@
+import csv
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+
+import cv2
+from tqdm import tqdm
+
+from src.Database.execute import execute_create_table, execute_insert_many
+from src.Database.options import EnumTables
+from src.Face_Recognition import Models as models
+from src.Face_Recognition.GalleryMatcher import GalleryMatcher
+from src.Face_Recognition.SharedGallery import SharedGallery, SharedGalleryHandle
+from src.Face_Recognition.Sources import IMAGE_EXTENSIONS
+from src.Face_Recognition.options import EnumMatchers, MATCHER_DICT
+from src.config import MATCHER, BATCH_TASK_SIZE, BATCH_COMMIT_SIZE, BATCH_UPSAMPLE, BATCH_JITTERS
+
+# Colunas dos resultados, na ordem da tabela BatchResults.
+COLUMNS = ('Arquivo', 'Nome', 'Distancia', 'Top', 'Right', 'Bottom', 'Left', 'Data_processamento')
+
+# Galeria de cada processo do pool, criada uma única vez sobre a memória compartilhada.
+_worker_shared: Optional[SharedGallery] = None
+_worker_gallery: Optional[GalleryMatcher] = None
+
+
+def _init_worker(handle: SharedGalleryHandle) -> None:
+    """
+    Inicializa um processo do pool, acessando a galeria compartilhada, e o índice dela, sem copiá-los.
+
+    :param handle: Informações da galeria compartilhada.
+    """
+
+    global _worker_shared, _worker_gallery
+    _worker_shared = SharedGallery.attach(handle=handle)
+    _worker_gallery = _worker_shared.gallery()
+
+
+def _recognize_files(paths: List[str]) -> List[Tuple]:
+    """
+    Reconhece os rostos de um lote de imagens dentro de um processo do pool.
+
+    :param paths: Caminho das imagens.
+    :return: Lista de registros no formato de COLUMNS. Imagens sem rostos geram um registro com nome nulo.
+    """
+
+    rows = []
+    for path in paths:
+        image = cv2.imread(path)
+        if image is None:
+            logging.getLogger(__name__).warning(f'NÃO FOI POSSÍVEL LER A IMAGEM {path}')
+            continue
+        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        faces_locations = models.face_locations(rgb_image, number_of_times_to_upsample=BATCH_UPSAMPLE)
+        date = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+        if not faces_locations:
+            rows.append((path, None, None, None, None, None, None, date))
+            continue
+
+        faces_encodings = models.face_encodings(rgb_image, faces_locations, num_jitters=BATCH_JITTERS)
+        best_match_indexes, best_distances, matches = _worker_gallery.match(faces_encodings)
+        for i, (top, right, bottom, left) in enumerate(faces_locations):
+            name = _worker_gallery.class_names()[best_match_indexes[i]] if matches[i] else 'UNKNOWN'
+            distance = float(best_distances[i]) if best_match_indexes[i] >= 0 else None
+            rows.append((path, name, distance, top, right, bottom, left, date))
+    return rows
+
+
+class BatchRecognition:
+    """
+    Classe responsável pelo reconhecimento facial em lote de imagens armazenadas.
+
+    As imagens são distribuídas em lotes entre os processos de um pool. A galeria é carregada uma única vez e
+    compartilhada com os processos via memória compartilhada na inicialização do pool, e os resultados são gravados
+    em blocos, à medida que chegam, na tabela BatchResults ou num arquivo CSV.
+    """
+
+    _logger: logging.Logger
+    _input_dir: Path
+    _output: Optional[Path]
+    _workers: int
+    _pending_rows: List[Tuple]
+    _csv_file: Optional[object]
+    _csv_writer: Optional[object]
+
+    def __init__(self, input_dir: Union[str, Path], output: Union[str, Path, None] = None,
+                 workers: Optional[int] = None) -> None:
+        """
+        Método Construtor da classe.
+
+        :param input_dir: Diretório com as imagens, percorrido recursivamente.
+        :param output: Arquivo CSV de saída. Se None, os resultados são gravados na tabela BatchResults.
+        :param workers: Número de processos do pool. Se None, usa o número de núcleos.
+        """
+
+        self._logger = logging.getLogger(__name__)
+        self._input_dir = Path(input_dir)
+        self._output = Path(output) if output is not None else None
+        self._workers = workers or os.cpu_count() or 1
+        self._pending_rows = []
+        self._csv_file, self._csv_writer = None, None
+
+    def _list_images(self) -> Iterator[str]:
+        """
+        Percorre o diretório de entrada recursivamente, em ordem alfabética.
+
+        :return: Gerador com o caminho de cada imagem.
+        """
+
+        for root, dirs, files in os.walk(self._input_dir):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield os.path.join(root, name)
+
+    def _chunks(self, paths: Iterator[str]) -> Iterator[List[str]]:
+        """
+        Agrupa os caminhos em lotes, reduzindo a comunicação entre os processos.
+
+        :param paths: Gerador de caminhos.
+        :return: Gerador de lotes com até BATCH_TASK_SIZE caminhos.
+        """
+
+        chunk = []
+        for path in paths:
+            chunk.append(path)
+            if len(chunk) == BATCH_TASK_SIZE:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _open_output(self) -> None:
+        """
+        Prepara o destino dos resultados: cria o arquivo CSV com o cabeçalho ou a tabela BatchResults.
+        """
+
+        if self._output is None:
+            execute_create_table(table=EnumTables.batchresults.value)
+        else:
+            self._csv_file = open(self._output, 'w', newline='', encoding='utf-8')
+            self._csv_writer = csv.writer(self._csv_file)
+            self._csv_writer.writerow(COLUMNS)
+
+    def _write(self, rows: List[Tuple], force: bool = False) -> int:
+        """
+        Acumula os resultados e os grava em blocos de BATCH_COMMIT_SIZE registros. Se a gravação no Banco de Dados
+        falhar, os registros continuam acumulados e são gravados novamente na próxima chamada.
+
+        :param rows: Novos registros.
+        :param force: Flag indicando que os registros acumulados devem ser gravados imediatamente.
+        :return: Retorna o número de registros gravados nesta chamada.
+        """
+
+        self._pending_rows.extend(rows)
+        if not self._pending_rows or (len(self._pending_rows) < BATCH_COMMIT_SIZE and not force):
+            return 0
+        if self._csv_writer is not None:
+            self._csv_writer.writerows(self._pending_rows)
+            self._csv_file.flush()
+        elif not execute_insert_many(table=EnumTables.batchresults.value, rows=self._pending_rows):
+            self._logger.error(f'ERRO AO GRAVAR {len(self._pending_rows)} REGISTROS, MANTIDOS PARA A PRÓXIMA GRAVAÇÃO')
+            return 0
+        num_written, self._pending_rows = len(self._pending_rows), []
+        return num_written
+
+    def run(self) -> int:
+        """
+        Executa o reconhecimento de todas as imagens do diretório de entrada.
+
+        :return: Retorna o número de registros gravados.
+        """
+
+        gallery = MATCHER_DICT[EnumMatchers(MATCHER)].from_database()
+        shared = SharedGallery.create(gallery=gallery)
+        del gallery
+
+        self._open_output()
+        self._logger.info(f'INICIANDO RECONHECIMENTO EM LOTE DE {self._input_dir} COM {self._workers} PROCESSOS...')
+        num_rows = 0
+        chunks = self._chunks(self._list_images())
+        progress = tqdm(desc='RECONHECENDO IMAGENS...', unit='img')
+        try:
+            with ProcessPoolExecutor(max_workers=self._workers, initializer=_init_worker,
+                                     initargs=(shared.handle(),)) as executor:
+                in_flight = {}
+                for chunk in chunks:
+                    in_flight[executor.submit(_recognize_files, chunk)] = len(chunk)
+                    if len(in_flight) < 2 * self._workers:
+                        continue
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    num_rows += self._collect(done=done, in_flight=in_flight, progress=progress)
+                num_rows += self._collect(done=list(in_flight), in_flight=in_flight, progress=progress)
+            num_rows += self._write([], force=True)
+            if self._pending_rows:
+                self._logger.error(f'{len(self._pending_rows)} REGISTROS NÃO FORAM GRAVADOS')
+        finally:
+            progress.close()
+            if self._csv_file is not None:
+                self._csv_file.close()
+            shared.close()
+
+        self._logger.info(f'RECONHECIMENTO EM LOTE CONCLUÍDO: {num_rows} REGISTROS GRAVADOS')
+        return num_rows
+
+    def _collect(self, done, in_flight: dict, progress: tqdm) -> int:
+        """
+        Recolhe os resultados dos lotes concluídos e os encaminha para gravação.
+
+        :param done: Lotes concluídos.
+        :param in_flight: Lotes em execução, dos quais os concluídos são removidos.
+        :param progress: Barra de progresso.
+        :return: Retorna o número de registros gravados.
+        """
+
+        num_rows = 0
+        for future in done:
+            progress.update(in_flight.pop(future))
+            try:
+                rows = future.result()
+            except Exception as e:
+                self._logger.error('ERRO NO RECONHECIMENTO DE UM LOTE DE IMAGENS')
+                self._logger.exception(f'EXCEÇÃO: {e}')
+                continue
+            num_rows += self._write(rows)
+        return num_rows
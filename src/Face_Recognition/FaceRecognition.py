@@ -1,13 +1,22 @@
+import json
 import logging
-from typing import Tuple, Any, List, Union
+import os
+import threading
+import time
+from typing import Tuple, Any, Dict, List, Optional, TextIO, Union
 
 import cv2
-import face_recognition as fr
-import numpy as np
 
-from src.Database.execute import execute_read_table
-from src.Database.options import EnumTables
-from src.config import TOLERANCE
+from src.Face_Recognition import Models as models, Sources as sources
+from src.Face_Recognition.FrameBroadcaster import FrameBroadcaster
+from src.Face_Recognition.GalleryMatcher import GalleryMatcher
+from src.Face_Recognition.GalleryWatcher import GalleryWatcher
+from src.Face_Recognition.Pipeline import Frame, Pipeline
+from src.Face_Recognition.Scheduler import AdaptiveScheduler
+from src.Face_Recognition.Tracker import FaceTracker
+from src.Face_Recognition.options import EnumMatchers, MATCHER_DICT
+from src.config import MATCHER, INFERENCE_WORKERS, GALLERY_POLL_SECONDS, STREAM_JPEG_QUALITY
+from src.utils import metrics
 
 
 class FaceRecognition:
@@ -16,19 +25,34 @@ class FaceRecognition:
     """
 
     _logger: logging.Logger
-    _list_known_encodes: list
-    _list_class_names: list
+    _gallery: Optional[GalleryMatcher]
+    _watcher: Optional[GalleryWatcher]
     _model: str
+    _tracker: FaceTracker
+    _tracking_lock: threading.Lock
+    _last_sequence: int
+    _scheduler: AdaptiveScheduler
+    _window_name: str
+    _broadcaster: Optional[FrameBroadcaster]
 
-    def __init__(self, gpu: bool = False) -> None:
+    def __init__(self, gpu: bool = False, gallery: Optional[GalleryMatcher] = None) -> None:
         """
         Método Construtor da classe.
 
         :param gpu: Flag indicando necessidade de uso da GPU.
+        :param gallery: Galeria de rostos conhecidos já carregada. Se None, a galeria é carregada do Banco de Dados
+        e acompanha os novos rostos cadastrados durante o reconhecimento.
         """
 
-        self._list_known_encodes, self._list_class_names = [], []
+        self._gallery = gallery
+        self._watcher = None
         self._model = 'cnn' if gpu else 'hog'
+        self._tracker = FaceTracker()
+        self._tracking_lock = threading.Lock()
+        self._last_sequence = -1
+        self._scheduler = AdaptiveScheduler()
+        self._window_name = 'Video'
+        self._broadcaster = None
         self._logger = logging.getLogger(__name__)
 
     def _load_ClassNames_FaceEncodings(self) -> None:
@@ -36,48 +60,127 @@ class FaceRecognition:
         Carrega os class_names e face_encodings de cada rosto armazenado no Banco de Dados.
         """
 
-        result = execute_read_table(
-            table=EnumTables.peoplefaces.value,
-            columns=['Nome', 'Face_encoding']
-        )
-        for i in range(0, len(result)):
-            self._list_class_names.append(result[i][0])
-            encoding = result[i][1].strip('[]').split()
-            encoding = [float(elemento) for elemento in encoding]
-            encoding = np.array(encoding)
-            self._list_known_encodes.append(encoding)
+        self._gallery = MATCHER_DICT[EnumMatchers(MATCHER)].from_database()
+        if GALLERY_POLL_SECONDS is not None:
+            self._watcher = GalleryWatcher(gallery=self._gallery, watermark=self._gallery.watermark(),
+                                           on_reload=self._swap_gallery)
 
-    def _recognition(self, frame: Any, faces_locations: list, faces_encodings: list, faces_names: list) -> tuple[
-        list[Union[str, Any]], Any, list[tuple[int, int, int]]]:
+    def _swap_gallery(self, gallery: GalleryMatcher) -> None:
         """
-        Realiza o reconhecimento do rosto em tempo real na Webcam.
+        Troca a galeria usada pelo reconhecimento. A troca é uma única atribuição, então os frames em processamento
+        terminam com a galeria anterior e os seguintes já usam a nova.
+
+        :param gallery: Nova galeria.
+        """
+
+        self._gallery = gallery
+
+    def _start_watcher(self) -> None:
+        """
+        Inicia o acompanhamento dos novos rostos cadastrados, se a galeria foi carregada pela própria classe.
+        """
+
+        if self._watcher is not None:
+            self._watcher.start()
+
+    def _stop_watcher(self) -> None:
+        """
+        Para o acompanhamento dos novos rostos cadastrados.
+        """
+
+        if self._watcher is not None:
+            self._watcher.stop()
+
+    def _recognition(self, frame: Any, timestamp: Optional[float] = None, sequence: Optional[int] = None) -> Optional[
+            Tuple[List[str], List[Tuple[int, int, int, int]], List[Tuple[int, int, int]], List[float]]]:
+        """
+        Realiza o reconhecimento dos rostos presentes num frame da Webcam.
+
+        Os rostos são detectados em todo frame processado, mas o encoding e a busca na galeria só são executados
+        para as trilhas novas ou com identificação expirada. As demais mantêm o nome já identificado. A redução do
+        frame, o número de upsamples e de jitters e os frames pulados são definidos pelo escalonador.
+
+        A detecção pode ser executada por várias threads ao mesmo tempo, mas o rastreamento e a identificação são
+        executados uma thread por vez e em ordem de captura: um frame cuja detecção termina depois da de um frame mais
+        novo é descartado, pois suas caixas substituiriam as mais recentes e seu instante voltaria no tempo.
 
         :param frame: Frame atual na Câmera da Webcam.
-        :param faces_locations: Lista com a localização dos rostos das pessoas.
-        :param faces_encodings: Lista com o encoding dos rostos das pessoas.
-        :param faces_names: Listas com o nome das pessoas.
-        :return: Uma tupla com a lista do nome das pessoas, localização do rosto das pessoas e a cor da caixa e texto.
-        """
-
-        small_frame = cv2.resize(frame, (0, 0), fx=0.25, fy=0.25)
-        rgb_small_frame = small_frame[:, :, ::-1]
-        faces_locations = fr.face_locations(rgb_small_frame, number_of_times_to_upsample=2, model=self._model)
-        faces_encodings = fr.face_encodings(rgb_small_frame, faces_locations, num_jitters=2)
-        face_colors = [(0, 0, 255)] * len(faces_locations)
-
-        faces_names = []
-        for i, face_encoding in enumerate(faces_encodings):
-            matches = fr.compare_faces(self._list_known_encodes, face_encoding, tolerance=TOLERANCE)
-            name = 'UNKNOWN'
-
-            face_distance = fr.face_distance(self._list_known_encodes, face_encoding)
-            best_match_index = np.argmin(face_distance)
-            if matches[best_match_index]:
-                name = self._list_class_names[best_match_index]
-                face_colors[i] = (0, 255, 0)
-                self._logger.info(f'ROSTO DE {name} DETECTADO')
-            faces_names.append(name)
-        return faces_names, faces_locations, face_colors
+        :param timestamp: Instante do frame, em segundos, usado pelo rastreamento. Se None, usa o relógio do sistema.
+        :param sequence: Número de sequência do frame, usado para manter a ordem do rastreamento. Se None, os frames
+        são considerados em ordem, como no processamento sem janela.
+        :return: Uma tupla com a lista do nome das pessoas, localização do rosto das pessoas (nas coordenadas do
+        frame original), a cor da caixa e texto e a distância até o rosto conhecido mais próximo. Retorna None se o
+        frame foi pulado pelo escalonador ou descartado por estar fora de ordem, pois ele não tem resultado próprio.
+        """
+
+        settings = self._scheduler.settings()
+        if settings is None:
+            metrics.increment('recognition_frames_skipped')
+            return None
+
+        start = time.perf_counter()
+        small_frame = cv2.resize(frame, (0, 0), fx=settings.scale, fy=settings.scale)
+        rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+        detection_start = time.perf_counter()
+        metrics.observe('recognition_resize', detection_start - start)
+        small_locations = models.face_locations(rgb_small_frame, number_of_times_to_upsample=settings.upsample,
+                                                model=self._model)
+        detection_seconds = time.perf_counter() - detection_start
+        metrics.observe('recognition_detection', detection_seconds)
+        faces_locations = [tuple(int(round(coordinate / settings.scale)) for coordinate in location)
+                           for location in small_locations]
+        with self._tracking_lock:
+            if sequence is not None:
+                if sequence <= self._last_sequence:
+                    metrics.increment('recognition_frames_out_of_order')
+                    return None
+                self._last_sequence = sequence
+            with metrics.timer('recognition_tracking'):
+                tracks = self._tracker.update(faces_locations, now=timestamp)
+
+            # Identificação dentro da seção ordenada, para que uma trilha nova seja identificada por uma única thread
+            encoding_start = time.perf_counter()
+            pending = [i for i, (_, needs_identity) in enumerate(tracks) if needs_identity]
+            if pending:
+                faces_encodings = models.face_encodings(rgb_small_frame, [small_locations[i] for i in pending],
+                                                        num_jitters=settings.jitters)
+                match_start = time.perf_counter()
+                metrics.observe('recognition_encoding', match_start - encoding_start)
+                gallery = self._gallery
+                best_match_indexes, best_distances, matches = gallery.match(faces_encodings)
+                metrics.observe('recognition_matching', time.perf_counter() - match_start)
+                for j, i in enumerate(pending):
+                    track = tracks[i][0]
+                    name = 'UNKNOWN'
+                    if matches[j]:
+                        name = gallery.class_names()[best_match_indexes[j]]
+                        if track.name != name:
+                            self._logger.info(f'ROSTO DE {name} DETECTADO')
+                    self._tracker.identify(track=track, name=name, distance=float(best_distances[j]), now=timestamp)
+            encoding_seconds = time.perf_counter() - encoding_start
+        metrics.increment('recognition_faces_detected', len(tracks))
+        metrics.increment('recognition_faces_encoded', len(pending))
+
+        faces_names = [track.name for track, _ in tracks]
+        face_colors = [(0, 0, 255) if name == 'UNKNOWN' else (0, 255, 0) for name in faces_names]
+        faces_distances = [track.distance for track, _ in tracks]
+        self._scheduler.record(settings=settings, frame_pixels=frame.shape[0] * frame.shape[1],
+                               detection_seconds=detection_seconds, encoding_seconds=encoding_seconds,
+                               num_encoded=len(pending), total_seconds=time.perf_counter() - start)
+        metrics.observe('recognition_total', time.perf_counter() - start)
+        return faces_names, faces_locations, face_colors, faces_distances
+
+    def _process_frame(self, frame: Frame) -> Optional[Tuple[
+            List[str], List[Tuple[int, int, int, int]], List[Tuple[int, int, int]], List[float]]]:
+        """
+        Função de inferência do Pipeline: reconhece os rostos do frame, com o instante e o número de sequência da
+        captura.
+
+        :param frame: Frame capturado pelo Pipeline.
+        :return: Retorna o resultado de _recognition.
+        """
+
+        return self._recognition(frame=frame.image, timestamp=frame.timestamp, sequence=frame.index)
 
     def _display_result(self, frame: Any, faces_locations: Any, faces_names: Union[str, Any],
                         faces_colors: List[Tuple[int, int, int]]) -> None:
@@ -91,10 +194,6 @@ class FaceRecognition:
         """
 
         for (top, right, bottom, left), name, color in zip(faces_locations, faces_names, faces_colors):
-            top *= 4
-            right *= 4
-            bottom *= 4
-            left *= 4
             center_x = (left + right) // 2
             center_y = (top + bottom) // 2
             radius = (right - left) // 2
@@ -108,39 +207,152 @@ class FaceRecognition:
 
             cv2.putText(frame, f'{name}', (text_x, text_y), font, 1.0, (255, 255, 255), 2)
 
-    def run(self) -> None:
+    def _publish(self, frame: Any, result: Optional[tuple]) -> bool:
+        """
+        Desenha o resultado mais recente sobre o frame, codifica-o em JPEG uma única vez e o publica na transmissão.
+        Sem espectadores, ou antes do intervalo mínimo entre frames, o frame é ignorado sem ser desenhado. Se a
+        transmissão ficar sem espectadores por tempo demais, ela é encerrada e o reconhecimento termina.
+
+        :param frame: Frame mais recente da Câmera da Webcam.
+        :param result: Resultado mais recente do método _recognition, ou None se ainda não houver resultado.
+        :return: Retorna uma flag indicando se o reconhecimento deve continuar.
+        """
+
+        if self._broadcaster.wants_frame():
+            if result is not None:
+                faces_names, faces_locations, faces_colors, _ = result
+                with metrics.timer('render_drawing'):
+                    self._display_result(frame=frame, faces_locations=faces_locations, faces_names=faces_names,
+                                         faces_colors=faces_colors)
+            with metrics.timer('stream_jpeg_encoding'):
+                ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, STREAM_JPEG_QUALITY])
+            if ok:
+                self._broadcaster.publish(jpeg.tobytes())
+                metrics.increment('stream_frames_published')
+        return not self._broadcaster.close_if_idle()
+
+    def _render(self, frame: Any, result: Optional[tuple]) -> bool:
+        """
+        Desenha o resultado mais recente do reconhecimento sobre o frame e o mostra no monitor, ou o publica na
+        transmissão MJPEG, se houver uma.
+
+        :param frame: Frame mais recente da Câmera da Webcam.
+        :param result: Resultado mais recente do método _recognition, ou None se ainda não houver resultado.
+        :return: Retorna uma flag indicando se o reconhecimento deve continuar.
+        """
+
+        if self._broadcaster is not None:
+            return self._publish(frame=frame, result=result)
+        if result is not None:
+            faces_names, faces_locations, faces_colors, _ = result
+            with metrics.timer('render_drawing'):
+                self._display_result(frame=frame, faces_locations=faces_locations, faces_names=faces_names,
+                                     faces_colors=faces_colors)
+        cv2.imshow(self._window_name, frame)
+        return cv2.waitKey(1) & 0xff != 27
+
+    def run(self, source: Union[int, str] = 0, workers: int = INFERENCE_WORKERS,
+            broadcaster: Optional[FrameBroadcaster] = None) -> Dict[str, float]:
         """
         Método principal que realiza os procedimentos para o reconhecimento facial.
+
+        :param source: Índice da câmera ou endereço do vídeo usado como fonte dos frames.
+        :param workers: Número de threads de inferência.
+        :param broadcaster: Transmissão MJPEG que recebe os frames anotados no lugar da janela. O reconhecimento
+        termina quando a transmissão é encerrada.
+        :return: Retorna as estatísticas de desempenho do reconhecimento.
         """
 
-        self._logger.info('ABRINDO WEBCAM...')
-        video_capture = cv2.VideoCapture(0)
+        self._logger.info(f'ABRINDO CÂMERA {source}...')
+        video_capture = cv2.VideoCapture(source)
         if not video_capture.isOpened():
-            self._logger.warning('ERRO AO ABRIR A WEBCAM')
+            self._logger.warning(f'ERRO AO ABRIR A CÂMERA {source}')
             exit()
 
-        self._load_ClassNames_FaceEncodings()
+        if self._gallery is None:
+            self._load_ClassNames_FaceEncodings()
 
-        faces_locations, faces_encodings, faces_names, faces_colors = [], [], [], []
-        process_this_frame = True
         self._logger.info('INICIANDO RECONHECIMENTO FACIAL...')
-        while 1:
-            ret, frame = video_capture.read()
-            if process_this_frame:
-                faces_names, faces_locations, faces_colors = self._recognition(frame=frame,
-                                                                               faces_locations=faces_locations,
-                                                                               faces_encodings=faces_encodings,
-                                                                               faces_names=faces_names)
-            process_this_frame = not process_this_frame
-
-            self._display_result(frame=frame, faces_locations=faces_locations, faces_names=faces_names,
-                                 faces_colors=faces_colors)
-            cv2.imshow('Video', frame)
-            if cv2.waitKey(1) & 0xff == 27:
-                break
+        self._scheduler = AdaptiveScheduler(workers=workers)
+        # A numeração dos frames recomeça a cada Pipeline, assim como as trilhas
+        self._tracker.reset()
+        self._last_sequence = -1
+        self._window_name = f'Video {source}' if source != 0 else 'Video'
+        self._broadcaster = broadcaster
+        pipeline = Pipeline(capture=video_capture, process=self._process_frame, render=self._render, workers=workers,
+                            name=str(source))
+        self._start_watcher()
+        try:
+            pipeline.run()
+        finally:
+            self._stop_watcher()
 
         video_capture.release()
-        cv2.destroyAllWindows()
+        if broadcaster is None:
+            cv2.destroyAllWindows()
+        return pipeline.stats()
+
+    def run_headless(self, source: Union[int, str], output: TextIO) -> Dict[str, float]:
+        """
+        Realiza o reconhecimento facial sem janela, escrevendo o resultado de cada frame em JSON Lines.
+
+        Arquivos de vídeo e diretórios de imagens são processados por completo, o mais rápido possível e com
+        parâmetros fixos, tornando o resultado reprodutível. Câmeras e transmissões ao vivo descartam os frames
+        desatualizados e usam o escalonador adaptativo.
+
+        :param source: Índice da câmera, endereço da transmissão, arquivo de vídeo ou diretório de imagens.
+        :param output: Arquivo de saída dos resultados.
+        :return: Retorna as estatísticas de desempenho do reconhecimento.
+        """
+
+        live = sources.is_live(source)
+        is_directory = not live and os.path.isdir(source)
+        try:
+            frames = sources.open_source(source)
+        except OSError as e:
+            self._logger.error(f'ERRO AO ABRIR A FONTE {source}')
+            self._logger.exception(f'EXCEÇÃO: {e}')
+            return {}
+
+        if self._gallery is None:
+            self._load_ClassNames_FaceEncodings()
+        self._scheduler = AdaptiveScheduler(adaptive=live)
+        # As trilhas de uma fonte anterior não valem para esta, cujos instantes podem recomeçar do zero
+        self._tracker.reset()
+
+        self._logger.info(f'INICIANDO RECONHECIMENTO FACIAL DE {source} SEM JANELA...')
+        num_frames, num_faces = 0, 0
+        start = time.perf_counter()
+        self._start_watcher()
+        try:
+            for frame in frames:
+                if is_directory:
+                    self._tracker.reset()
+                result = self._recognition(frame=frame.image, timestamp=None if live else frame.timestamp)
+                if result is None:
+                    continue
+                faces_names, faces_locations, _, faces_distances = result
+                record = {'source': str(source), 'frame': frame.index, 'timestamp': frame.timestamp}
+                if frame.name is not None:
+                    record['file'] = frame.name
+                record['faces'] = [
+                    {'name': name, 'box': list(location), 'distance': round(distance, 4) if distance < 1e9 else None}
+                    for name, location, distance in zip(faces_names, faces_locations, faces_distances)
+                ]
+                output.write(json.dumps(record, ensure_ascii=False) + '\n')
+                num_frames += 1
+                num_faces += len(faces_names)
+        except KeyboardInterrupt:
+            self._logger.info('RECONHECIMENTO INTERROMPIDO')
+        finally:
+            self._stop_watcher()
+        output.flush()
+
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        stats = {'processed': num_frames, 'faces': num_faces, 'process_fps': num_frames / elapsed}
+        self._logger.info(f'[{source}] {num_frames} FRAMES PROCESSADOS EM {elapsed:.1f}s '
+                          f'({stats["process_fps"]:.1f} FPS) | {num_faces} ROSTOS')
+        return stats
 
 
 if __name__ == '__main__':
@@ -0,0 +1,135 @@
+import threading
+import time
+from typing import Iterator, Optional
+
+from src.config import STREAM_MAX_FPS, STREAM_IDLE_SECONDS
+
+
+class FrameBroadcaster:
+    """
+    Classe responsável por distribuir os frames anotados do reconhecimento aos espectadores de uma transmissão MJPEG.
+
+    Cada frame é codificado em JPEG uma única vez e guardado já no formato de uma parte multipart; todos os
+    espectadores recebem os mesmos bytes. Apenas o frame mais recente é mantido: um espectador lento recebe o frame
+    atual quando termina de enviar o anterior, descartando os intermediários, e o reconhecimento nunca espera por ele.
+    Sem espectadores, os frames nem são desenhados ou codificados, e depois de um tempo sem espectadores a
+    transmissão é encerrada, liberando a fonte e o reconhecimento.
+    """
+
+    _condition: threading.Condition
+    _chunk: Optional[bytes]
+    _sequence: int
+    _viewers: int
+    _closed: bool
+    _min_interval: float
+    _last_publish: float
+    _idle_seconds: Optional[float]
+    _idle_since: float
+
+    def __init__(self, max_fps: Optional[float] = STREAM_MAX_FPS,
+                 idle_seconds: Optional[float] = STREAM_IDLE_SECONDS) -> None:
+        """
+        Método Construtor da classe.
+
+        :param max_fps: Número máximo de frames publicados por segundo. Se None, publica todos os frames exibidos.
+        :param idle_seconds: Tempo, em segundos, sem espectadores após o qual a transmissão é encerrada. Se None, a
+        transmissão só é encerrada pelo método close.
+        """
+
+        self._condition = threading.Condition()
+        self._chunk = None
+        self._sequence = 0
+        self._viewers = 0
+        self._closed = False
+        self._min_interval = 1 / max_fps if max_fps else 0.0
+        self._last_publish = 0.0
+        self._idle_seconds = idle_seconds
+        self._idle_since = time.monotonic()
+
+    def viewers(self) -> int:
+        """
+        Número de espectadores conectados.
+        """
+
+        return self._viewers
+
+    def closed(self) -> bool:
+        """
+        Flag indicando se a transmissão foi encerrada.
+        """
+
+        return self._closed
+
+    def wants_frame(self) -> bool:
+        """
+        Indica se vale a pena desenhar e codificar o frame atual: há espectadores e o intervalo mínimo entre frames
+        publicados já passou.
+
+        :return: Retorna uma flag indicando se o próximo frame deve ser publicado.
+        """
+
+        return self._viewers > 0 and time.monotonic() - self._last_publish >= self._min_interval
+
+    def close_if_idle(self) -> bool:
+        """
+        Encerra a transmissão se ela está sem espectadores há mais de idle_seconds.
+
+        :return: Retorna uma flag indicando se a transmissão está encerrada.
+        """
+
+        with self._condition:
+            if (not self._closed and self._idle_seconds is not None and self._viewers == 0
+                    and time.monotonic() - self._idle_since >= self._idle_seconds):
+                self._closed = True
+                self._condition.notify_all()
+            return self._closed
+
+    def publish(self, jpeg: bytes) -> None:
+        """
+        Publica um frame, substituindo o anterior, e acorda os espectadores.
+
+        :param jpeg: Frame codificado em JPEG.
+        """
+
+        chunk = b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n%b\r\n' % (len(jpeg), jpeg)
+        with self._condition:
+            self._chunk = chunk
+            self._sequence += 1
+            self._last_publish = time.monotonic()
+            self._condition.notify_all()
+
+    def frames(self) -> Iterator[bytes]:
+        """
+        Gera as partes multipart de um espectador, sempre com o frame mais recente, até a transmissão ser encerrada ou
+        o espectador se desconectar.
+
+        :return: Gerador com as partes da resposta multipart/x-mixed-replace.
+        """
+
+        with self._condition:
+            self._viewers += 1
+        try:
+            sequence = 0
+            while True:
+                with self._condition:
+                    self._condition.wait_for(lambda: self._sequence != sequence or self._closed, timeout=1.0)
+                    if self._closed:
+                        break
+                    if self._sequence == sequence:
+                        continue
+                    chunk, sequence = self._chunk, self._sequence
+                yield chunk
+        finally:
+            with self._condition:
+                self._viewers -= 1
+                if self._viewers == 0:
+                    self._idle_since = time.monotonic()
+
+    def close(self) -> None:
+        """
+        Encerra a transmissão, liberando os espectadores.
+        """
+
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
@@ -0,0 +1,320 @@
+import copy
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.Database.execute import execute_iter_encodings, execute_gallery_watermark
+from src.Face_Recognition.GallerySnapshot import GallerySnapshot
+from src.config import TOLERANCE, ENCODING_SIZE, GALLERY_SNAPSHOT
+
+
+class GalleryMatcher(ABC):
+    """
+    Classe abstrata, responsável por comparar os encodings dos rostos detectados com a galeria de rostos conhecidos.
+
+    Os encodings conhecidos ficam armazenados numa única matriz contígua float32 de formato (N, 128). As classes
+    filhas implementam a busca pelo rosto mais próximo, de forma exata ou aproximada.
+    """
+
+    _logger: logging.Logger
+    _encodings: np.ndarray
+    _squared_norms: np.ndarray
+    _buffer: Optional[np.ndarray]
+    _norms_buffer: Optional[np.ndarray]
+    _class_names: List[str]
+    _tolerance: float
+    _watermark: Optional[Tuple[int, int, int]]
+
+    def __init__(self, encodings: Any = None, class_names: List[str] = None, tolerance: float = TOLERANCE) -> None:
+        """
+        Método Construtor da classe.
+
+        :param encodings: Encodings dos rostos conhecidos, em qualquer formato conversível para uma matriz (N, 128).
+        :param class_names: Nome de cada rosto conhecido, na mesma ordem dos encodings.
+        :param tolerance: Distância máxima para considerar que dois rostos correspondem.
+        """
+
+        self._logger = logging.getLogger(__name__)
+        self._tolerance = tolerance
+        self._watermark = None
+        self._set_gallery(encodings=encodings, class_names=class_names)
+
+    def __len__(self) -> int:
+        """
+        Número de rostos conhecidos na galeria.
+        """
+
+        return self._encodings.shape[0]
+
+    @classmethod
+    def from_database(cls, use_snapshot: bool = GALLERY_SNAPSHOT, **kwargs) -> 'GalleryMatcher':
+        """
+        Cria a galeria a partir dos rostos armazenados no Banco de Dados.
+
+        Se a cópia da galeria em disco estiver atualizada, a matriz é mapeada em memória sem ler os registros. Caso
+        contrário, a tabela é lida em blocos e a cópia é refeita. A leitura se limita aos registros com ID até o maior
+        ID do estado da tabela lido no início, guardado na galeria (método watermark), então rostos inseridos durante
+        o carregamento ficam de fora e são acrescentados depois pelo GalleryWatcher, sem duplicatas.
+
+        :param use_snapshot: Flag indicando se a cópia da galeria em disco deve ser usada e mantida.
+        :param kwargs: Parâmetros adicionais repassados ao construtor da classe.
+        :return: Retorna a galeria com os nomes e encodings da tabela PeopleFaces.
+        """
+
+        watermark = execute_gallery_watermark()
+        if use_snapshot:
+            snapshot = GallerySnapshot().load(watermark=watermark)
+            if snapshot is not None:
+                names, encodings = snapshot
+                gallery = cls(encodings=encodings, class_names=names, **kwargs)
+                gallery._watermark = watermark
+                return gallery
+
+        expected, blocks = execute_iter_encodings(where='ID <= ?', params=(watermark[2],))
+        list_class_names = []
+        known_encodings = np.empty((expected, ENCODING_SIZE), dtype=np.float32)
+        for names, block in blocks:
+            start = len(list_class_names)
+            list_class_names.extend(names)
+            if len(list_class_names) > known_encodings.shape[0]:
+                # Registros inseridos entre a contagem e a leitura.
+                known_encodings = np.concatenate([known_encodings[:start], block])
+            else:
+                known_encodings[start:len(list_class_names)] = block
+        known_encodings = known_encodings[:len(list_class_names)]
+
+        if use_snapshot and (expected, len(list_class_names)) == (watermark[1], watermark[1]):
+            GallerySnapshot().save(names=list_class_names, encodings=known_encodings, watermark=watermark)
+        gallery = cls(encodings=known_encodings, class_names=list_class_names, **kwargs)
+        gallery._watermark = watermark
+        return gallery
+
+    @classmethod
+    def from_shared_arrays(cls, arrays: Dict[str, np.ndarray], class_names: List[str],
+                           **kwargs) -> 'GalleryMatcher':
+        """
+        Cria a galeria sobre as matrizes já calculadas por outro processo (método shared_arrays), sem copiá-las e sem
+        recalcular normas ou índices.
+
+        :param arrays: Matrizes da galeria, normalmente apoiadas na memória compartilhada.
+        :param class_names: Nome de cada rosto conhecido.
+        :param kwargs: Parâmetros adicionais repassados ao construtor da classe.
+        :return: Retorna a galeria.
+        """
+
+        gallery = cls(**kwargs)
+        gallery._restore(arrays=arrays, class_names=class_names)
+        return gallery
+
+    def shared_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Acessa as matrizes necessárias para recriar a galeria em outro processo com from_shared_arrays.
+
+        :return: Dicionário com as matrizes da galeria, pelo nome.
+        """
+
+        return {'encodings': self._encodings, 'squared_norms': self._squared_norms}
+
+    def _restore(self, arrays: Dict[str, np.ndarray], class_names: List[str]) -> None:
+        """
+        Substitui a galeria pelas matrizes de shared_arrays, sem cópias.
+
+        :param arrays: Matrizes da galeria.
+        :param class_names: Nome de cada rosto conhecido.
+        """
+
+        self._encodings = arrays['encodings']
+        self._squared_norms = arrays['squared_norms']
+        self._class_names = list(class_names)
+        if len(self._class_names) != self._encodings.shape[0]:
+            raise ValueError('O NÚMERO DE NOMES E DE ENCODINGS DA GALERIA É DIFERENTE')
+        self._buffer, self._norms_buffer = None, None
+
+    def appended(self, encodings: Any, class_names: List[str]) -> 'GalleryMatcher':
+        """
+        Cria uma nova galeria com os rostos atuais seguidos dos novos rostos, sem alterar a galeria atual.
+
+        Assim, quem está usando a galeria atual pode continuar a usá-la até trocar a referência pela nova.
+
+        :param encodings: Encodings dos novos rostos.
+        :param class_names: Nome de cada novo rosto.
+        :return: Retorna a nova galeria, com os mesmos parâmetros da atual.
+        """
+
+        gallery = copy.copy(self)
+        gallery._set_gallery(encodings=np.concatenate([self._encodings, self._as_matrix(encodings)]),
+                             class_names=self._class_names + list(class_names))
+        return gallery
+
+    @staticmethod
+    def _as_matrix(encodings: Any) -> np.ndarray:
+        """
+        Converte os encodings para uma matriz contígua float32 de formato (N, 128).
+
+        :param encodings: Lista de encodings, array 1D de um único encoding ou matriz de encodings.
+        :return: Matriz contígua float32.
+        """
+
+        if encodings is None or (not isinstance(encodings, np.ndarray) and len(encodings) == 0):
+            return np.empty((0, ENCODING_SIZE), dtype=np.float32)
+        matrix = np.asarray(encodings, dtype=np.float32)
+        return np.ascontiguousarray(matrix.reshape(-1, ENCODING_SIZE))
+
+    @staticmethod
+    def _squared_distances(queries: np.ndarray, matrix: np.ndarray, squared_norms: np.ndarray) -> np.ndarray:
+        """
+        Calcula o quadrado da distância euclidiana entre cada consulta e cada linha de uma matriz.
+
+        :param queries: Matriz (M, 128) de consultas.
+        :param matrix: Matriz (N, 128) de referência.
+        :param squared_norms: Quadrado da norma de cada linha da matriz de referência.
+        :return: Matriz (M, N) com o quadrado das distâncias, sem valores negativos.
+        """
+
+        squared = squared_norms[np.newaxis, :] - 2.0 * (queries @ matrix.T)
+        squared += np.einsum('ij,ij->i', queries, queries)[:, np.newaxis]
+        return np.maximum(squared, 0.0, out=squared)
+
+    def _set_gallery(self, encodings: Any, class_names: List[str]) -> None:
+        """
+        Substitui a galeria de rostos conhecidos.
+
+        :param encodings: Encodings dos rostos conhecidos.
+        :param class_names: Nome de cada rosto conhecido.
+        """
+
+        self._encodings = self._as_matrix(encodings)
+        self._class_names = list(class_names) if class_names is not None else []
+        if len(self._class_names) != self._encodings.shape[0]:
+            raise ValueError('O NÚMERO DE NOMES E DE ENCODINGS DA GALERIA É DIFERENTE')
+        self._squared_norms = np.einsum('ij,ij->i', self._encodings, self._encodings)
+        self._buffer, self._norms_buffer = None, None
+
+    def append(self, encodings: Any, class_names: List[str]) -> None:
+        """
+        Acrescenta rostos à própria galeria. A matriz cresce em blocos, dobrando a capacidade quando necessário, então
+        acrescentar K rostos um a um custa O(N + K) cópias no total.
+
+        A galeria é alterada no lugar e não deve ser usada em buscas concorrentes; nesse caso, use appended.
+
+        :param encodings: Encodings dos novos rostos.
+        :param class_names: Nome de cada novo rosto.
+        """
+
+        new_encodings = self._as_matrix(encodings)
+        if new_encodings.shape[0] != len(class_names):
+            raise ValueError('O NÚMERO DE NOMES E DE ENCODINGS DA GALERIA É DIFERENTE')
+        size, new_size = len(self), len(self) + new_encodings.shape[0]
+        if self._buffer is None or self._buffer.shape[0] < new_size:
+            capacity = max(new_size, 2 * size, 64)
+            buffer = np.empty((capacity, ENCODING_SIZE), dtype=np.float32)
+            norms_buffer = np.empty(capacity, dtype=np.float32)
+            buffer[:size] = self._encodings
+            norms_buffer[:size] = self._squared_norms
+            self._buffer, self._norms_buffer = buffer, norms_buffer
+
+        self._buffer[size:new_size] = new_encodings
+        self._norms_buffer[size:new_size] = np.einsum('ij,ij->i', new_encodings, new_encodings)
+        self._encodings = self._buffer[:new_size]
+        self._squared_norms = self._norms_buffer[:new_size]
+        self._class_names.extend(class_names)
+
+    def watermark(self) -> Optional[Tuple[int, int, int]]:
+        """
+        Acessa o estado da tabela PeopleFaces do qual a galeria foi carregada.
+
+        :return: Retorna a versão dos dados, o número de registros e o maior ID da tabela, ou None se a galeria não foi
+        carregada do Banco de Dados.
+        """
+
+        return self._watermark
+
+    def class_names(self) -> List[str]:
+        """
+        Acessa o nome dos rostos conhecidos.
+
+        :return: Lista com o nome de cada rosto, na mesma ordem da matriz de encodings.
+        """
+
+        return self._class_names
+
+    def encodings(self) -> np.ndarray:
+        """
+        Acessa a matriz de encodings dos rostos conhecidos.
+
+        :return: Matriz float32 de formato (N, 128).
+        """
+
+        return self._encodings
+
+    def distances(self, faces_encodings: Any) -> np.ndarray:
+        """
+        Calcula a distância euclidiana exata entre cada rosto detectado e cada rosto conhecido.
+
+        :param faces_encodings: Encodings dos M rostos detectados.
+        :return: Matriz de distâncias de formato (M, N).
+        """
+
+        queries = self._as_matrix(faces_encodings)
+        squared = self._squared_distances(queries, self._encodings, self._squared_norms)
+        return np.sqrt(squared, out=squared)
+
+    def top_k(self, faces_encodings: Any, k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Encontra os k rostos conhecidos mais próximos de cada rosto detectado, com a distância exata. Todas as
+        consultas são comparadas com a galeria numa única multiplicação de matrizes, então agrupar consultas de
+        várias origens numa só chamada custa pouco mais que uma consulta.
+
+        :param faces_encodings: Encodings dos M rostos detectados.
+        :param k: Número de rostos conhecidos por consulta, limitado ao tamanho da galeria.
+        :return: Uma tupla com os índices, as distâncias e as flags de correspondência, todos de formato (M, k) e em
+        ordem crescente de distância.
+        """
+
+        queries = self._as_matrix(faces_encodings)
+        k = max(0, min(k, len(self)))
+        if queries.shape[0] == 0 or k == 0:
+            return (np.empty((queries.shape[0], 0), dtype=np.intp), np.empty((queries.shape[0], 0), dtype=np.float32),
+                    np.empty((queries.shape[0], 0), dtype=bool))
+
+        distances = self.distances(queries)
+        if k < len(self):
+            indexes = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        else:
+            indexes = np.broadcast_to(np.arange(len(self)), distances.shape)
+        top_distances = np.take_along_axis(distances, indexes, axis=1)
+        order = np.argsort(top_distances, axis=1, kind='stable')
+        indexes = np.take_along_axis(indexes, order, axis=1)
+        top_distances = np.take_along_axis(top_distances, order, axis=1)
+        return indexes, top_distances, top_distances <= self._tolerance
+
+    @abstractmethod
+    def _search(self, queries: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Busca o rosto conhecido mais próximo de cada consulta. Deve ser implementado pelas classes filhas.
+
+        :param queries: Matriz (M, 128) de consultas, com M > 0 e galeria não vazia.
+        :return: Uma tupla com o índice do rosto mais próximo e a distância até ele.
+        """
+
+    def match(self, faces_encodings: Any) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Encontra o rosto conhecido mais próximo de cada rosto detectado.
+
+        :param faces_encodings: Encodings dos M rostos detectados.
+        :return: Uma tupla com o índice do rosto mais próximo, a distância até ele e a flag indicando se há
+        correspondência, todos com M elementos. Sem galeria, o índice é -1 e a distância é infinita.
+        """
+
+        queries = self._as_matrix(faces_encodings)
+        num_faces = queries.shape[0]
+        if num_faces == 0 or len(self) == 0:
+            return (np.full(num_faces, -1, dtype=np.intp),
+                    np.full(num_faces, np.inf, dtype=np.float32),
+                    np.zeros(num_faces, dtype=bool))
+
+        best_indexes, best_distances = self._search(queries)
+        matches = best_distances <= self._tolerance
+        return best_indexes, best_distances, matches
@@ -0,0 +1,95 @@
+import json
+import logging
+import os
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from src.config import PATH_GALLERY_SNAPSHOT
+
+
+class GallerySnapshot:
+    """
+    Classe responsável pela cópia da galeria em disco, ao lado do Banco de Dados.
+
+    A matriz de encodings é salva como .npy e aberta com np.load(mmap_mode='r'), de modo que a inicialização não lê
+    nem converte os registros do Banco de Dados e vários processos da mesma máquina compartilham as mesmas páginas do
+    cache do sistema operacional. Os nomes e o estado da tabela no momento da cópia ficam num arquivo .json; a cópia
+    só é usada enquanto esse estado for igual ao atual da tabela PeopleFaces.
+    """
+
+    _logger: logging.Logger
+    _matrix_path: Path
+    _names_path: Path
+
+    def __init__(self, path: Union[str, Path] = PATH_GALLERY_SNAPSHOT) -> None:
+        """
+        Método Construtor da classe.
+
+        :param path: Caminho dos arquivos da cópia, sem extensão.
+        """
+
+        self._logger = logging.getLogger(__name__)
+        path = Path(path)
+        self._matrix_path = path.with_name(path.name + '.npy')
+        self._names_path = path.with_name(path.name + '.json')
+
+    def load(self, watermark: Sequence[int]) -> Optional[Tuple[List[str], np.ndarray]]:
+        """
+        Abre a cópia da galeria, se ela corresponder ao estado atual da tabela.
+
+        :param watermark: Estado atual da tabela PeopleFaces: versão dos dados, número de registros e maior ID.
+        :return: Retorna os nomes e a matriz de encodings mapeada em memória, somente leitura, ou None se a cópia não
+        existir ou estiver desatualizada.
+        """
+
+        try:
+            with open(self._names_path, encoding='utf-8') as file:
+                metadata = json.load(file)
+            stat = os.stat(self._matrix_path)
+            if metadata['watermark'] != list(watermark) or metadata['matrix'] != [stat.st_size, stat.st_mtime_ns]:
+                self._logger.info('CÓPIA DA GALERIA DESATUALIZADA')
+                return None
+            encodings = np.load(self._matrix_path, mmap_mode='r')
+        except (OSError, ValueError, KeyError) as e:
+            self._logger.info(f'CÓPIA DA GALERIA INDISPONÍVEL: {e}')
+            return None
+
+        names = metadata['names']
+        if encodings.shape[0] != len(names):
+            self._logger.warning('CÓPIA DA GALERIA INCONSISTENTE')
+            return None
+        self._logger.info(f'CÓPIA DA GALERIA COM {len(names)} ROSTOS MAPEADA DE {self._matrix_path}')
+        return names, encodings
+
+    def save(self, names: List[str], encodings: np.ndarray, watermark: Sequence[int]) -> None:
+        """
+        Salva a cópia da galeria. Os arquivos são escritos com nomes temporários e substituídos atomicamente, então
+        processos que já mapearam a cópia anterior continuam a lê-la sem interferência.
+
+        :param names: Nome de cada rosto.
+        :param encodings: Matriz float32 de encodings.
+        :param watermark: Estado da tabela PeopleFaces no momento da leitura.
+        """
+
+        suffix = f'.{os.getpid()}.tmp'
+        matrix_tmp = self._matrix_path.with_name(self._matrix_path.name + suffix)
+        names_tmp = self._names_path.with_name(self._names_path.name + suffix)
+        try:
+            with open(matrix_tmp, 'wb') as file:
+                np.save(file, np.ascontiguousarray(encodings, dtype=np.float32))
+            os.replace(matrix_tmp, self._matrix_path)
+            stat = os.stat(self._matrix_path)
+            with open(names_tmp, 'w', encoding='utf-8') as file:
+                json.dump({'watermark': list(watermark), 'matrix': [stat.st_size, stat.st_mtime_ns], 'names': names},
+                          file, ensure_ascii=False)
+            os.replace(names_tmp, self._names_path)
+        except OSError as e:
+            self._logger.error('ERRO AO SALVAR A CÓPIA DA GALERIA')
+            self._logger.exception(f'EXCEÇÃO: {e}')
+            for path in (matrix_tmp, names_tmp):
+                if path.exists():
+                    path.unlink()
+        else:
+            self._logger.info(f'CÓPIA DA GALERIA COM {len(names)} ROSTOS SALVA EM {self._matrix_path}')
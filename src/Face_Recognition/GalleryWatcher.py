@@ -0,0 +1,113 @@
+import logging
+import threading
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from src.Database.execute import execute_gallery_watermark, execute_iter_encodings
+from src.Face_Recognition.GalleryMatcher import GalleryMatcher
+from src.config import GALLERY_POLL_SECONDS
+
+
+class GalleryWatcher:
+    """
+    Classe responsável por manter a galeria de um reconhecimento em execução atualizada com o Banco de Dados.
+
+    Uma thread verifica periodicamente o estado da tabela PeopleFaces (versão dos dados, número de registros e maior
+    ID). Quando há apenas rostos novos, somente os registros com ID entre o maior ID anterior e o atual são lidos e
+    acrescentados a uma cópia da galeria; quando registros foram alterados ou excluídos, a galeria é recarregada por
+    completo e o estado passa a ser o lido pela própria recarga. Assim, nenhum rosto é acrescentado duas vezes. Em
+    ambos os casos a nova galeria é montada fora do loop de frames e entregue pronta, para uma troca atômica de
+    referência.
+    """
+
+    _logger: logging.Logger
+    _gallery: GalleryMatcher
+    _watermark: Tuple[int, int, int]
+    _on_reload: Callable[[GalleryMatcher], None]
+    _interval: float
+    _stop: threading.Event
+    _thread: Optional[threading.Thread]
+
+    def __init__(self, gallery: GalleryMatcher, watermark: Tuple[int, int, int],
+                 on_reload: Callable[[GalleryMatcher], None], interval: float = GALLERY_POLL_SECONDS) -> None:
+        """
+        Método Construtor da classe.
+
+        :param gallery: Galeria atual.
+        :param watermark: Estado da tabela do qual a galeria atual foi carregada (GalleryMatcher.watermark).
+        :param on_reload: Função chamada com a nova galeria a cada atualização.
+        :param interval: Intervalo, em segundos, entre as verificações.
+        """
+
+        self._logger = logging.getLogger(__name__)
+        self._gallery = gallery
+        self._watermark = tuple(watermark)
+        self._on_reload = on_reload
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def poll(self) -> bool:
+        """
+        Verifica o estado da tabela e, se houver mudanças, monta e entrega a nova galeria.
+
+        :return: Retorna uma flag indicando se a galeria foi atualizada.
+        """
+
+        watermark = execute_gallery_watermark()
+        if watermark == self._watermark:
+            return False
+
+        _, num_rows, max_id = self._watermark
+        expected, blocks = execute_iter_encodings(where='ID > ? and ID <= ?', params=(max_id, watermark[2]))
+        if watermark[1] - num_rows == expected:
+            names, encodings = [], []
+            for block_names, block in blocks:
+                names.extend(block_names)
+                encodings.append(block)
+            if not names:
+                self._watermark = watermark
+                return False
+            gallery = self._gallery.appended(encodings=np.concatenate(encodings), class_names=names)
+            self._logger.info(f'{len(names)} ROSTOS NOVOS ACRESCENTADOS À GALERIA ({len(gallery)} ROSTOS)')
+        else:
+            gallery = type(self._gallery).from_database()
+            watermark = gallery.watermark()
+            self._logger.info(f'GALERIA RECARREGADA DO BANCO DE DADOS ({len(gallery)} ROSTOS)')
+
+        self._gallery = gallery
+        self._watermark = watermark
+        self._on_reload(gallery)
+        return True
+
+    def _loop(self) -> None:
+        """
+        Executa as verificações periódicas até o watcher ser parado.
+        """
+
+        while not self._stop.wait(self._interval):
+            try:
+                self.poll()
+            except Exception as e:
+                self._logger.error('ERRO AO ATUALIZAR A GALERIA')
+                self._logger.exception(f'EXCEÇÃO: {e}')
+
+    def start(self) -> None:
+        """
+        Inicia a thread de verificação.
+        """
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='gallery-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Para a thread de verificação.
+        """
+
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,24 @@
+from typing import Tuple
+
+import numpy as np
+
+from src.Face_Recognition.GalleryMatcher import GalleryMatcher
+
+
+class BruteForceMatcher(GalleryMatcher):
+    """
+    Classe responsável pela busca exata, comparando cada rosto detectado com todos os rostos da galeria.
+    """
+
+    def _search(self, queries: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calcula a matriz de distâncias M×N numa única operação e escolhe o rosto mais próximo de cada consulta.
+
+        :param queries: Matriz (M, 128) de consultas.
+        :return: Uma tupla com o índice do rosto mais próximo e a distância até ele.
+        """
+
+        distances = self.distances(queries)
+        best_indexes = np.argmin(distances, axis=1)
+        best_distances = distances[np.arange(distances.shape[0]), best_indexes]
+        return best_indexes, best_distances
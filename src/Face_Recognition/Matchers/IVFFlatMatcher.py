@@ -0,0 +1,350 @@
+import copy
+import hashlib
+import os
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from src.Face_Recognition.GalleryMatcher import GalleryMatcher
+from src.config import TOLERANCE, IVF_NLIST, IVF_NPROBE, IVF_RETRAIN_GROWTH, PATH_IVF_INDEX
+
+
+class IVFFlatMatcher(GalleryMatcher):
+    """
+    Classe responsável pela busca aproximada com um índice IVF-flat (inverted file).
+
+    A galeria é particionada em listas pelo k-means. Cada consulta só é comparada com os rostos das listas cujos
+    centróides estão mais próximos dela, de modo que o custo da busca deixa de crescer linearmente com a galeria.
+
+    Rostos acrescentados à galeria entram nas listas dos centróides já treinados. O k-means só é refeito quando a
+    galeria cresce mais que retrain_growth em relação ao tamanho do último treino.
+    """
+
+    _TRAIN_ITERATIONS: int = 20
+    _TRAIN_POINTS_PER_LIST: int = 64
+    _CHUNK_SIZE: int = 4096
+    _SEED: int = 0
+
+    _nlist: Optional[int]
+    _nprobe: int
+    _retrain_growth: float
+    _trained_size: int
+    _index_path: Optional[Path]
+    _centroids: np.ndarray
+    _centroid_norms: np.ndarray
+    _order: np.ndarray
+    _offsets: np.ndarray
+    _sorted_encodings: np.ndarray
+    _sorted_norms: np.ndarray
+
+    def __init__(self, encodings: Any = None, class_names: List[str] = None, tolerance: float = TOLERANCE,
+                 nlist: Optional[int] = IVF_NLIST, nprobe: int = IVF_NPROBE,
+                 retrain_growth: float = IVF_RETRAIN_GROWTH,
+                 index_path: Union[str, Path, None] = PATH_IVF_INDEX) -> None:
+        """
+        Método Construtor da classe.
+
+        :param encodings: Encodings dos rostos conhecidos.
+        :param class_names: Nome de cada rosto conhecido, na mesma ordem dos encodings.
+        :param tolerance: Distância máxima para considerar que dois rostos correspondem.
+        :param nlist: Número de listas do índice. None para usar 4·√N.
+        :param nprobe: Número de listas visitadas em cada busca.
+        :param retrain_growth: Crescimento relativo da galeria a partir do qual o índice é treinado novamente.
+        :param index_path: Arquivo onde o índice é salvo e reaproveitado. None para não persistir o índice.
+        """
+
+        self._nlist = nlist
+        self._nprobe = nprobe
+        self._retrain_growth = retrain_growth
+        self._trained_size = 0
+        self._index_path = Path(index_path) if index_path is not None else None
+        super().__init__(encodings=encodings, class_names=class_names, tolerance=tolerance)
+
+    def _set_gallery(self, encodings: Any, class_names: List[str]) -> None:
+        """
+        Substitui a galeria de rostos conhecidos e atualiza o índice.
+
+        :param encodings: Encodings dos rostos conhecidos.
+        :param class_names: Nome de cada rosto conhecido.
+        """
+
+        super()._set_gallery(encodings=encodings, class_names=class_names)
+        self._index_gallery()
+
+    def _index_gallery(self) -> None:
+        """
+        Carrega o índice salvo da galeria atual ou, se não houver, treina um novo índice e o salva.
+        """
+
+        if len(self) == 0:
+            self._build_index()
+            return
+        fingerprint = self._fingerprint()
+        if not self._load_index(fingerprint=fingerprint):
+            self._build_index()
+            self._save_index(fingerprint=fingerprint)
+
+    def append(self, encodings: Any, class_names: List[str]) -> None:
+        """
+        Acrescenta rostos à própria galeria e ao índice.
+
+        A galeria é alterada no lugar e não deve ser usada em buscas concorrentes; nesse caso, use appended.
+
+        :param encodings: Encodings dos novos rostos.
+        :param class_names: Nome de cada novo rosto.
+        """
+
+        num_rows = len(self)
+        super().append(encodings=encodings, class_names=class_names)
+        self._update_index(num_rows=num_rows)
+
+    def appended(self, encodings: Any, class_names: List[str]) -> 'IVFFlatMatcher':
+        """
+        Cria uma nova galeria com os rostos atuais seguidos dos novos rostos, sem alterar a galeria atual.
+
+        :param encodings: Encodings dos novos rostos.
+        :param class_names: Nome de cada novo rosto.
+        :return: Retorna a nova galeria, com os mesmos parâmetros e centróides da atual.
+        """
+
+        gallery = copy.copy(self)
+        super(IVFFlatMatcher, gallery)._set_gallery(
+            encodings=np.concatenate([self._encodings, self._as_matrix(encodings)]),
+            class_names=self._class_names + list(class_names))
+        gallery._update_index(num_rows=len(self))
+        return gallery
+
+    def _update_index(self, num_rows: int) -> None:
+        """
+        Acrescenta ao índice as linhas da galeria a partir de num_rows, associando cada uma ao centróide mais próximo
+        e intercalando-as nas listas. Se a galeria cresceu mais que o limite desde o último treino, o índice é
+        treinado novamente.
+
+        :param num_rows: Número de linhas da galeria já presentes no índice.
+        """
+
+        if len(self) == num_rows:
+            return
+        if self._centroids.shape[0] == 0 or len(self) > self._trained_size * (1 + self._retrain_growth):
+            self._index_gallery()
+            return
+
+        nlist = self._centroids.shape[0]
+        assignments = self._nearest_centroids(self._encodings[num_rows:], self._centroids)
+        lists = np.concatenate([np.repeat(np.arange(nlist), np.diff(self._offsets)), assignments])
+        order = np.concatenate([self._order, np.arange(num_rows, len(self))])
+        position = np.argsort(lists, kind='stable')
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(lists, minlength=nlist))))
+        self._set_index(centroids=self._centroids, order=order[position], offsets=offsets)
+        self._logger.info(f'{len(self) - num_rows} ROSTOS ACRESCENTADOS AO ÍNDICE IVF')
+        self._save_index(fingerprint=self._fingerprint())
+
+    def shared_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Acessa as matrizes da galeria e do índice, para que outros processos usem o índice sem treiná-lo nem copiar
+        a galeria reordenada.
+
+        :return: Dicionário com as matrizes da galeria e do índice, pelo nome.
+        """
+
+        return {**super().shared_arrays(), 'centroids': self._centroids, 'centroid_norms': self._centroid_norms,
+                'order': self._order, 'offsets': self._offsets, 'sorted_encodings': self._sorted_encodings,
+                'sorted_norms': self._sorted_norms, 'trained_size': np.array([self._trained_size], dtype=np.intp)}
+
+    def _restore(self, arrays: Dict[str, np.ndarray], class_names: List[str]) -> None:
+        """
+        Substitui a galeria e o índice pelas matrizes de shared_arrays, sem cópias.
+
+        :param arrays: Matrizes da galeria e do índice.
+        :param class_names: Nome de cada rosto conhecido.
+        """
+
+        super()._restore(arrays=arrays, class_names=class_names)
+        self._centroids = arrays['centroids']
+        self._centroid_norms = arrays['centroid_norms']
+        self._order = arrays['order']
+        self._offsets = arrays['offsets']
+        self._sorted_encodings = arrays['sorted_encodings']
+        self._sorted_norms = arrays['sorted_norms']
+        self._trained_size = int(arrays['trained_size'][0])
+
+    def set_nprobe(self, nprobe: int) -> None:
+        """
+        Altera o número de listas visitadas em cada busca, trocando latência por recall.
+
+        :param nprobe: Número de listas visitadas em cada busca.
+        """
+
+        self._nprobe = nprobe
+
+    def _fingerprint(self) -> str:
+        """
+        Gera uma impressão digital da galeria, usada para saber se o índice salvo ainda é válido.
+
+        :return: Hash dos encodings e dos parâmetros do índice.
+        """
+
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(str((self._encodings.shape, self._nlist)).encode())
+        digest.update(memoryview(self._encodings).cast('B'))
+        return digest.hexdigest()
+
+    def _nearest_centroids(self, matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """
+        Associa cada linha da matriz ao centróide mais próximo, processando em blocos para limitar a memória.
+
+        :param matrix: Matriz (N, 128) de encodings.
+        :param centroids: Matriz (K, 128) de centróides.
+        :return: Índice do centróide mais próximo de cada linha.
+        """
+
+        centroid_norms = np.einsum('ij,ij->i', centroids, centroids)
+        assignments = np.empty(matrix.shape[0], dtype=np.intp)
+        for start in range(0, matrix.shape[0], self._CHUNK_SIZE):
+            chunk = matrix[start:start + self._CHUNK_SIZE]
+            squared = self._squared_distances(chunk, centroids, centroid_norms)
+            assignments[start:start + self._CHUNK_SIZE] = np.argmin(squared, axis=1)
+        return assignments
+
+    def _train_centroids(self, nlist: int) -> np.ndarray:
+        """
+        Treina os centróides do índice com o k-means sobre uma amostra da galeria.
+
+        :param nlist: Número de centróides.
+        :return: Matriz (nlist, 128) de centróides.
+        """
+
+        rng = np.random.default_rng(self._SEED)
+        num_rows = len(self)
+        sample_size = min(num_rows, nlist * self._TRAIN_POINTS_PER_LIST)
+        sample = self._encodings[np.sort(rng.choice(num_rows, sample_size, replace=False))]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(self._TRAIN_ITERATIONS):
+            assignments = self._nearest_centroids(sample, centroids)
+            order = np.argsort(assignments, kind='stable')
+            counts = np.bincount(assignments, minlength=nlist)
+            non_empty = np.flatnonzero(counts)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[non_empty]
+            sums = np.add.reduceat(sample[order], starts, axis=0)
+            centroids[non_empty] = sums / counts[non_empty, np.newaxis]
+
+            empty = np.flatnonzero(counts == 0)
+            if len(empty):
+                centroids[empty] = sample[rng.choice(sample_size, len(empty), replace=False)]
+        return centroids
+
+    def _build_index(self) -> None:
+        """
+        Constrói o índice: treina os centróides e reordena a galeria de forma que cada lista seja contígua.
+        """
+
+        num_rows = len(self)
+        if num_rows == 0:
+            self._set_index(centroids=np.empty((0, self._encodings.shape[1]), dtype=np.float32),
+                            order=np.empty(0, dtype=np.intp), offsets=np.zeros(1, dtype=np.intp))
+            self._trained_size = 0
+            return
+
+        nlist = self._nlist if self._nlist else int(4 * np.sqrt(num_rows))
+        nlist = max(1, min(nlist, num_rows))
+        self._logger.info(f'CONSTRUINDO ÍNDICE IVF COM {nlist} LISTAS PARA {num_rows} ROSTOS...')
+        centroids = self._train_centroids(nlist=nlist)
+        assignments = self._nearest_centroids(self._encodings, centroids)
+        order = np.argsort(assignments, kind='stable')
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(assignments, minlength=nlist))))
+        self._set_index(centroids=centroids, order=order, offsets=offsets)
+        self._trained_size = num_rows
+
+    def _set_index(self, centroids: np.ndarray, order: np.ndarray, offsets: np.ndarray) -> None:
+        """
+        Define as estruturas do índice.
+
+        :param centroids: Matriz (K, 128) de centróides.
+        :param order: Permutação que agrupa as linhas da galeria por lista.
+        :param offsets: Início de cada lista na galeria reordenada, com K + 1 elementos.
+        """
+
+        self._centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self._centroid_norms = np.einsum('ij,ij->i', self._centroids, self._centroids)
+        self._order = np.asarray(order, dtype=np.intp)
+        self._offsets = np.asarray(offsets, dtype=np.intp)
+        self._sorted_encodings = np.ascontiguousarray(self._encodings[self._order])
+        self._sorted_norms = self._squared_norms[self._order]
+
+    def _load_index(self, fingerprint: str) -> bool:
+        """
+        Carrega o índice salvo, caso ele corresponda à galeria atual.
+
+        :param fingerprint: Impressão digital da galeria atual.
+        :return: Retorna uma flag indicando se o índice foi carregado.
+        """
+
+        if self._index_path is None or not os.path.exists(self._index_path):
+            return False
+        try:
+            with np.load(self._index_path) as data:
+                if str(data['fingerprint']) != fingerprint:
+                    self._logger.info('ÍNDICE IVF DESATUALIZADO')
+                    return False
+                self._set_index(centroids=data['centroids'], order=data['order'], offsets=data['offsets'])
+                self._trained_size = int(data['trained_size']) if 'trained_size' in data.files else len(self)
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+            self._logger.warning('ERRO AO CARREGAR O ÍNDICE IVF')
+            self._logger.exception(f'EXCEÇÃO: {e}')
+            return False
+        self._logger.info(f'ÍNDICE IVF CARREGADO DE {self._index_path}')
+        return True
+
+    def _save_index(self, fingerprint: str) -> None:
+        """
+        Salva o índice ao lado do Banco de Dados. O arquivo é escrito com um nome temporário e substituído
+        atomicamente, então outros processos nunca carregam um índice pela metade.
+
+        :param fingerprint: Impressão digital da galeria atual.
+        """
+
+        if self._index_path is None:
+            return
+        tmp = self._index_path.with_name(f'{self._index_path.name}.{os.getpid()}.tmp')
+        try:
+            with open(tmp, 'wb') as file:
+                np.savez(file, fingerprint=np.array(fingerprint), centroids=self._centroids, order=self._order,
+                         offsets=self._offsets, trained_size=np.array(self._trained_size))
+            os.replace(tmp, self._index_path)
+        except OSError as e:
+            self._logger.error('ERRO AO SALVAR O ÍNDICE IVF')
+            self._logger.exception(f'EXCEÇÃO: {e}')
+            if tmp.exists():
+                tmp.unlink()
+        else:
+            self._logger.info(f'ÍNDICE IVF SALVO EM {self._index_path}')
+
+    def _search(self, queries: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Busca o rosto mais próximo de cada consulta visitando apenas as nprobe listas mais próximas.
+
+        :param queries: Matriz (M, 128) de consultas.
+        :return: Uma tupla com o índice do rosto mais próximo e a distância até ele.
+        """
+
+        nprobe = max(1, min(self._nprobe, self._centroids.shape[0]))
+        centroid_distances = self._squared_distances(queries, self._centroids, self._centroid_norms)
+        probes = np.argpartition(centroid_distances, nprobe - 1, axis=1)[:, :nprobe]
+        query_norms = np.einsum('ij,ij->i', queries, queries)
+
+        best_indexes = np.full(queries.shape[0], -1, dtype=np.intp)
+        best_distances = np.full(queries.shape[0], np.inf, dtype=np.float32)
+        for i, query in enumerate(queries):
+            for list_id in probes[i]:
+                start, end = self._offsets[list_id], self._offsets[list_id + 1]
+                if start == end:
+                    continue
+                squared = self._sorted_norms[start:end] - 2.0 * (self._sorted_encodings[start:end] @ query)
+                position = int(np.argmin(squared))
+                if squared[position] + query_norms[i] < best_distances[i]:
+                    best_distances[i] = squared[position] + query_norms[i]
+                    best_indexes[i] = self._order[start + position]
+        return best_indexes, np.sqrt(np.maximum(best_distances, 0.0))
@@ -0,0 +1,68 @@
+import threading
+from typing import List, Tuple
+
+import dlib
+import face_recognition_models
+import numpy as np
+
+# Os modelos do dlib guardam estado interno e liberam o GIL durante a execução, então não podem ser compartilhados
+# entre threads. Cada thread de inferência carrega a sua própria cópia dos modelos na primeira chamada.
+_local = threading.local()
+
+
+def _models(model: str) -> threading.local:
+    """
+    Recupera os modelos do dlib da thread atual, carregando-os na primeira chamada.
+
+    :param model: Modelo de detecção, "hog" ou "cnn".
+    :return: Retorna o armazenamento local da thread com os modelos carregados.
+    """
+
+    if not hasattr(_local, 'encoder'):
+        _local.hog_detector = dlib.get_frontal_face_detector()
+        _local.predictor = dlib.shape_predictor(face_recognition_models.pose_predictor_five_point_model_location())
+        _local.encoder = dlib.face_recognition_model_v1(face_recognition_models.face_recognition_model_location())
+    if model == 'cnn' and not hasattr(_local, 'cnn_detector'):
+        _local.cnn_detector = dlib.cnn_face_detection_model_v1(
+            face_recognition_models.cnn_face_detector_model_location()
+        )
+    return _local
+
+
+def face_locations(image: np.ndarray, number_of_times_to_upsample: int = 1,
+                   model: str = 'hog') -> List[Tuple[int, int, int, int]]:
+    """
+    Detecta os rostos presentes na imagem, como face_recognition.face_locations, usando os modelos da thread atual.
+
+    :param image: Imagem RGB contígua.
+    :param number_of_times_to_upsample: Número de vezes que a imagem é ampliada para encontrar rostos menores.
+    :param model: Modelo de detecção, "hog" ou "cnn".
+    :return: Lista com a localização dos rostos no formato (top, right, bottom, left).
+    """
+
+    models = _models(model)
+    if model == 'cnn':
+        rects = [detection.rect for detection in models.cnn_detector(image, number_of_times_to_upsample)]
+    else:
+        rects = models.hog_detector(image, number_of_times_to_upsample)
+    return [(max(rect.top(), 0), min(rect.right(), image.shape[1]), min(rect.bottom(), image.shape[0]),
+             max(rect.left(), 0)) for rect in rects]
+
+
+def face_encodings(image: np.ndarray, known_face_locations: List[Tuple[int, int, int, int]],
+                   num_jitters: int = 1) -> List[np.ndarray]:
+    """
+    Calcula o encoding dos rostos, como face_recognition.face_encodings, usando os modelos da thread atual.
+
+    :param image: Imagem RGB contígua.
+    :param known_face_locations: Localização dos rostos no formato (top, right, bottom, left).
+    :param num_jitters: Número de vezes que cada rosto é reamostrado para calcular o encoding.
+    :return: Lista com o encoding de cada rosto.
+    """
+
+    models = _models('hog')
+    encodings = []
+    for top, right, bottom, left in known_face_locations:
+        landmarks = models.predictor(image, dlib.rectangle(left, top, right, bottom))
+        encodings.append(np.array(models.encoder.compute_face_descriptor(image, landmarks, num_jitters)))
+    return encodings
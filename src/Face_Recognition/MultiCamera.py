@@ -0,0 +1,108 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Union
+
+from src.Face_Recognition.FaceRecognition import FaceRecognition
+from src.Face_Recognition.GalleryMatcher import GalleryMatcher
+from src.Face_Recognition.SharedGallery import SharedGallery, SharedGalleryHandle
+from src.Face_Recognition.options import EnumMatchers, MATCHER_DICT
+from src.config import MATCHER
+from src.utils import metrics
+
+# Galeria de cada processo do pool, criada uma única vez sobre a memória compartilhada.
+_worker_shared: Optional[SharedGallery] = None
+_worker_gallery: Optional[GalleryMatcher] = None
+
+
+def _init_worker(handle: SharedGalleryHandle) -> None:
+    """
+    Inicializa um processo do pool, acessando a galeria compartilhada, e o índice dela, sem copiá-los.
+
+    :param handle: Informações da galeria compartilhada.
+    """
+
+    global _worker_shared, _worker_gallery
+    _worker_shared = SharedGallery.attach(handle=handle)
+    _worker_gallery = _worker_shared.gallery()
+
+
+def _run_source(source: Union[int, str], workers: int) -> Dict[str, float]:
+    """
+    Executa o reconhecimento facial de uma fonte dentro de um processo do pool.
+
+    :param source: Índice da câmera ou endereço do vídeo.
+    :param workers: Número de threads de inferência do processo.
+    :return: Retorna as estatísticas de desempenho da fonte.
+    """
+
+    metrics.registry.reset()
+    try:
+        return FaceRecognition(gallery=_worker_gallery).run(source=source, workers=workers)
+    except SystemExit:
+        return {}
+    finally:
+        # Cada processo tem as próprias métricas, gravadas ao fim da fonte
+        metrics.registry.dump(name=str(source))
+
+
+class MultiCamera:
+    """
+    Classe responsável por executar o reconhecimento facial de várias fontes ao mesmo tempo, uma por processo.
+
+    A galeria é carregada uma única vez pelo processo principal e compartilhada com os processos do pool via memória
+    compartilhada, de modo que o consumo de memória não cresce com o número de câmeras.
+    """
+
+    _logger: logging.Logger
+    _sources: List[Union[int, str]]
+
+    def __init__(self, sources: List[Union[int, str]]) -> None:
+        """
+        Método Construtor da classe.
+
+        :param sources: Lista de índices de câmeras ou endereços de vídeo.
+        """
+
+        self._logger = logging.getLogger(__name__)
+        self._sources = list(sources)
+
+    def run(self) -> Dict[str, Dict[str, float]]:
+        """
+        Executa o reconhecimento facial de todas as fontes até que todas terminem.
+
+        :return: Retorna as estatísticas de desempenho de cada fonte.
+        """
+
+        gallery = MATCHER_DICT[EnumMatchers(MATCHER)].from_database()
+        shared = SharedGallery.create(gallery=gallery)
+        del gallery
+
+        num_sources = len(self._sources)
+        workers = max(1, (os.cpu_count() or 1) // num_sources)
+        self._logger.info(f'INICIANDO RECONHECIMENTO FACIAL DE {num_sources} FONTES '
+                          f'COM {workers} THREADS DE INFERÊNCIA CADA...')
+
+        results = {}
+        try:
+            with ProcessPoolExecutor(max_workers=num_sources, initializer=_init_worker,
+                                     initargs=(shared.handle(),)) as executor:
+                futures = {executor.submit(_run_source, source, workers): source for source in self._sources}
+                for future in as_completed(futures):
+                    source = futures[future]
+                    try:
+                        stats = future.result()
+                    except Exception as e:
+                        self._logger.error(f'ERRO NO RECONHECIMENTO DA FONTE {source}')
+                        self._logger.exception(f'EXCEÇÃO: {e}')
+                        continue
+                    results[str(source)] = stats
+                    if stats:
+                        self._logger.info(f'[{source}] FINALIZADA: {stats["processed"]} FRAMES PROCESSADOS, '
+                                          f'{stats["process_fps"]:.1f} FPS PROCESSADO, '
+                                          f'{stats["display_fps"]:.1f} FPS EXIBIDO')
+                    else:
+                        self._logger.warning(f'[{source}] NÃO FOI POSSÍVEL ABRIR A FONTE')
+        finally:
+            shared.close()
+        return results
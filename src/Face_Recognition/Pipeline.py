@@ -0,0 +1,281 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+import numpy as np
+
+from src.config import INFERENCE_WORKERS
+from src.utils import metrics
+
+
+class Frame(NamedTuple):
+    """
+    Frame capturado, com o número de sequência, o instante da captura e, opcionalmente, o nome do arquivo de origem.
+    """
+
+    index: int
+    timestamp: float
+    image: np.ndarray
+    name: Optional[str] = None
+
+
+class Result(NamedTuple):
+    """
+    Resultado da inferência, associado ao frame que o originou.
+    """
+
+    frame_index: int
+    timestamp: float
+    value: Any
+
+
+class FrameSlot:
+    """
+    Fila limitada a um único item. Um novo item substitui o anterior, que é descartado por estar desatualizado.
+    """
+
+    _condition: threading.Condition
+    _item: Optional[Frame]
+    _closed: bool
+    _dropped: int
+    _metric: Optional[str]
+
+    def __init__(self, metric: Optional[str] = None) -> None:
+        """
+        Método Construtor da classe.
+
+        :param metric: Nome do contador de métricas que registra os itens descartados. Se None, o descarte é apenas
+        contado pela própria fila.
+        """
+
+        self._condition = threading.Condition()
+        self._item = None
+        self._closed = False
+        self._dropped = 0
+        self._metric = metric
+
+    def put(self, item: Frame) -> None:
+        """
+        Coloca um item na fila, descartando o item anterior caso ele ainda não tenha sido consumido.
+
+        :param item: Item a ser colocado na fila.
+        """
+
+        with self._condition:
+            if self._item is not None:
+                self._dropped += 1
+                if self._metric is not None:
+                    metrics.increment(self._metric)
+            self._item = item
+            self._condition.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Frame]:
+        """
+        Retira o item mais recente da fila, aguardando até que ele exista.
+
+        :param timeout: Tempo máximo de espera, em segundos.
+        :return: Retorna o item mais recente ou None, caso o tempo expire ou a fila seja fechada.
+        """
+
+        with self._condition:
+            self._condition.wait_for(lambda: self._item is not None or self._closed, timeout=timeout)
+            item, self._item = self._item, None
+            return item
+
+    def close(self) -> None:
+        """
+        Fecha a fila, liberando quem estiver aguardando um item.
+        """
+
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def dropped(self) -> int:
+        """
+        Número de itens descartados por terem sido substituídos antes de serem consumidos.
+        """
+
+        return self._dropped
+
+
+class Pipeline:
+    """
+    Classe responsável por executar o reconhecimento facial em estágios paralelos.
+
+    Uma thread captura os frames, um conjunto de threads executa a inferência sempre sobre o frame mais recente e o
+    estágio de exibição, executado na thread que chamou o método run, desenha o resultado mais recente sobre o frame
+    mais recente. Dessa forma, o FPS exibido e a latência dependem do estágio mais lento, e não da soma dos estágios.
+    """
+
+    _STATS_INTERVAL: float = 10.0
+
+    _logger: logging.Logger
+    _name: str
+    _capture: Any
+    _process: Callable[[Frame], Any]
+    _render: Callable[[np.ndarray, Any], bool]
+    _num_workers: int
+    _inference_slot: FrameSlot
+    _display_slot: FrameSlot
+    _stop: threading.Event
+    _result_lock: threading.Lock
+    _result: Optional[Result]
+    _num_captured: int
+    _num_processed: int
+    _num_displayed: int
+    _start: float
+    _latency_sum: float
+    _latency_count: int
+
+    def __init__(self, capture: Any, process: Callable[[Frame], Any], render: Callable[[np.ndarray, Any], bool],
+                 workers: int = INFERENCE_WORKERS, name: str = '') -> None:
+        """
+        Método Construtor da classe.
+
+        :param capture: Fonte de frames com a interface de cv2.VideoCapture.
+        :param process: Função de inferência, que recebe o frame, com o número de sequência e o instante da captura,
+        e retorna o resultado, ou None se o frame foi pulado sem ser processado.
+        :param render: Função de exibição, que recebe uma cópia do frame e o resultado mais recente (ou None) e
+        retorna uma flag indicando se o pipeline deve continuar.
+        :param workers: Número de threads de inferência.
+        :param name: Nome da fonte de frames, usado para identificar as estatísticas no log.
+        """
+
+        self._logger = logging.getLogger(__name__)
+        self._name = name
+        self._capture = capture
+        self._process = process
+        self._render = render
+        self._num_workers = max(1, workers)
+        self._inference_slot = FrameSlot(metric='pipeline_frames_dropped')
+        self._display_slot = FrameSlot(metric='pipeline_frames_not_displayed')
+        self._stop = threading.Event()
+        self._result_lock = threading.Lock()
+        self._result = None
+        self._num_captured, self._num_processed, self._num_displayed = 0, 0, 0
+        self._start = time.perf_counter()
+        self._latency_sum, self._latency_count = 0.0, 0
+
+    def _capture_loop(self) -> None:
+        """
+        Estágio de captura: lê os frames da fonte e os entrega aos estágios de inferência e de exibição.
+        """
+
+        index = 0
+        while not self._stop.is_set():
+            ret, image = self._capture.read()
+            if not ret:
+                self._logger.warning('ERRO AO CAPTURAR FRAME, FINALIZANDO CAPTURA')
+                self._stop.set()
+                break
+            frame = Frame(index=index, timestamp=time.perf_counter(), image=image)
+            self._inference_slot.put(frame)
+            self._display_slot.put(frame)
+            self._num_captured += 1
+            metrics.increment('pipeline_frames_captured')
+            index += 1
+        self._inference_slot.close()
+        self._display_slot.close()
+
+    def _inference_loop(self) -> None:
+        """
+        Estágio de inferência: processa sempre o frame mais recente e publica o resultado, caso ele seja mais novo
+        que o resultado atual.
+        """
+
+        while not self._stop.is_set():
+            frame = self._inference_slot.get(timeout=0.5)
+            if frame is None:
+                continue
+            try:
+                value = self._process(frame)
+            except Exception as e:
+                self._logger.error('ERRO NA INFERÊNCIA DO FRAME')
+                self._logger.exception(f'EXCEÇÃO: {e}')
+                metrics.increment('pipeline_inference_errors')
+                continue
+            if value is None:
+                # Frame pulado: o resultado atual, de um frame anterior, continua sendo exibido
+                continue
+            with self._result_lock:
+                if self._result is None or frame.index > self._result.frame_index:
+                    self._result = Result(frame_index=frame.index, timestamp=frame.timestamp, value=value)
+                self._num_processed += 1
+            metrics.increment('pipeline_frames_processed')
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Calcula as estatísticas do pipeline.
+
+        :return: Dicionário com o número de frames capturados, processados, exibidos e descartados, o FPS exibido e
+        processado e a latência média, em milissegundos, entre a captura de um frame e a exibição do seu resultado.
+        """
+
+        elapsed = max(time.perf_counter() - self._start, 1e-9)
+        return {
+            'captured': self._num_captured,
+            'processed': self._num_processed,
+            'displayed': self._num_displayed,
+            'dropped': self._inference_slot.dropped(),
+            'display_fps': self._num_displayed / elapsed,
+            'process_fps': self._num_processed / elapsed,
+            'latency_ms': 1000 * self._latency_sum / max(1, self._latency_count),
+        }
+
+    def _log_stats(self) -> None:
+        """
+        Registra as estatísticas do pipeline no log.
+        """
+
+        stats = self.stats()
+        prefix = f'[{self._name}] ' if self._name else ''
+        self._logger.info(
+            f'{prefix}FPS EXIBIDO: {stats["display_fps"]:.1f} | '
+            f'FPS PROCESSADO: {stats["process_fps"]:.1f} | '
+            f'LATÊNCIA MÉDIA: {stats["latency_ms"]:.0f} ms | '
+            f'FRAMES DESCARTADOS: {stats["dropped"]}'
+        )
+
+    def run(self) -> None:
+        """
+        Inicia os estágios de captura e inferência e executa o estágio de exibição até que ele solicite a parada
+        ou a fonte de frames termine.
+        """
+
+        threads = [threading.Thread(target=self._capture_loop, name='capture', daemon=True)]
+        threads += [threading.Thread(target=self._inference_loop, name=f'inference-{i}', daemon=True)
+                    for i in range(self._num_workers)]
+        for thread in threads:
+            thread.start()
+
+        self._start = last_stats = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                frame = self._display_slot.get(timeout=0.5)
+                if frame is None:
+                    continue
+                with self._result_lock:
+                    result = self._result
+                keep_running = self._render(frame.image.copy(), result.value if result is not None else None)
+                self._num_displayed += 1
+                metrics.increment('pipeline_frames_displayed')
+
+                now = time.perf_counter()
+                if result is not None:
+                    self._latency_sum += now - result.timestamp
+                    self._latency_count += 1
+                    metrics.observe('pipeline_latency', now - result.timestamp)
+                if now - last_stats > self._STATS_INTERVAL:
+                    self._log_stats()
+                    last_stats = now
+                if not keep_running:
+                    break
+        finally:
+            self._stop.set()
+            self._inference_slot.close()
+            self._display_slot.close()
+            for thread in threads:
+                thread.join(timeout=5)
+            self._log_stats()
@@ -0,0 +1,248 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.Face_Recognition import Models as models
+from src.Face_Recognition.GalleryMatcher import GalleryMatcher
+from src.Face_Recognition.GalleryWatcher import GalleryWatcher
+from src.Face_Recognition.Matchers.BruteForceMatcher import BruteForceMatcher
+from src.config import GALLERY_POLL_SECONDS, SERVICE_WORKERS, SERVICE_MAX_PENDING, SERVICE_BATCH_WINDOW_MS, \
+    SERVICE_MAX_BATCH, SERVICE_UPSAMPLE, SERVICE_JITTERS, SERVICE_MATCH_TIMEOUT
+from src.utils import metrics
+
+
+class ServiceBusyError(RuntimeError):
+    """
+    Erro lançado quando o serviço já tem o número máximo de requisições em andamento, ou quando a busca na galeria
+    não termina a tempo.
+    """
+
+
+class _MatchRequest(NamedTuple):
+    """
+    Busca aguardando o próximo grupo: encodings dos rostos de uma imagem, número de identidades e resultado.
+    """
+
+    encodings: np.ndarray
+    k: int
+    future: Future
+
+
+class RecognitionService:
+    """
+    Classe responsável pelo reconhecimento de imagens enviadas por requisições HTTP.
+
+    A galeria fica carregada em memória e acompanha os novos rostos cadastrados. A detecção e o encoding de cada imagem
+    são executados num pool limitado de threads, com os modelos do dlib de cada thread (Models). As buscas que chegam
+    dentro de uma janela de poucos milissegundos são agrupadas por uma thread própria e resolvidas numa única
+    multiplicação de matrizes (GalleryMatcher.top_k).
+
+    Como top_k é sempre uma busca exata, a galeria carregada pelo serviço é uma BruteForceMatcher, qualquer que seja
+    o MATCHER configurado, para não treinar um índice IVF que nunca seria usado.
+    """
+
+    _logger: logging.Logger
+    _gallery: GalleryMatcher
+    _watcher: Optional[GalleryWatcher]
+    _executor: ThreadPoolExecutor
+    _slots: threading.BoundedSemaphore
+    _queue: queue.Queue
+    _window: float
+    _max_batch: int
+    _batcher: Optional[threading.Thread]
+
+    def __init__(self, gallery: Optional[GalleryMatcher] = None, workers: int = SERVICE_WORKERS,
+                 max_pending: int = SERVICE_MAX_PENDING, batch_window_ms: float = SERVICE_BATCH_WINDOW_MS,
+                 max_batch: int = SERVICE_MAX_BATCH) -> None:
+        """
+        Método Construtor da classe.
+
+        :param gallery: Galeria de rostos conhecidos já carregada. Se None, a galeria é carregada do Banco de Dados
+        e acompanha os novos rostos cadastrados.
+        :param workers: Número de threads de detecção e encoding.
+        :param max_pending: Número máximo de requisições em andamento.
+        :param batch_window_ms: Tempo, em milissegundos, que a primeira busca de um grupo aguarda as seguintes.
+        :param max_batch: Número máximo de rostos por grupo.
+        """
+
+        self._logger = logging.getLogger(__name__)
+        self._watcher = None
+        if gallery is None:
+            gallery = BruteForceMatcher.from_database()
+            if GALLERY_POLL_SECONDS is not None:
+                self._watcher = GalleryWatcher(gallery=gallery, watermark=gallery.watermark(),
+                                               on_reload=self._swap_gallery)
+        self._gallery = gallery
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='recognition')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._queue = queue.Queue()
+        self._window = batch_window_ms / 1000
+        self._max_batch = max_batch
+        self._batcher = None
+
+    def _swap_gallery(self, gallery: GalleryMatcher) -> None:
+        """
+        Troca a galeria usada pelas buscas. Os grupos em andamento terminam com a galeria anterior.
+
+        :param gallery: Nova galeria.
+        """
+
+        self._gallery = gallery
+
+    def start(self) -> None:
+        """
+        Inicia a thread de agrupamento das buscas e o acompanhamento dos novos rostos cadastrados.
+        """
+
+        self._batcher = threading.Thread(target=self._batch_loop, name='recognition-batcher', daemon=True)
+        self._batcher.start()
+        if self._watcher is not None:
+            self._watcher.start()
+        self._logger.info(f'SERVIÇO DE RECONHECIMENTO INICIADO COM {len(self._gallery)} ROSTOS NA GALERIA')
+
+    def stop(self) -> None:
+        """
+        Para o serviço, concluindo as buscas já recebidas.
+        """
+
+        if self._watcher is not None:
+            self._watcher.stop()
+        if self._batcher is not None:
+            self._queue.put(None)
+            self._batcher.join()
+            self._batcher = None
+        self._executor.shutdown(wait=True)
+
+    @staticmethod
+    def _encode(data: bytes) -> Tuple[List[Tuple[int, int, int, int]], List[np.ndarray]]:
+        """
+        Decodifica a imagem enviada, detecta os rostos e calcula os encodings, numa thread do pool.
+
+        :param data: Conteúdo do arquivo de imagem.
+        :return: Uma tupla com a localização e o encoding de cada rosto.
+        """
+
+        with metrics.timer('service_decode'):
+            image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if image is None:
+                raise ValueError('NÃO FOI POSSÍVEL LER A IMAGEM ENVIADA')
+            rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        with metrics.timer('service_detection'):
+            faces_locations = models.face_locations(rgb_image, number_of_times_to_upsample=SERVICE_UPSAMPLE)
+        if not faces_locations:
+            return [], []
+        with metrics.timer('service_encoding'):
+            return faces_locations, models.face_encodings(rgb_image, faces_locations, num_jitters=SERVICE_JITTERS)
+
+    def _batch_loop(self) -> None:
+        """
+        Agrupa as buscas recebidas: a primeira aguarda até o fim da janela, ou até o grupo atingir o número máximo de
+        rostos, e todas são resolvidas juntas.
+        """
+
+        running = True
+        while running:
+            request = self._queue.get()
+            if request is None:
+                break
+            batch, num_faces = [request], request.encodings.shape[0]
+            deadline = time.monotonic() + self._window
+            while num_faces < self._max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    running = False
+                    break
+                batch.append(request)
+                num_faces += request.encodings.shape[0]
+            self._match_batch(batch)
+
+    def _match_batch(self, batch: List[_MatchRequest]) -> None:
+        """
+        Resolve um grupo de buscas numa única chamada a top_k e entrega a cada requisição os seus resultados. Qualquer
+        erro é entregue a todas as requisições do grupo, e a thread de agrupamento continua atendendo as seguintes.
+
+        :param batch: Buscas do grupo.
+        """
+
+        gallery = self._gallery
+        metrics.increment('service_batches')
+        metrics.increment('service_batched_requests', len(batch))
+        try:
+            with metrics.timer('service_matching'):
+                queries = np.concatenate([request.encodings for request in batch])
+                indexes, distances, matches = gallery.top_k(queries, k=max(request.k for request in batch))
+
+            class_names = gallery.class_names()
+            results, start = [], 0
+            for request in batch:
+                end = start + request.encodings.shape[0]
+                results.append([
+                    [(class_names[index], float(distance), bool(match))
+                     for index, distance, match in zip(indexes[i, :request.k], distances[i, :request.k],
+                                                       matches[i, :request.k])]
+                    for i in range(start, end)
+                ])
+                start = end
+        except Exception as e:
+            self._logger.error('ERRO NA BUSCA AGRUPADA NA GALERIA')
+            self._logger.exception(f'EXCEÇÃO: {e}')
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        for request, result in zip(batch, results):
+            request.future.set_result(result)
+
+    def recognize(self, data: bytes, k: int) -> List[Dict[str, Any]]:
+        """
+        Reconhece os rostos de uma imagem.
+
+        :param data: Conteúdo do arquivo de imagem.
+        :param k: Número de identidades retornadas por rosto.
+        :return: Lista com a localização, o nome reconhecido ("UNKNOWN" se não houver correspondência) e as k
+        identidades mais próximas, com a distância, de cada rosto.
+        """
+
+        if not self._slots.acquire(blocking=False):
+            metrics.increment('service_requests_rejected')
+            raise ServiceBusyError('SERVIÇO DE RECONHECIMENTO SOBRECARREGADO')
+        metrics.increment('service_requests')
+        try:
+            with metrics.timer('service_request'):
+                faces_locations, faces_encodings = self._executor.submit(self._encode, data).result()
+                if not faces_locations:
+                    return []
+                future = Future()
+                self._queue.put(_MatchRequest(encodings=np.asarray(faces_encodings, dtype=np.float32), k=k,
+                                              future=future))
+                try:
+                    candidates = future.result(timeout=SERVICE_MATCH_TIMEOUT)
+                except TimeoutError:
+                    metrics.increment('service_requests_timed_out')
+                    raise ServiceBusyError('BUSCA NA GALERIA NÃO CONCLUÍDA A TEMPO')
+        finally:
+            self._slots.release()
+        metrics.increment('service_faces', len(candidates))
+
+        faces = []
+        for (top, right, bottom, left), face_candidates in zip(faces_locations, candidates):
+            name = face_candidates[0][0] if face_candidates and face_candidates[0][2] else 'UNKNOWN'
+            faces.append({
+                'location': {'top': top, 'right': right, 'bottom': bottom, 'left': left},
+                'name': name,
+                'matches': [{'name': candidate, 'distance': distance, 'match': match}
+                            for candidate, distance, match in face_candidates],
+            })
+        return faces
@@ -0,0 +1,194 @@
+import logging
+import math
+import threading
+from typing import List, NamedTuple, Optional
+
+from src.config import RECOGNITION_BUDGET_MS, RECOGNITION_TARGET_FPS, RECOGNITION_MAX_SKIP
+
+
+class Settings(NamedTuple):
+    """
+    Parâmetros do reconhecimento de um frame.
+    """
+
+    scale: float
+    upsample: int
+    jitters: int
+    skip: int = 1
+
+    def detection_pixels(self, frame_pixels: int) -> float:
+        """
+        Estima o número de pixels analisados pela detecção, considerando a redução e as ampliações do frame.
+
+        :param frame_pixels: Número de pixels do frame original.
+        :return: Número de pixels analisados pela detecção.
+        """
+
+        return frame_pixels * (self.scale ** 2) * (4 ** self.upsample)
+
+
+# Níveis de qualidade, do mais caro ao mais barato. O nível padrão corresponde aos parâmetros originais.
+LEVELS: List[Settings] = [
+    Settings(scale=0.5, upsample=2, jitters=4),
+    Settings(scale=0.5, upsample=2, jitters=2),
+    Settings(scale=0.25, upsample=2, jitters=2),
+    Settings(scale=0.25, upsample=2, jitters=1),
+    Settings(scale=0.25, upsample=1, jitters=1),
+    Settings(scale=0.2, upsample=1, jitters=1),
+    Settings(scale=0.25, upsample=0, jitters=1),
+]
+DEFAULT_LEVEL = 2
+
+
+class AdaptiveScheduler:
+    """
+    Classe responsável por escolher os parâmetros do reconhecimento de acordo com um orçamento de latência.
+
+    O custo de cada estágio é medido continuamente (média móvel exponencial) e usado para prever o custo de cada
+    nível de qualidade: a detecção é proporcional ao número de pixels analisados e o encoding ao número de rostos
+    codificados multiplicado pelo número de jitters. É escolhido o nível mais caro cujo custo previsto cabe no
+    orçamento; para subir de nível, a folga precisa se manter por algumas decisões seguidas. Se nem o nível mais
+    barato couber, frames passam a ser pulados.
+    """
+
+    _ALPHA: float = 0.2
+    _DECISION_INTERVAL: int = 10
+    _UPGRADE_MARGIN: float = 0.8
+    _UPGRADE_PATIENCE: int = 3
+
+    _logger: logging.Logger
+    _lock: threading.Lock
+    _adaptive: bool
+    _budget: float
+    _level: int
+    _skip: int
+    _counter: int
+    _samples: int
+    _upgrade_votes: int
+    _overhead: Optional[float]
+    _detection_cost: Optional[float]
+    _encoding_cost: Optional[float]
+    _faces_per_frame: float
+    _frame_pixels: int
+
+    def __init__(self, workers: int = 1, budget_ms: float = RECOGNITION_BUDGET_MS,
+                 target_fps: Optional[float] = RECOGNITION_TARGET_FPS, adaptive: bool = True) -> None:
+        """
+        Método Construtor da classe.
+
+        :param workers: Número de threads de inferência, que dividem entre si os frames processados.
+        :param budget_ms: Latência máxima desejada para o reconhecimento de um frame, em milissegundos.
+        :param target_fps: Número desejado de frames reconhecidos por segundo. Se informado, o orçamento também é
+        limitado por ele.
+        :param adaptive: Flag indicando se os parâmetros são ajustados. Se False, todos os frames são processados
+        com os parâmetros padrão, tornando o resultado reprodutível.
+        """
+
+        self._logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._adaptive = adaptive
+        self._budget = budget_ms / 1000
+        if target_fps:
+            self._budget = min(self._budget, max(1, workers) / target_fps)
+        self._level = DEFAULT_LEVEL
+        self._skip = 1
+        self._counter = 0
+        self._samples = 0
+        self._upgrade_votes = 0
+        self._overhead, self._detection_cost, self._encoding_cost = None, None, None
+        self._faces_per_frame = 0.0
+        self._frame_pixels = 0
+
+    def _average(self, current: Optional[float], value: float) -> float:
+        """
+        Atualiza uma média móvel exponencial.
+
+        :param current: Média atual, ou None se ainda não houver medições.
+        :param value: Nova medição.
+        :return: Nova média.
+        """
+
+        return value if current is None else (1 - self._ALPHA) * current + self._ALPHA * value
+
+    def settings(self) -> Optional[Settings]:
+        """
+        Decide se o próximo frame deve ser processado e com quais parâmetros.
+
+        :return: Retorna os parâmetros do reconhecimento, ou None se o frame deve ser pulado.
+        """
+
+        with self._lock:
+            self._counter += 1
+            if self._counter % self._skip:
+                return None
+            return LEVELS[self._level]._replace(skip=self._skip)
+
+    def predict(self, settings: Settings) -> float:
+        """
+        Prevê o custo, em segundos, de reconhecer um frame com os parâmetros informados.
+
+        :param settings: Parâmetros do reconhecimento.
+        :return: Custo previsto.
+        """
+
+        return (self._overhead
+                + self._detection_cost * settings.detection_pixels(self._frame_pixels)
+                + self._encoding_cost * settings.jitters * self._faces_per_frame)
+
+    def record(self, settings: Settings, frame_pixels: int, detection_seconds: float, encoding_seconds: float,
+               num_encoded: int, total_seconds: float) -> None:
+        """
+        Registra o custo medido no reconhecimento de um frame.
+
+        :param settings: Parâmetros usados no reconhecimento.
+        :param frame_pixels: Número de pixels do frame original.
+        :param detection_seconds: Tempo gasto na detecção.
+        :param encoding_seconds: Tempo gasto no encoding e na busca na galeria.
+        :param num_encoded: Número de rostos codificados.
+        :param total_seconds: Tempo total do reconhecimento do frame.
+        """
+
+        with self._lock:
+            self._frame_pixels = frame_pixels
+            self._detection_cost = self._average(self._detection_cost,
+                                                 detection_seconds / settings.detection_pixels(frame_pixels))
+            if num_encoded:
+                self._encoding_cost = self._average(self._encoding_cost,
+                                                    encoding_seconds / (num_encoded * settings.jitters))
+            elif self._encoding_cost is None:
+                self._encoding_cost = 0.0
+            self._faces_per_frame = self._average(self._faces_per_frame, num_encoded)
+            self._overhead = self._average(self._overhead,
+                                           max(0.0, total_seconds - detection_seconds - encoding_seconds))
+            self._samples += 1
+            if self._adaptive and self._samples % self._DECISION_INTERVAL == 0:
+                self._decide()
+
+    def _decide(self) -> None:
+        """
+        Escolhe o nível de qualidade e o número de frames pulados a partir dos custos medidos.
+        """
+
+        costs = [self.predict(settings) for settings in LEVELS]
+        level = len(LEVELS) - 1
+        for i, cost in enumerate(costs):
+            margin = self._UPGRADE_MARGIN if i < self._level else 1.0
+            if cost <= self._budget * margin:
+                level = i
+                break
+        if level < self._level:
+            self._upgrade_votes += 1
+            if self._upgrade_votes < self._UPGRADE_PATIENCE:
+                level = self._level
+        else:
+            self._upgrade_votes = 0
+        skip = min(RECOGNITION_MAX_SKIP, max(1, math.ceil(costs[level] / self._budget)))
+
+        settings = LEVELS[level]
+        decision = 'ALTERADO' if (level, skip) != (self._level, self._skip) else 'MANTIDO'
+        self._logger.info(
+            f'ESCALONADOR ({decision}): ESCALA {settings.scale} | UPSAMPLE {settings.upsample} | '
+            f'JITTERS {settings.jitters} | 1 A CADA {skip} FRAMES | CUSTO PREVISTO {1000 * costs[level]:.0f} ms | '
+            f'ORÇAMENTO {1000 * self._budget:.0f} ms'
+        )
+        self._level, self._skip = level, skip
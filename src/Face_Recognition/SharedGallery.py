@@ -0,0 +1,176 @@
+import logging
+from multiprocessing import shared_memory
+from typing import Dict, List, NamedTuple, Optional, Tuple, Type
+
+import numpy as np
+
+from src.Face_Recognition.GalleryMatcher import GalleryMatcher
+
+
+class SharedArray(NamedTuple):
+    """
+    Posição de uma matriz dentro do bloco de memória compartilhada.
+    """
+
+    key: str
+    dtype: str
+    shape: Tuple[int, ...]
+    offset: int
+
+
+class SharedGalleryHandle(NamedTuple):
+    """
+    Informações necessárias para que outro processo acesse a galeria compartilhada.
+    """
+
+    name: Optional[str]
+    arrays: List[SharedArray]
+    class_names: List[str]
+    matcher: Type[GalleryMatcher]
+
+
+class SharedGallery:
+    """
+    Classe responsável por compartilhar a galeria entre processos, via memória compartilhada.
+
+    O processo principal copia uma única vez para a memória compartilhada todas as matrizes da galeria, inclusive as
+    do índice, se houver (GalleryMatcher.shared_arrays). Os demais processos recriam a galeria sobre elas, somente
+    para leitura, sem cópias e sem treinar o índice, de modo que o consumo de memória não cresce com o número de
+    processos.
+    """
+
+    _ALIGNMENT: int = 64
+
+    _logger: logging.Logger
+    _shm: Optional[shared_memory.SharedMemory]
+    _handle: SharedGalleryHandle
+    _owner: bool
+
+    def __init__(self, handle: SharedGalleryHandle, shm: Optional[shared_memory.SharedMemory], owner: bool) -> None:
+        """
+        Método Construtor da classe. Use os métodos create e attach.
+
+        :param handle: Informações da galeria compartilhada.
+        :param shm: Bloco de memória compartilhada, ou None se a galeria estiver vazia.
+        :param owner: Flag indicando se este processo criou o bloco e é responsável por liberá-lo.
+        """
+
+        self._logger = logging.getLogger(__name__)
+        self._handle = handle
+        self._shm = shm
+        self._owner = owner
+
+    @classmethod
+    def create(cls, gallery: GalleryMatcher) -> 'SharedGallery':
+        """
+        Copia as matrizes da galeria para um novo bloco de memória compartilhada.
+
+        :param gallery: Galeria carregada no processo principal.
+        :return: Retorna a galeria compartilhada.
+        """
+
+        arrays = {key: np.ascontiguousarray(array) for key, array in gallery.shared_arrays().items()}
+        layout, size = [], 0
+        for key, array in arrays.items():
+            layout.append(SharedArray(key=key, dtype=array.dtype.str, shape=array.shape, offset=size))
+            size += -(-array.nbytes // cls._ALIGNMENT) * cls._ALIGNMENT
+
+        shm = None
+        if size:
+            shm = shared_memory.SharedMemory(create=True, size=size)
+            for item in layout:
+                cls._view(shm=shm, item=item)[...] = arrays[item.key]
+        handle = SharedGalleryHandle(name=shm.name if shm is not None else None, arrays=layout,
+                                     class_names=gallery.class_names(), matcher=type(gallery))
+        obj = cls(handle=handle, shm=shm, owner=True)
+        obj._logger.info(f'GALERIA COM {len(gallery)} ROSTOS COMPARTILHADA ({size} BYTES)')
+        return obj
+
+    @classmethod
+    def attach(cls, handle: SharedGalleryHandle) -> 'SharedGallery':
+        """
+        Acessa uma galeria compartilhada criada por outro processo.
+
+        :param handle: Informações da galeria compartilhada.
+        :return: Retorna a galeria compartilhada.
+        """
+
+        shm = shared_memory.SharedMemory(name=handle.name) if handle.name is not None else None
+        return cls(handle=handle, shm=shm, owner=False)
+
+    @staticmethod
+    def _view(shm: Optional[shared_memory.SharedMemory], item: SharedArray) -> np.ndarray:
+        """
+        Acessa uma matriz do bloco, sem cópia.
+
+        :param shm: Bloco de memória compartilhada, ou None se a galeria estiver vazia.
+        :param item: Posição da matriz no bloco.
+        :return: Matriz apoiada na memória compartilhada.
+        """
+
+        if shm is None or not int(np.prod(item.shape)):
+            return np.empty(item.shape, dtype=np.dtype(item.dtype))
+        return np.ndarray(item.shape, dtype=np.dtype(item.dtype), buffer=shm.buf, offset=item.offset)
+
+    def handle(self) -> SharedGalleryHandle:
+        """
+        Acessa as informações necessárias para que outro processo acesse a galeria.
+
+        :return: Retorna as informações da galeria compartilhada.
+        """
+
+        return self._handle
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Acessa as matrizes da galeria, sem cópia e somente para leitura.
+
+        :return: Dicionário com as matrizes apoiadas na memória compartilhada, pelo nome.
+        """
+
+        arrays = {}
+        for item in self._handle.arrays:
+            array = self._view(shm=self._shm, item=item)
+            array.flags.writeable = False
+            arrays[item.key] = array
+        return arrays
+
+    def encodings(self) -> np.ndarray:
+        """
+        Acessa a matriz de encodings, sem cópia e somente para leitura.
+
+        :return: Matriz float32 de formato (N, 128) apoiada na memória compartilhada.
+        """
+
+        return self.arrays()['encodings']
+
+    def class_names(self) -> List[str]:
+        """
+        Acessa o nome dos rostos da galeria.
+
+        :return: Lista com o nome de cada rosto.
+        """
+
+        return self._handle.class_names
+
+    def gallery(self) -> GalleryMatcher:
+        """
+        Recria a galeria, da mesma classe da galeria original, sobre a memória compartilhada.
+
+        :return: Retorna a galeria, pronta para buscas.
+        """
+
+        return self._handle.matcher.from_shared_arrays(arrays=self.arrays(), class_names=self.class_names())
+
+    def close(self) -> None:
+        """
+        Fecha o acesso à memória compartilhada e, no processo que a criou, libera o bloco.
+        """
+
+        if self._shm is None:
+            return
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+            self._logger.info('MEMÓRIA COMPARTILHADA DA GALERIA LIBERADA')
+        self._shm = None
@@ -0,0 +1,141 @@
+import logging
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, Union
+
+import cv2
+
+from src.Face_Recognition.Pipeline import Frame, FrameSlot
+
+# Prefixos de endereços de transmissões ao vivo.
+LIVE_PREFIXES = ('rtsp://', 'rtsps://', 'rtmp://', 'http://', 'https://', 'udp://', 'tcp://')
+
+# Extensões de imagens aceitas ao ler um diretório.
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+_logger = logging.getLogger(__name__)
+
+
+def is_live(source: Union[int, str]) -> bool:
+    """
+    Verifica se a fonte é uma câmera ou transmissão ao vivo, em que frames desatualizados devem ser descartados.
+
+    :param source: Índice da câmera, endereço da transmissão, arquivo de vídeo ou diretório de imagens.
+    :return: Retorna uma flag indicando se a fonte é ao vivo.
+    """
+
+    return isinstance(source, int) or str(source).lower().startswith(LIVE_PREFIXES)
+
+
+def read_directory(path: Union[str, Path]) -> Iterator[Frame]:
+    """
+    Lê as imagens de um diretório, em ordem alfabética.
+
+    :param path: Caminho do diretório.
+    :return: Gerador de frames, com o nome do arquivo e o índice da imagem como instante.
+    """
+
+    names = sorted(f for f in os.listdir(path) if f.lower().endswith(IMAGE_EXTENSIONS))
+    for index, name in enumerate(names):
+        image = cv2.imread(os.path.join(path, name))
+        if image is None:
+            _logger.warning(f'NÃO FOI POSSÍVEL LER A IMAGEM {name}')
+            continue
+        yield Frame(index=index, timestamp=float(index), image=image, name=name)
+
+
+def read_video(capture: cv2.VideoCapture) -> Iterator[Frame]:
+    """
+    Lê todos os frames de um arquivo de vídeo, sem descartar nenhum.
+
+    :param capture: Vídeo aberto.
+    :return: Gerador de frames, com a posição de cada frame no vídeo como instante.
+    """
+
+    index = 0
+    while True:
+        ret, image = capture.read()
+        if not ret:
+            break
+        yield Frame(index=index, timestamp=capture.get(cv2.CAP_PROP_POS_MSEC) / 1000, image=image)
+        index += 1
+    capture.release()
+
+
+def read_live(capture: cv2.VideoCapture) -> Iterator[Frame]:
+    """
+    Lê uma câmera ou transmissão ao vivo numa thread separada, entregando sempre o frame mais recente.
+
+    :param capture: Câmera ou transmissão aberta.
+    :return: Gerador de frames, com o horário da captura como instante.
+    """
+
+    slot = FrameSlot(metric='source_frames_dropped')
+
+    def capture_loop() -> None:
+        index = 0
+        while True:
+            ret, image = capture.read()
+            if not ret:
+                break
+            slot.put(Frame(index=index, timestamp=time.time(), image=image))
+            index += 1
+        capture.release()
+        slot.close()
+
+    threading.Thread(target=capture_loop, name='capture', daemon=True).start()
+    while True:
+        frame = slot.get()
+        if frame is None:
+            break
+        yield frame
+
+
+def prefetch(frames: Iterator[Frame], size: int = 8) -> Iterator[Frame]:
+    """
+    Lê os frames antecipadamente numa thread separada, sobrepondo a decodificação ao reconhecimento.
+
+    :param frames: Gerador de frames.
+    :param size: Número máximo de frames lidos antecipadamente.
+    :return: Gerador com os mesmos frames, na mesma ordem.
+    """
+
+    buffer = queue.Queue(maxsize=size)
+    end = object()
+
+    def read_loop() -> None:
+        try:
+            for frame in frames:
+                buffer.put(frame)
+        finally:
+            buffer.put(end)
+
+    threading.Thread(target=read_loop, name='prefetch', daemon=True).start()
+    while True:
+        frame = buffer.get()
+        if frame is end:
+            break
+        yield frame
+
+
+def open_source(source: Union[int, str]) -> Iterator[Frame]:
+    """
+    Abre uma fonte de frames: câmera, transmissão ao vivo, arquivo de vídeo ou diretório de imagens.
+
+    :param source: Índice da câmera, endereço da transmissão, arquivo de vídeo ou diretório de imagens.
+    :return: Gerador de frames. Arquivos e diretórios são lidos por completo; fontes ao vivo descartam os frames
+    desatualizados.
+    """
+
+    if not isinstance(source, int) and os.path.isdir(source):
+        return prefetch(read_directory(source))
+
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise OSError(f'NÃO FOI POSSÍVEL ABRIR A FONTE {source}')
+    if is_live(source):
+        return read_live(capture)
+    return prefetch(read_video(capture))
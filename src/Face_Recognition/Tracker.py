@@ -0,0 +1,155 @@
+import itertools
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src.config import TRACK_IOU_THRESHOLD, TRACK_MAX_MISSES, TRACK_REFRESH_SECONDS
+
+
+class Track:
+    """
+    Rosto acompanhado ao longo dos frames, com a identidade obtida na última identificação.
+    """
+
+    id: int
+    box: Tuple[int, int, int, int]
+    name: Optional[str]
+    distance: float
+    identified_at: float
+    misses: int
+
+    def __init__(self, track_id: int, box: Tuple[int, int, int, int]) -> None:
+        """
+        Método Construtor da classe.
+
+        :param track_id: Identificador da trilha.
+        :param box: Localização do rosto no formato (top, right, bottom, left).
+        """
+
+        self.id = track_id
+        self.box = box
+        self.name = None
+        self.distance = float('inf')
+        self.identified_at = 0.0
+        self.misses = 0
+
+
+class FaceTracker:
+    """
+    Classe responsável por associar os rostos detectados em frames consecutivos pela sobreposição (IoU) das caixas.
+
+    Assim, o encoding e a busca na galeria só precisam ser executados quando uma trilha começa ou quando a identidade
+    da trilha precisa ser atualizada, e o nome é mantido ao longo da trilha nos demais frames.
+    """
+
+    _lock: threading.Lock
+    _tracks: List[Track]
+    _ids: itertools.count
+    _iou_threshold: float
+    _max_misses: int
+    _refresh_seconds: float
+
+    def __init__(self, iou_threshold: float = TRACK_IOU_THRESHOLD, max_misses: int = TRACK_MAX_MISSES,
+                 refresh_seconds: float = TRACK_REFRESH_SECONDS) -> None:
+        """
+        Método Construtor da classe.
+
+        :param iou_threshold: Sobreposição mínima para associar uma detecção a uma trilha existente.
+        :param max_misses: Número de frames consecutivos sem detecção após o qual a trilha é descartada.
+        :param refresh_seconds: Intervalo, em segundos, para reidentificar uma trilha.
+        """
+
+        self._lock = threading.Lock()
+        self._tracks = []
+        self._ids = itertools.count()
+        self._iou_threshold = iou_threshold
+        self._max_misses = max_misses
+        self._refresh_seconds = refresh_seconds
+
+    @staticmethod
+    def _iou(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+        """
+        Calcula a sobreposição (intersecção sobre união) entre dois conjuntos de caixas.
+
+        :param boxes_a: Matriz (A, 4) de caixas no formato (top, right, bottom, left).
+        :param boxes_b: Matriz (B, 4) de caixas no formato (top, right, bottom, left).
+        :return: Matriz (A, B) de sobreposições.
+        """
+
+        top = np.maximum(boxes_a[:, np.newaxis, 0], boxes_b[np.newaxis, :, 0])
+        right = np.minimum(boxes_a[:, np.newaxis, 1], boxes_b[np.newaxis, :, 1])
+        bottom = np.minimum(boxes_a[:, np.newaxis, 2], boxes_b[np.newaxis, :, 2])
+        left = np.maximum(boxes_a[:, np.newaxis, 3], boxes_b[np.newaxis, :, 3])
+        intersection = np.clip(right - left, 0, None) * np.clip(bottom - top, 0, None)
+        area_a = (boxes_a[:, 1] - boxes_a[:, 3]) * (boxes_a[:, 2] - boxes_a[:, 0])
+        area_b = (boxes_b[:, 1] - boxes_b[:, 3]) * (boxes_b[:, 2] - boxes_b[:, 0])
+        union = area_a[:, np.newaxis] + area_b[np.newaxis, :] - intersection
+        return intersection / np.maximum(union, 1e-9)
+
+    def reset(self) -> None:
+        """
+        Descarta todas as trilhas, de modo que o próximo frame seja tratado como o início de uma nova cena.
+        """
+
+        with self._lock:
+            self._tracks = []
+
+    def update(self, faces_locations: List[Tuple[int, int, int, int]],
+               now: Optional[float] = None) -> List[Tuple[Track, bool]]:
+        """
+        Associa as detecções do frame atual às trilhas existentes, criando trilhas novas para as demais.
+
+        :param faces_locations: Localização dos rostos detectados no frame atual.
+        :param now: Instante do frame, em segundos. Se None, usa o relógio do sistema.
+        :return: Lista com a trilha de cada detecção, na mesma ordem, e uma flag indicando se a trilha precisa ser
+        identificada (trilha nova ou identificação expirada).
+        """
+
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            assigned: List[Optional[Track]] = [None] * len(faces_locations)
+            if self._tracks and faces_locations:
+                iou = self._iou(np.array([track.box for track in self._tracks], dtype=np.float32),
+                                np.array(faces_locations, dtype=np.float32))
+                while True:
+                    track_index, face_index = np.unravel_index(np.argmax(iou), iou.shape)
+                    if iou[track_index, face_index] < self._iou_threshold:
+                        break
+                    assigned[face_index] = self._tracks[track_index]
+                    iou[track_index, :] = -1
+                    iou[:, face_index] = -1
+
+            matched_ids = {track.id for track in assigned if track is not None}
+            for track in self._tracks:
+                if track.id not in matched_ids:
+                    track.misses += 1
+            self._tracks = [track for track in self._tracks if track.misses <= self._max_misses]
+
+            result = []
+            for i, box in enumerate(faces_locations):
+                track = assigned[i]
+                if track is None:
+                    track = Track(track_id=next(self._ids), box=tuple(box))
+                    self._tracks.append(track)
+                track.box = tuple(box)
+                track.misses = 0
+                needs_identity = track.name is None or now - track.identified_at > self._refresh_seconds
+                result.append((track, needs_identity))
+            return result
+
+    def identify(self, track: Track, name: str, distance: float, now: Optional[float] = None) -> None:
+        """
+        Registra a identidade de uma trilha.
+
+        :param track: Trilha identificada.
+        :param name: Nome da pessoa, ou UNKNOWN.
+        :param distance: Distância até o rosto conhecido mais próximo.
+        :param now: Instante do frame, em segundos. Se None, usa o relógio do sistema.
+        """
+
+        with self._lock:
+            track.name = name
+            track.distance = distance
+            track.identified_at = time.monotonic() if now is None else now
@@ -1,10 +1,66 @@
-from src.Face_Recognition.FaceRecognition import FaceRecognition
+from typing import List, Optional, TextIO, Union
 
+# As classes são importadas dentro de cada função: face_recognition (dlib) e cv2 só são carregados pelo comando que
+# os usa, e não a cada execução da linha de comando.
 
-def execute_face_recognition() -> None:
+
+def _parse_source(source: str) -> Union[int, str]:
+    """
+    Converte a fonte informada na linha de comando: números são índices de câmeras, o restante são endereços.
+
+    :param source: Fonte informada na linha de comando.
+    :return: Índice da câmera ou endereço do vídeo.
+    """
+
+    return int(source) if source.isdigit() else source
+
+
+def execute_face_recognition(sources: List[str] = None, headless: bool = False,
+                             output: Optional[TextIO] = None) -> None:
+    """
+    Executa o reconhecimento facial. Com mais de uma fonte, cada uma é executada num processo separado.
+
+    :param sources: Lista de índices de câmeras, endereços de vídeo ou diretórios de imagens. Se vazia, usa a câmera 0.
+    :param headless: Flag indicando execução sem janela, com os resultados escritos em JSON Lines.
+    :param output: Arquivo de saída dos resultados quando executado sem janela.
+    """
+
+    from src.Face_Recognition.FaceRecognition import FaceRecognition
+    from src.Face_Recognition.MultiCamera import MultiCamera
+
+    sources = [_parse_source(source) for source in sources] if sources else [0]
+    if headless:
+        obj = FaceRecognition()
+        for source in sources:
+            obj.run_headless(source=source, output=output)
+    elif len(sources) == 1:
+        obj = FaceRecognition()
+        obj.run(source=sources[0])
+    else:
+        obj = MultiCamera(sources=sources)
+        obj.run()
+
+
+def execute_build_index() -> None:
     """
-    Executa o reconhecimento facial.
+    Executa a construção do índice aproximado da galeria, salvando-o ao lado do Banco de Dados.
     """
 
-    obj = FaceRecognition()
+    from src.Face_Recognition.Matchers.IVFFlatMatcher import IVFFlatMatcher
+
+    IVFFlatMatcher.from_database()
+
+
+def execute_batch_recognition(input_dir: str, output: Optional[str] = None, workers: Optional[int] = None) -> None:
+    """
+    Executa o reconhecimento facial em lote das imagens de um diretório, distribuídas entre vários processos.
+
+    :param input_dir: Diretório com as imagens, percorrido recursivamente.
+    :param output: Arquivo CSV de saída. Se None, os resultados são gravados na tabela BatchResults.
+    :param workers: Número de processos. Se None, usa o número de núcleos.
+    """
+
+    from src.Face_Recognition.BatchRecognition import BatchRecognition
+
+    obj = BatchRecognition(input_dir=input_dir, output=output, workers=workers)
     obj.run()
@@ -0,0 +1,19 @@
+from src.Face_Recognition.Matchers.BruteForceMatcher import BruteForceMatcher
+from src.Face_Recognition.Matchers.IVFFlatMatcher import IVFFlatMatcher
+from enum import Enum
+
+
+class EnumMatchers(Enum):
+    """
+    Classe Enum que aponta para os algoritmos de busca na galeria de rostos.
+    """
+
+    exact = 'exact'
+    ivf = 'ivf'
+
+
+# Dicionário que permite acesso aos algoritmos de busca na galeria de rostos.
+MATCHER_DICT = {
+    EnumMatchers.exact: BruteForceMatcher,
+    EnumMatchers.ivf: IVFFlatMatcher
+}
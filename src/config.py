@@ -7,8 +7,130 @@ TIMER = 3
 # NÍVEL DE TOLERÂNCIA PARA DAR "MATCH" NOS ROSTOS
 TOLERANCE = 0.6
 
+# ALGORITMO DE BUSCA NA GALERIA DE ROSTOS: "exact" (FORÇA BRUTA) OU "ivf" (ÍNDICE APROXIMADO)
+MATCHER = 'exact'
+
+# NÚMERO DE LISTAS DO ÍNDICE IVF (None PARA ESCOLHER AUTOMATICAMENTE) E DE LISTAS VISITADAS EM CADA BUSCA
+IVF_NLIST = None
+IVF_NPROBE = 8
+
+# CRESCIMENTO DA GALERIA, EM RELAÇÃO AO TAMANHO NO ÚLTIMO TREINO, A PARTIR DO QUAL O ÍNDICE IVF É TREINADO NOVAMENTE.
+# ATÉ LÁ, OS NOVOS ROSTOS SÃO ACRESCENTADOS ÀS LISTAS DOS CENTRÓIDES MAIS PRÓXIMOS
+IVF_RETRAIN_GROWTH = 0.5
+
+# USO DA CÓPIA DA GALERIA EM DISCO, MAPEADA EM MEMÓRIA, NO LUGAR DA LEITURA DO BANCO DE DADOS
+GALLERY_SNAPSHOT = True
+
+# INTERVALO, EM SEGUNDOS, ENTRE AS VERIFICAÇÕES DE NOVOS ROSTOS NO BANCO DE DADOS DURANTE O RECONHECIMENTO
+# (None PARA DESATIVAR)
+GALLERY_POLL_SECONDS = 2.0
+
+# NÚMERO DE THREADS DE INFERÊNCIA DO RECONHECIMENTO FACIAL. A DETECÇÃO É PARALELA, MAS O RASTREAMENTO E A
+# IDENTIFICAÇÃO SÃO EXECUTADOS UMA THREAD POR VEZ, EM ORDEM DE CAPTURA
+INFERENCE_WORKERS = 2
+
+# RASTREAMENTO DOS ROSTOS: SOBREPOSIÇÃO MÍNIMA PARA ASSOCIAR DETECÇÕES, FRAMES SEM DETECÇÃO ANTES DE DESCARTAR A
+# TRILHA E INTERVALO, EM SEGUNDOS, PARA REIDENTIFICAR UMA TRILHA
+TRACK_IOU_THRESHOLD = 0.3
+TRACK_MAX_MISSES = 5
+TRACK_REFRESH_SECONDS = 3.0
+
+# ORÇAMENTO DE LATÊNCIA DO RECONHECIMENTO DE UM FRAME (ms), FPS DESEJADO (None PARA NÃO LIMITAR) E NÚMERO MÁXIMO
+# DE FRAMES PULADOS PELO ESCALONADOR
+RECOGNITION_BUDGET_MS = 200
+RECOGNITION_TARGET_FPS = None
+RECOGNITION_MAX_SKIP = 4
+
+# RECONHECIMENTO EM LOTE: IMAGENS POR TAREFA DO POOL, REGISTROS POR GRAVAÇÃO, AMPLIAÇÕES DA DETECÇÃO E
+# REAMOSTRAGENS DO ENCODING
+BATCH_TASK_SIZE = 32
+BATCH_COMMIT_SIZE = 1000
+BATCH_UPSAMPLE = 1
+BATCH_JITTERS = 1
+
+# NÚMERO DE REGISTROS LIDOS POR BLOCO NA LEITURA DAS TABELAS
+READ_BLOCK_SIZE = 4096
+
+# NÚMERO DE REGISTROS GRAVADOS POR TRANSAÇÃO NA INSERÇÃO EM MASSA DE PESSOAS
+ENROLL_CHUNK_SIZE = 1000
+
+# VERIFICAÇÃO DAS IMAGENS: PROCESSOS USADOS NO CÁLCULO DOS ENCODINGS (None PARA O NÚMERO DE NÚCLEOS) E
+# REAMOSTRAGENS DE CADA ENCODING
+VERIFY_WORKERS = None
+VERIFY_JITTERS = 10
+
+# NÚMERO DE ROSTOS NOVOS ACUMULADOS PELA VERIFICAÇÃO DAS IMAGENS ANTES DE GRAVÁ-LOS NO BANCO DE DADOS
+VERIFY_FLUSH_EVERY = 100
+
+# NÚMERO DE IMAGENS RECORTADAS ENTRE AS GRAVAÇÕES DO MANIFESTO NO BANCO DE DADOS
+CROP_FLUSH_EVERY = 100
+
+# OCR DAS IMAGENS SEM INTERAÇÃO: IMAGENS POR CHAMADA AO OCR, LOTE DE INFERÊNCIA DO RECONHECEDOR DE TEXTO E THREADS
+# DE LEITURA DAS IMAGENS
+OCR_IMAGES_PER_CALL = 32
+OCR_BATCH_SIZE = 16
+OCR_DECODE_WORKERS = 2
+
+# GALERIA WEB: LADO MAIOR DAS MINIATURAS (PIXELS), QUALIDADE JPEG, VALIDADE NO CACHE DO NAVEGADOR (SEGUNDOS), THREADS
+# QUE GERAM AS MINIATURAS DAS PRÓXIMAS PÁGINAS EM SEGUNDO PLANO E NÚMERO DE PÁGINAS VIZINHAS LISTADAS NA PAGINAÇÃO
+THUMBNAIL_SIZE = 256
+THUMBNAIL_QUALITY = 85
+THUMBNAIL_MAX_AGE = 365 * 24 * 60 * 60
+THUMBNAIL_WORKERS = 1
+PAGINATION_WINDOW = 5
+
+# SERVIÇO HTTP DE RECONHECIMENTO: THREADS DE DETECÇÃO E ENCODING, REQUISIÇÕES EM ANDAMENTO NO MÁXIMO (ACIMA DISSO A
+# RESPOSTA É 503), JANELA DE AGRUPAMENTO DAS BUSCAS (MILISSEGUNDOS), ROSTOS POR BUSCA AGRUPADA, NÚMERO PADRÃO E MÁXIMO
+# DE IDENTIDADES POR ROSTO, AMPLIAÇÕES NA DETECÇÃO, REAMOSTRAGENS DO ENCODING, TAMANHO MÁXIMO DA IMAGEM (BYTES) E
+# ESPERA MÁXIMA PELA BUSCA NA GALERIA (SEGUNDOS)
+SERVICE_WORKERS = 2
+SERVICE_MAX_PENDING = 32
+SERVICE_BATCH_WINDOW_MS = 5
+SERVICE_MAX_BATCH = 64
+SERVICE_TOP_K = 3
+SERVICE_MAX_TOP_K = 20
+SERVICE_UPSAMPLE = 1
+SERVICE_JITTERS = 1
+SERVICE_MAX_IMAGE_BYTES = 10 * 1024 * 1024
+SERVICE_MATCH_TIMEOUT = 30
+
+# TRANSMISSÃO MJPEG DO RECONHECIMENTO NA GALERIA WEB: FONTES DISPONÍVEIS EM /stream/<n>, QUALIDADE JPEG E NÚMERO
+# MÁXIMO DE FRAMES PUBLICADOS POR SEGUNDO (None PARA TODOS), E SEGUNDOS SEM ESPECTADORES ATÉ A FONTE SER LIBERADA
+# (None PARA MANTÊ-LA ABERTA)
+STREAM_SOURCES = [0]
+STREAM_JPEG_QUALITY = 80
+STREAM_MAX_FPS = 15
+STREAM_IDLE_SECONDS = 30
+
+# MÉTRICAS DE DESEMPENHO: COLETA ATIVA, LIMITES DOS INTERVALOS DOS HISTOGRAMAS (SEGUNDOS) E NÚMERO DE MEDIDAS RECENTES
+# USADAS NOS PERCENTIS
+METRICS_ENABLED = True
+METRICS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_WINDOW = 1024
+
+# API DE PESSOAS DA GALERIA WEB: REGISTROS POR PÁGINA PADRÃO E MÁXIMO
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 500
+
+# NÚMERO DE REGISTROS CONVERTIDOS POR LOTE NA MIGRAÇÃO DOS ENCODINGS PARA BLOB
+MIGRATE_BATCH_SIZE = 500
+
+# CONEXÕES COM O BANCO DE DADOS: ESPERA MÁXIMA POR UM BLOQUEIO (SEGUNDOS), MODO DE SINCRONIZAÇÃO, CACHE DE PÁGINAS (KB),
+# ÁREA MAPEADA EM MEMÓRIA (BYTES) E NÚMERO DE COMANDOS PREPARADOS MANTIDOS EM CACHE POR CONEXÃO
+DB_BUSY_TIMEOUT = 30
+DB_SYNCHRONOUS = 'NORMAL'
+DB_CACHE_SIZE_KB = 64 * 1024
+DB_MMAP_SIZE = 256 * 1024 * 1024
+DB_CACHED_STATEMENTS = 256
+
 # NOME DE ARQUIVOS
+DB_FILE = 'Database.db'
+GALLERY_SNAPSHOT_FILE = 'Database.gallery'
+VERIFY_CHECKPOINT_FILE = 'Database.verify.jsonl'
+NAME_REVIEW_FILE = 'names_review.csv'
+THUMBNAIL_DIR = '.thumbnails'
 STREAMLIT_APP = 'app.py'
+IVF_INDEX_FILE = 'Database.ivf.npz'
 
 # LOCALIZAÇÃO DO DIRETÓRIO RAIZ
 PATH_DIR_IMG = 'static/images'
@@ -17,3 +139,12 @@ PATH_PROJECT = Path(PATH_SRC).parent
 
 # LOCALIZAÇÃO DOS DIRETÓRIOS
 DIR_IMG = PATH_PROJECT / PATH_DIR_IMG
+PATH_IVF_INDEX = PATH_PROJECT / IVF_INDEX_FILE
+PATH_DB = PATH_PROJECT / DB_FILE
+PATH_GALLERY_SNAPSHOT = PATH_PROJECT / GALLERY_SNAPSHOT_FILE
+PATH_VERIFY_CHECKPOINT = PATH_PROJECT / VERIFY_CHECKPOINT_FILE
+PATH_NAME_REVIEW = PATH_PROJECT / NAME_REVIEW_FILE
+PATH_THUMBNAILS = PATH_PROJECT / THUMBNAIL_DIR
+
+# DIMENSÃO DO ENCODING DE CADA ROSTO
+ENCODING_SIZE = 128
@@ -7,12 +7,16 @@ import numpy as np
 from PIL import Image
 from tqdm import tqdm
 
-from src.config import DIR_IMG
+from src.images.Manifest import Manifest, STAGE_CROP
+from src.config import DIR_IMG, CROP_FLUSH_EVERY
+from src.utils import metrics
 
 
 class CropImages:
     """
     Classe responsável por recortar as imagens remanescentes no diretório após a execução da classe VerifyFace.
+    Imagens já recortadas, segundo o manifesto, são ignoradas. O manifesto é gravado a cada CROP_FLUSH_EVERY imagens
+    e ao final, mesmo se o recorte for interrompido, para que as imagens já recortadas não sejam recortadas de novo.
     """
 
     _logger: logging.Logger
@@ -67,11 +71,22 @@ class CropImages:
         Método que executa o processo de recorte da imagem.
         """
         self._logger.info('RECUPERANDO IMAGENS...')
-        list_images = [f for f in os.listdir(DIR_IMG)]
-        for name_image in tqdm(list_images):
-            face_location, image = self._get_face_location(name_image=name_image)
-            image_cropped = self._crop_image(face_location=face_location, image=image)
-            self._save_change_cropped_image_in_directory(name_image=name_image, image_cropped=image_cropped)  #
+        manifest = Manifest(stage=STAGE_CROP)
+        list_images = manifest.pending([f for f in os.listdir(DIR_IMG)])
+        try:
+            for num, name_image in enumerate(tqdm(list_images), start=1):
+                with metrics.timer('crop_detection'):
+                    face_location, image = self._get_face_location(name_image=name_image)
+                with metrics.timer('crop_cropping'):
+                    image_cropped = self._crop_image(face_location=face_location, image=image)
+                with metrics.timer('crop_saving'):
+                    self._save_change_cropped_image_in_directory(name_image=name_image, image_cropped=image_cropped)
+                manifest.mark(name_image)
+                metrics.increment('crop_images')
+                if num % CROP_FLUSH_EVERY == 0:
+                    manifest.flush()
+        finally:
+            manifest.flush()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,148 @@
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Tuple
+
+import cv2
+import face_recognition as fr
+import numpy as np
+from tqdm import tqdm
+
+from src.images.CropImages import CropImages
+from src.images.Manifest import STAGE_CROP
+from src.images.VerifyFace import VerifyFace
+from src.config import DIR_IMG, VERIFY_JITTERS
+from src.utils import metrics
+
+_logger = logging.getLogger(__name__)
+
+# Resultado de cada imagem: nome, encoding do rosto e imagem recortada.
+Enrollment = Tuple[str, np.ndarray, np.ndarray]
+
+
+def _decode(names: Iterable[str]) -> Iterator[Tuple[str, np.ndarray]]:
+    """
+    Lê cada imagem uma única vez, no mesmo formato usado pela verificação e pelo recorte.
+
+    :param names: Nome das imagens.
+    :return: Gerador com o nome e a imagem.
+    """
+
+    for name in names:
+        image = fr.load_image_file(f'{DIR_IMG}/{name}')
+        yield name, cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+def _detect(images: Iterable[Tuple[str, np.ndarray]]) -> Iterator[Tuple[str, np.ndarray, Tuple[int, int, int, int]]]:
+    """
+    Detecta o rosto de cada imagem uma única vez. Imagens sem rosto são ignoradas e permanecem no diretório.
+
+    :param images: Gerador com o nome e a imagem.
+    :return: Gerador com o nome, a imagem e a localização do primeiro rosto.
+    """
+
+    for name, image in images:
+        faces_locations = fr.face_locations(image)
+        if not faces_locations:
+            _logger.warning(f'NENHUM ROSTO DETECTADO EM {name}')
+            continue
+        yield name, image, faces_locations[0]
+
+
+def _encode(faces: Iterable[Tuple[str, np.ndarray, Tuple[int, int, int, int]]]) -> Iterator[Enrollment]:
+    """
+    Calcula o encoding e o recorte de cada rosto a partir da mesma localização.
+
+    :param faces: Gerador com o nome, a imagem e a localização do rosto.
+    :return: Gerador com o nome, o encoding e a imagem recortada.
+    """
+
+    for name, image, face_location in faces:
+        face_encoding = fr.face_encodings(image, known_face_locations=[face_location], num_jitters=VERIFY_JITTERS)[0]
+        top, right, bottom, left = face_location
+        image_cropped = np.ascontiguousarray(image[top:bottom, left:right, ::-1])
+        yield name, face_encoding, image_cropped
+
+
+def _process_images(names: List[str]) -> List[Enrollment]:
+    """
+    Executa as etapas de leitura, detecção, encoding e recorte de um lote de imagens num processo do pool.
+
+    :param names: Nome das imagens.
+    :return: Lista com o nome, o encoding e a imagem recortada de cada imagem com rosto.
+    """
+
+    return list(_encode(_detect(_decode(names))))
+
+
+class EnrollImages(VerifyFace, CropImages):
+    """
+    Classe responsável pelo cadastro das imagens numa única passagem, unindo as etapas de VerifyFace e CropImages.
+
+    Cada imagem é lida uma única vez e o rosto é detectado uma única vez; a mesma localização é usada no encoding e
+    no recorte. As etapas são executadas em paralelo num pool de processos, e as decisões de descarte e inserção
+    seguem a ordem de _order_images, como em VerifyFace. Imagens de rostos conhecidos são apagadas; as demais são
+    cadastradas e substituídas pelo recorte do rosto. Imagens já verificadas, segundo o manifesto, são ignoradas.
+
+    Uma imagem cadastrada é registrada no checkpoint antes de o recorte ser salvo. Se o cadastro for interrompido
+    nesse intervalo, a imagem é dada como verificada na próxima execução, mas não como recortada; ela é apenas
+    recortada, sem nova verificação, pois já está na galeria e seria apagada como rosto conhecido.
+    """
+
+    def _crop_verified(self, names: List[str]) -> None:
+        """
+        Recorta as imagens já verificadas e cadastradas, mas ainda não recortadas.
+
+        :param names: Nome das imagens.
+        """
+
+        self._logger.info(f'RECORTANDO {len(names)} IMAGENS JÁ CADASTRADAS...')
+        for name in names:
+            face_location, image = self._get_face_location(name_image=name)
+            if not face_location:
+                self._logger.warning(f'NENHUM ROSTO DETECTADO EM {name}')
+                continue
+            image_cropped = self._crop_image(face_location=face_location, image=image)
+            self._save_change_cropped_image_in_directory(name_image=name, image_cropped=image_cropped)
+            self._manifest.mark(name, stages=[STAGE_CROP])
+
+    def run(self) -> None:
+        """
+        Método que executa o cadastro das imagens.
+        """
+
+        self._logger.info('INICIANDO CADASTRO...')
+
+        list_images = sorted([f for f in os.listdir(DIR_IMG)], key=self._order_images)
+        not_cropped = self._manifest.pending(list_images, stage=STAGE_CROP)
+        list_images = self._manifest.pending(list_images)
+        verified = set(not_cropped) - set(list_images)
+        if verified:
+            self._crop_verified(names=[name for name in not_cropped if name in verified])
+        chunksize = max(1, min(32, len(list_images) // (4 * self._workers)))
+        chunks = [list_images[i:i + chunksize] for i in range(0, len(list_images), chunksize)]
+
+        with ProcessPoolExecutor(max_workers=self._workers) as executor:
+            self._logger.info(f'PROCESSANDO IMAGENS EM {self._workers} PROCESSOS...')
+            progress = tqdm(total=len(list_images), desc='CADASTRANDO IMAGENS...')
+            # As etapas de cada lote são executadas nos processos do pool; aqui é medida a espera por cada lote
+            wait_start = time.perf_counter()
+            for chunk, results in zip(chunks, executor.map(_process_images, chunks)):
+                metrics.observe('enroll_chunk_wait', time.perf_counter() - wait_start)
+                metrics.increment('enroll_images_without_face', len(chunk) - len(results))
+                for image, face_encoding, image_cropped in results:
+                    if self._verify(image=image, face_encoding=face_encoding):
+                        with metrics.timer('crop_saving'):
+                            self._save_change_cropped_image_in_directory(name_image=image,
+                                                                         image_cropped=image_cropped)
+                        self._manifest.mark(image, stages=[STAGE_CROP])
+                progress.update(len(chunk))
+                wait_start = time.perf_counter()
+            progress.close()
+        self._flush()
+
+
+if __name__ == '__main__':
+    e = EnrollImages()
+    e.run()
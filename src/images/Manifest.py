@@ -0,0 +1,153 @@
+import hashlib
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+from src.Database.execute import execute_create_table, execute_delete_many, execute_insert_many, execute_iter_table
+from src.Database.options import EnumTables
+from src.config import DIR_IMG
+
+# Etapas registradas no manifesto, com o mesmo nome das tarefas de "images execute-task".
+STAGE_VERIFY = 'verificar_imagem'
+STAGE_CROP = 'recortar_imagem'
+
+
+class Entry(NamedTuple):
+    """
+    Estado de uma imagem registrado no manifesto.
+    """
+
+    size: int
+    mtime: int
+    hash: str
+    stages: Set[str]
+
+
+class Manifest:
+    """
+    Classe responsável por identificar as imagens do diretório que ainda não passaram por uma etapa.
+
+    Cada imagem é registrada pelo nome, tamanho, data de modificação e hash do conteúdo, com as etapas pelas quais já
+    passou. Se o tamanho e a data de modificação não mudaram, a imagem é considerada a mesma sem ser lida; se mudaram,
+    o hash decide. Imagens com conteúdo novo perdem as etapas registradas e são processadas novamente.
+    """
+
+    _logger: logging.Logger
+    _stage: str
+    _entries: Dict[str, Entry]
+    _changed: Dict[str, Entry]
+    _removed: Set[str]
+
+    def __init__(self, stage: str) -> None:
+        """
+        Método Construtor da classe.
+
+        :param stage: Etapa que usa o manifesto para escolher as imagens a processar.
+        """
+
+        self._logger = logging.getLogger(__name__)
+        self._stage = stage
+        self._changed, self._removed = {}, set()
+        execute_create_table(table=EnumTables.imagemanifest.value)
+        self._entries = {
+            row[0]: Entry(size=row[1], mtime=row[2], hash=row[3], stages=set(filter(None, row[4].split(','))))
+            for rows in execute_iter_table(table=EnumTables.imagemanifest.value)
+            for row in rows
+        }
+
+    @staticmethod
+    def _hash(path: str) -> str:
+        """
+        Calcula o hash do conteúdo de um arquivo.
+
+        :param path: Caminho do arquivo.
+        :return: Retorna o hash BLAKE2b, em hexadecimal.
+        """
+
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _current(self, name: str, entry: Optional[Entry]) -> Entry:
+        """
+        Compara o arquivo com o registro do manifesto, calculando o hash apenas se o tamanho ou a data mudaram.
+
+        :param name: Nome da imagem.
+        :param entry: Registro da imagem no manifesto, se existir.
+        :return: Retorna o estado atual da imagem, com as etapas registradas se o conteúdo não mudou.
+        """
+
+        stat = os.stat(f'{DIR_IMG}/{name}')
+        if entry is not None and (entry.size, entry.mtime) == (stat.st_size, stat.st_mtime_ns):
+            return entry
+        content_hash = self._hash(f'{DIR_IMG}/{name}')
+        stages = entry.stages if entry is not None and entry.hash == content_hash else set()
+        return Entry(size=stat.st_size, mtime=stat.st_mtime_ns, hash=content_hash, stages=stages)
+
+    def pending(self, names: Iterable[str], stage: Optional[str] = None) -> List[str]:
+        """
+        Filtra as imagens novas ou alteradas que ainda não passaram pela etapa.
+
+        :param names: Nome das imagens, na ordem em que devem ser processadas.
+        :param stage: Etapa consultada. Se None, usa a etapa do manifesto.
+        :return: Retorna o nome das imagens pendentes, na mesma ordem.
+        """
+
+        stage = stage or self._stage
+        names = list(names)
+        pending = []
+        for name in names:
+            entry = self._entries.get(name)
+            current = self._current(name=name, entry=entry)
+            if current != entry:
+                self._entries[name] = current
+                self._changed[name] = current
+            if stage not in current.stages:
+                pending.append(name)
+        self._logger.info(f'{len(pending)} DE {len(names)} IMAGENS PENDENTES NA ETAPA {stage}')
+        return pending
+
+    def mark(self, name: str, stages: Iterable[str] = ()) -> None:
+        """
+        Registra que a imagem passou pela etapa. O estado do arquivo é lido novamente, pois a etapa pode tê-lo
+        alterado, como no recorte, sem perder as etapas anteriores.
+
+        :param name: Nome da imagem.
+        :param stages: Etapas adicionais concluídas junto com a etapa do manifesto.
+        """
+
+        entry = self._entries.get(name)
+        current = self._current(name=name, entry=entry)
+        stages = (entry.stages if entry is not None else set()) | {self._stage, *stages}
+        current = current._replace(stages=stages)
+        self._entries[name] = current
+        self._changed[name] = current
+        self._removed.discard(name)
+
+    def forget(self, name: str) -> None:
+        """
+        Remove a imagem do manifesto, após ela ser apagada do diretório.
+
+        :param name: Nome da imagem.
+        """
+
+        self._entries.pop(name, None)
+        self._changed.pop(name, None)
+        self._removed.add(name)
+
+    def flush(self) -> None:
+        """
+        Grava no Banco de Dados as alterações acumuladas no manifesto.
+        """
+
+        if self._changed:
+            date = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+            rows = [(name, entry.size, entry.mtime, entry.hash, ','.join(sorted(entry.stages)), date)
+                    for name, entry in self._changed.items()]
+            if execute_insert_many(table=EnumTables.imagemanifest.value, rows=rows):
+                self._changed = {}
+        if self._removed and execute_delete_many(table=EnumTables.imagemanifest.value, keys=self._removed):
+            self._removed = set()
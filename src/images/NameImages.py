@@ -1,14 +1,19 @@
+import csv
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 import click
 import numpy as np
 from tqdm import tqdm
-from src.config import DIR_IMG
+from src.config import DIR_IMG, OCR_BATCH_SIZE, OCR_DECODE_WORKERS, OCR_IMAGES_PER_CALL, PATH_NAME_REVIEW
 import os
 import easyocr as ocr
 import cv2
-from typing import List, Tuple, Union, Any
+from typing import Dict, List, Tuple, Union, Any
+from src.images.ReviewNames import REVIEW_COLUMNS
+from src.utils import metrics
 
 
 class NameImages:
@@ -19,16 +24,19 @@ class NameImages:
     _logger: logging.Logger
     _reader = ocr.Reader
     _RE_PATTERN: re.Pattern
+    _batch_size: int
 
-    def __init__(self, gpu: bool = False) -> None:
+    def __init__(self, gpu: bool = False, batch_size: int = OCR_BATCH_SIZE) -> None:
         """
         Método Construtor da classe
 
         :param gpu: Flag indicando uso da GPU
+        :param batch_size: Lote de inferência do reconhecedor de texto no modo sem interação.
         """
 
         self._logger = logging.getLogger(__name__)
         self._reader = ocr.Reader(['pt'], gpu=gpu)
+        self._batch_size = batch_size
         self._RE_PATTERN = re.compile(r'[!@#$%^&*()_+{}\[\]:;<>,.?/\\|`~-]+$')
 
     def _remove_special_character(self, text: str) -> str:
@@ -145,6 +153,85 @@ class NameImages:
         response = click.prompt(f'Deseja alterar texto detectado?\n\t{text}', default='', show_default=False)
         return response.title() if len(response) else text.title()
 
+    def _propose_name(self, result: Any) -> Tuple[str, float]:
+        """
+        Monta o nome proposto a partir dos textos encontrados, com a mesma formatação do modo interativo.
+
+        :param result: Lista com a caixa delimitadora, texto e probabilidade de cada texto encontrado.
+        :return: Retorna o nome proposto e a menor probabilidade entre os textos que o compõem.
+        """
+
+        texts = [self._remove_special_character(text) for _, text, _ in result]
+        confidence = min(float(probabilidade) for _, _, probabilidade in result)
+        return ' '.join(text for text in texts if text).title(), confidence
+
+    def _read_text_from_batch(self, images: List[np.ndarray]) -> List[Any]:
+        """
+        Identifica o texto de várias imagens com a API em lote do OCR. As imagens são agrupadas por dimensão, pois
+        cada chamada em lote exige imagens do mesmo tamanho; assim nenhuma imagem é redimensionada.
+
+        :param images: Imagens usadas para identificar o texto.
+        :return: Retorna, na ordem das imagens, o resultado do OCR de cada uma.
+        """
+
+        groups: Dict[Tuple[int, ...], List[int]] = {}
+        for i, image in enumerate(images):
+            groups.setdefault(image.shape, []).append(i)
+
+        results = [None] * len(images)
+        for indexes in groups.values():
+            with metrics.timer('ocr_batch'):
+                batch = self._reader.readtext_batched([images[i] for i in indexes], batch_size=self._batch_size)
+            for i, result in zip(indexes, batch):
+                results[i] = result
+        return results
+
+    def propose(self, output: Union[str, Path] = PATH_NAME_REVIEW) -> int:
+        """
+        Executa o OCR das imagens sem interação e grava os nomes propostos, com a confiança, no arquivo de revisão.
+        As imagens são lidas em threads enquanto o lote anterior passa pelo OCR, e os renomeios ficam para a etapa de
+        revisão (classe ReviewNames).
+
+        :param output: Arquivo CSV de revisão.
+        :return: Retorna o número de nomes propostos.
+        """
+
+        self._logger.info('RECUPERANDO IMAGENS...')
+        list_images = sorted(f for f in os.listdir(DIR_IMG) if f.lower().startswith('face_'))
+        chunks = [list_images[i:i + OCR_IMAGES_PER_CALL] for i in range(0, len(list_images), OCR_IMAGES_PER_CALL)]
+        num_proposed = 0
+
+        with open(output, 'w', newline='', encoding='utf-8') as file, \
+                ThreadPoolExecutor(max_workers=OCR_DECODE_WORKERS) as executor:
+            writer = csv.writer(file)
+            writer.writerow(REVIEW_COLUMNS)
+            progress = tqdm(total=len(list_images), desc='IDENTIFICANDO TEXTO...')
+            decoding = [executor.submit(cv2.imread, f'{DIR_IMG}/{name}') for name in chunks[0]] if chunks else []
+            for n, chunk in enumerate(chunks):
+                # A leitura é feita pelas threads durante o lote anterior; aqui é medida apenas a espera restante
+                with metrics.timer('ocr_decode_wait'):
+                    images = [future.result() for future in decoding]
+                if n + 1 < len(chunks):
+                    decoding = [executor.submit(cv2.imread, f'{DIR_IMG}/{name}') for name in chunks[n + 1]]
+                loaded = [(name, image) for name, image in zip(chunk, images) if image is not None]
+                metrics.increment('ocr_images_unreadable', len(chunk) - len(loaded))
+                results = self._read_text_from_batch(images=[image for _, image in loaded])
+                for (name_image, _), result in zip(loaded, results):
+                    if not len(result):
+                        self._logger.warning(f'NENHUM TEXTO IDENTIFICADO EM {name_image}')
+                        metrics.increment('ocr_images_without_text')
+                        continue
+                    new_name_image, confidence = self._propose_name(result=result)
+                    writer.writerow((name_image, new_name_image, f'{confidence:.4f}'))
+                    num_proposed += 1
+                    metrics.increment('ocr_names_proposed')
+                file.flush()
+                progress.update(len(chunk))
+            progress.close()
+
+        self._logger.info(f'{num_proposed} NOMES PROPOSTOS GRAVADOS EM {output}')
+        return num_proposed
+
     def run(self) -> None:
         """
         Executa  o processo de nomeação das imagens.
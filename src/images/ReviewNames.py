@@ -0,0 +1,123 @@
+import csv
+import logging
+import os
+from pathlib import Path
+from typing import List, Optional, Union
+
+import click
+
+from src.config import DIR_IMG, PATH_NAME_REVIEW
+
+# COLUNAS DO ARQUIVO DE REVISÃO DOS NOMES
+REVIEW_COLUMNS = ('Imagem', 'Nome_proposto', 'Confianca')
+
+
+class ReviewNames:
+    """
+    Classe responsável por revisar os nomes propostos pelo OCR sem interação (NameImages.propose) e renomear as
+    imagens.
+
+    Cada nome é confirmado com "enter", alterado digitando o novo nome ou mantido para depois com "-". Com uma
+    confiança mínima, os nomes acima dela são aplicados sem perguntas e os demais permanecem no arquivo de revisão.
+    """
+
+    _logger: logging.Logger
+    _path: Path
+    _min_confidence: Optional[float]
+
+    def __init__(self, path: Union[str, Path] = PATH_NAME_REVIEW, min_confidence: Optional[float] = None) -> None:
+        """
+        Método Construtor da classe.
+
+        :param path: Arquivo CSV de revisão.
+        :param min_confidence: Confiança mínima para aplicar o nome sem perguntas. Se None, todos os nomes são
+        revisados.
+        """
+
+        self._logger = logging.getLogger(__name__)
+        self._path = Path(path)
+        self._min_confidence = min_confidence
+
+    def _rename_image(self, name_image: str, new_name_image: str) -> bool:
+        """
+        Renomeia a imagem, mantendo a extensão. Uma imagem existente com o novo nome não é sobrescrita.
+
+        :param name_image: Nome da imagem.
+        :param new_name_image: Novo nome da imagem, sem extensão.
+        :return: Retorna um valor booleano que indica se a imagem foi renomeada.
+        """
+
+        _, extension = os.path.splitext(name_image)
+        target = f'{DIR_IMG}/{new_name_image}{extension}'
+        if os.path.exists(target):
+            self._logger.warning(f'IMAGEM {new_name_image}{extension} JÁ EXISTE, {name_image} NÃO FOI RENOMEADA')
+            return False
+        try:
+            self._logger.info(f'RENOMENANDO {name_image} para {new_name_image}')
+            os.rename(f'{DIR_IMG}/{name_image}', target)
+        except OSError as e:
+            self._logger.error('ERRO DURANTE A RENOMEAÇÃO DAS IMAGENS')
+            self._logger.exception(f'EXCEÇÃO: {e}')
+            return False
+        return True
+
+    def _review(self, name_image: str, new_name_image: str, confidence: float) -> Optional[str]:
+        """
+        Decide o nome da imagem, pela confiança mínima ou perguntando ao operador.
+
+        :param name_image: Nome da imagem.
+        :param new_name_image: Nome proposto pelo OCR.
+        :param confidence: Confiança do nome proposto.
+        :return: Retorna o nome a aplicar, ou None se a imagem deve permanecer no arquivo de revisão.
+        """
+
+        if self._min_confidence is not None:
+            return new_name_image if confidence >= self._min_confidence else None
+        response = click.prompt(f'{name_image} ({confidence:.2f})', default=new_name_image)
+        if response.strip() == '-':
+            return None
+        return response.strip().title()
+
+    def run(self) -> int:
+        """
+        Executa a revisão dos nomes. As linhas não aplicadas são regravadas no arquivo de revisão, que é apagado
+        quando não resta nenhuma.
+
+        :return: Retorna o número de imagens renomeadas.
+        """
+
+        if not self._path.exists():
+            self._logger.warning(f'ARQUIVO DE REVISÃO {self._path} NÃO ENCONTRADO')
+            return 0
+        with open(self._path, newline='', encoding='utf-8') as file:
+            rows = list(csv.DictReader(file))
+
+        self._logger.info(f'REVISANDO {len(rows)} NOMES PROPOSTOS...')
+        remaining: List[dict] = []
+        num_renamed = 0
+        for row in rows:
+            name_image, confidence = row['Imagem'], float(row['Confianca'])
+            if not os.path.exists(f'{DIR_IMG}/{name_image}'):
+                self._logger.warning(f'IMAGEM {name_image} NÃO ENCONTRADA')
+                continue
+            new_name_image = self._review(name_image=name_image, new_name_image=row['Nome_proposto'],
+                                          confidence=confidence)
+            if new_name_image and self._rename_image(name_image=name_image, new_name_image=new_name_image):
+                num_renamed += 1
+            else:
+                remaining.append(row)
+
+        if remaining:
+            with open(self._path, 'w', newline='', encoding='utf-8') as file:
+                writer = csv.DictWriter(file, fieldnames=REVIEW_COLUMNS)
+                writer.writeheader()
+                writer.writerows(remaining)
+        else:
+            self._path.unlink()
+        self._logger.info(f'{num_renamed} IMAGENS RENOMEADAS, {len(remaining)} PENDENTES DE REVISÃO')
+        return num_renamed
+
+
+if __name__ == '__main__':
+    r = ReviewNames()
+    r.run()
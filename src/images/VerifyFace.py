@@ -1,32 +1,67 @@
+import json
 import logging
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from tqdm import tqdm
 import cv2
 import face_recognition as fr
 import numpy as np
 
-from src.Database.execute import execute_read_table, execute_insert
-from src.Database.options import EnumTables
-from src.config import DIR_IMG, TOLERANCE
+from src.Database.execute import execute_insert_faces
+from src.Face_Recognition.GalleryMatcher import GalleryMatcher
+from src.Face_Recognition.Matchers.BruteForceMatcher import BruteForceMatcher
+from src.images.Manifest import Manifest, STAGE_VERIFY
+from src.config import DIR_IMG, PATH_VERIFY_CHECKPOINT, VERIFY_FLUSH_EVERY, VERIFY_WORKERS, VERIFY_JITTERS
+from src.utils import metrics
+
+
+def _encode_image(image: str) -> np.ndarray:
+    """
+    Calcula o encoding do rosto de uma imagem. Executada nos processos do pool, fora da ordem de verificação.
+
+    :param image: Nome da imagem.
+    :return: Retorna o encoding do rosto.
+    """
+
+    image = fr.load_image_file(f'{DIR_IMG}/{image}')
+    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    return fr.face_encodings(image, num_jitters=VERIFY_JITTERS)[0]
 
 
 class VerifyFace:
     """
     Classe responsável pela eliminação de rostos já conhecidos.
+
+    Os encodings das imagens são calculados em paralelo num pool de processos, e as decisões de descarte e inserção
+    são tomadas em seguida, uma imagem por vez, na ordem de _order_images, com o mesmo resultado da execução serial.
+    A galeria é lida do Banco de Dados uma única vez. Cada rosto novo é acrescentado à galeria em memória e gravado
+    num arquivo de checkpoint; a cada VERIFY_FLUSH_EVERY rostos, e ao final, os rostos pendentes são gravados no Banco
+    de Dados numa única transação. Se a verificação for interrompida, os rostos do checkpoint são gravados na próxima
+    execução, antes da leitura da galeria. Apenas as imagens novas ou alteradas, segundo o manifesto, são verificadas.
     """
 
-    _list_encodings: List[np.ndarray]
+    _gallery: GalleryMatcher
+    _manifest: Manifest
+    _pending: List[tuple]
+    _workers: int
     _logger = logging.Logger
 
-    def __init__(self) -> None:
+    def __init__(self, workers: Optional[int] = VERIFY_WORKERS) -> None:
         """
         Método Construtor da classe.
+
+        :param workers: Número de processos usados no cálculo dos encodings. Se None, usa o número de núcleos.
         """
 
-        self._list_encodings = self._load_encodings()
+        self._workers = workers or os.cpu_count() or 1
         self._logger = logging.getLogger(__name__)
+        self._pending = []
+        self._manifest = Manifest(stage=STAGE_VERIFY)
+        self._recover_checkpoint()
+        self._gallery = self._load_encodings()
 
     def _order_images(self, name_image: str) -> tuple:
         """
@@ -42,42 +77,30 @@ class VerifyFace:
         else:
             return 0, name_image
 
-    def _load_encodings(self) -> List[np.ndarray]:
+    def _load_encodings(self) -> GalleryMatcher:
         """
         Carrega os encodings dos rostos já conhecidos do Banco de Dados.
 
-        :return: Retorna uma lista de arrays numpy, que correspondem aos encodings que cada rosto armazenado.
+        A verificação sempre usa a busca exata, pois decide quais imagens são descartadas como duplicadas.
+
+        :return: Retorna a galeria com os encodings de cada rosto armazenado.
         """
 
-        list_faces_encodings = execute_read_table(EnumTables.peoplefaces.value, columns=['Face_encoding'])
-        list_encodings = []
-        for i in range(0, len(list_faces_encodings)):
-            encoding = list_faces_encodings[i][0].strip('[]').split()
-            encoding = [float(elemento) for elemento in encoding]
-            encoding = np.array(encoding)
-            list_encodings.append(encoding)
-        return list_encodings
+        return BruteForceMatcher.from_database()
 
-    def _check_matching_faces(self, image: str) -> Tuple[int, np.ndarray]:
+    def _check_matching_faces(self, image: str, face_encoding: np.ndarray) -> Tuple[int, np.ndarray]:
         """
         Checa se o rosto é conhecido ou não.
 
         :param image: Nome da imagem.
+        :param face_encoding: Encoding do rosto da imagem.
         :return: Retorna um inteiro indicando se o rosto é conhecido ou não e o encoding do rosto usado para comparação.
         """
 
         self._logger.info(f'CHECANDO CORRESPONDÊNCIA DE {image}...')
-        image = fr.load_image_file(f'{DIR_IMG}/{image}')
-        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        face_encoding = fr.face_encodings(image, num_jitters=10)[0]
-        result = fr.compare_faces(self._list_encodings, face_encoding)
-        face_dis = fr.face_distance(self._list_encodings, face_encoding)
-        status = 0
-
-        if True in result:
-            best_match_index = result.index(True)
-            if face_dis[best_match_index] < TOLERANCE:
-                status = 1
+        with metrics.timer('verify_matching'):
+            _, _, matches = self._gallery.match([face_encoding])
+        status = int(matches[0])
         return status, face_encoding
 
     def _delete_image_from_directory(self, name_image: str) -> None:
@@ -89,10 +112,34 @@ class VerifyFace:
 
         self._logger.info(f'DELETANDO {name_image} DO DIRETÓRIO...')
         os.remove(f'{DIR_IMG}/{name_image}')
+        self._manifest.forget(name_image)
+
+    def _recover_checkpoint(self) -> None:
+        """
+        Grava no Banco de Dados os rostos de uma verificação anterior interrompida antes da gravação.
+        """
+
+        if not os.path.exists(PATH_VERIFY_CHECKPOINT):
+            return
+        records = []
+        with open(PATH_VERIFY_CHECKPOINT, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    image, *record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Última linha incompleta, escrita durante a interrupção.
+                    break
+                records.append(tuple(record))
+                if os.path.exists(f'{DIR_IMG}/{image}'):
+                    self._manifest.mark(image)
+        self._logger.info(f'RECUPERANDO {len(records)} ROSTOS DO CHECKPOINT...')
+        self._pending = records
+        self._flush()
 
     def _add_to_table(self, image: str, face_encoding: np.ndarray) -> None:
         """
-        Adiciona as informações na tabela do Banco de Dados.
+        Adiciona as informações do rosto à galeria em memória, ao checkpoint e ao manifesto. A gravação no Banco de
+        Dados é feita em lotes pelo método _flush.
 
         :param image: Nome da imagem.
         :param face_encoding: Encoding do rosto usado para a comparação.
@@ -106,8 +153,55 @@ class VerifyFace:
             type_face = 'KNOWN'
 
         self._logger.info('ADICIONANDO DADOS NA TABELA...')
-        execute_insert(table=EnumTables.peoplefaces.value, name=name, type_face=type_face, face_encoding=face_encoding,
-                       date_creation=date_creation)
+        record = (name, [float(value) for value in face_encoding], type_face, date_creation)
+        with metrics.timer('verify_checkpoint'), open(PATH_VERIFY_CHECKPOINT, 'a', encoding='utf-8') as file:
+            file.write(json.dumps((image, *record), ensure_ascii=False) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+        self._pending.append(record)
+        self._gallery.append(encodings=[face_encoding], class_names=[name])
+        self._manifest.mark(image)
+        if len(self._pending) >= VERIFY_FLUSH_EVERY:
+            self._flush()
+
+    def _flush(self) -> None:
+        """
+        Grava os rostos pendentes e o manifesto no Banco de Dados e limpa o checkpoint. Se algum rosto não for
+        gravado, o checkpoint é mantido para a próxima execução; os rostos já gravados são ignorados como conflitos.
+        """
+
+        if self._pending:
+            self._logger.info(f'GRAVANDO {len(self._pending)} ROSTOS NO BANCO DE DADOS...')
+            with metrics.timer('verify_flush'):
+                num_written, conflicts = execute_insert_faces(records=self._pending)
+            num_pending, self._pending = len(self._pending), []
+            if num_written + len(conflicts) < num_pending:
+                self._logger.error('NEM TODOS OS ROSTOS FORAM GRAVADOS')
+                self._logger.warning(f'CHECKPOINT MANTIDO EM {PATH_VERIFY_CHECKPOINT}')
+                return
+        self._manifest.flush()
+        if os.path.exists(PATH_VERIFY_CHECKPOINT):
+            os.remove(PATH_VERIFY_CHECKPOINT)
+
+    def _verify(self, image: str, face_encoding: np.ndarray) -> bool:
+        """
+        Decide se a imagem é descartada, por ser de um rosto conhecido, ou se o rosto é adicionado à galeria.
+
+        :param image: Nome da imagem.
+        :param face_encoding: Encoding do rosto da imagem.
+        :return: Retorna uma flag indicando se o rosto foi adicionado, ou seja, se a imagem permanece no diretório.
+        """
+
+        status, face_encoding = self._check_matching_faces(image=image, face_encoding=face_encoding)
+        if status:
+            self._logger.info(f'FOTO {image} RECONHECIDA')
+            self._delete_image_from_directory(name_image=image)
+            metrics.increment('verify_images_deleted')
+            return False
+        self._logger.info(f'FOTO {image} NÃO RECONHECIDA')
+        metrics.increment('verify_images_kept')
+        self._add_to_table(image=image, face_encoding=face_encoding)
+        return True
 
     def run(self) -> None:
         """
@@ -117,16 +211,19 @@ class VerifyFace:
         self._logger.info('INICIANDO RECUPERAÇÃO...')
 
         list_images = sorted([f for f in os.listdir(DIR_IMG)], key=self._order_images)
-
-        for image in tqdm(list_images):
-            status, face_encoding = self._check_matching_faces(image=image)
-            if status:
-                self._logger.info(f'FOTO {image} RECONHECIDA')
-                self._delete_image_from_directory(name_image=image)
-                continue
-            self._logger.info(f'FOTO {image} NÃO RECONHECIDA')
-            self._add_to_table(image=image, face_encoding=face_encoding)
-            self._list_encodings = self._load_encodings()
+        list_images = self._manifest.pending(list_images)
+
+        with ProcessPoolExecutor(max_workers=self._workers) as executor:
+            self._logger.info(f'CALCULANDO ENCODINGS EM {self._workers} PROCESSOS...')
+            chunksize = max(1, len(list_images) // (4 * self._workers))
+            faces_encodings = executor.map(_encode_image, list_images, chunksize=chunksize)
+            # O encoding é calculado nos processos do pool; aqui é medida a espera por cada resultado
+            wait_start = time.perf_counter()
+            for image, face_encoding in tqdm(zip(list_images, faces_encodings), total=len(list_images)):
+                metrics.observe('verify_encoding_wait', time.perf_counter() - wait_start)
+                self._verify(image=image, face_encoding=face_encoding)
+                wait_start = time.perf_counter()
+        self._flush()
 
 
 if __name__ == '__main__':
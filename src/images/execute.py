@@ -1,7 +1,7 @@
-from src.images.GetImages import GetImages
-from src.images.NameImages import NameImages
-from src.images.CropImages import CropImages
-from src.images.VerifyFace import VerifyFace
+from typing import Optional
+
+# As classes são importadas dentro de cada função: face_recognition (dlib), easyocr (torch) e cv2 só são carregados
+# pela tarefa que os usa, e não a cada execução da linha de comando.
 
 
 def execute_get_images() -> None:
@@ -9,6 +9,8 @@ def execute_get_images() -> None:
     Executa recuperação de imagens.
     """
 
+    from src.images.GetImages import GetImages
+
     obj = GetImages()
     obj.run()
 
@@ -18,15 +20,44 @@ def execute_name_images() -> None:
     Executa nomeação de imagens.
     """
 
+    from src.images.NameImages import NameImages
+
     obj = NameImages()
     obj.run()
 
 
+def execute_propose_names() -> None:
+    """
+    Executa o OCR das imagens sem interação, gravando os nomes propostos no arquivo de revisão.
+    """
+
+    from src.images.NameImages import NameImages
+
+    obj = NameImages()
+    obj.propose()
+
+
+def execute_review_names(min_confidence: Optional[float] = None) -> int:
+    """
+    Executa a revisão dos nomes propostos e renomeia as imagens.
+
+    :param min_confidence: Confiança mínima para aplicar o nome sem perguntas.
+    :return: Retorna o número de imagens renomeadas.
+    """
+
+    from src.images.ReviewNames import ReviewNames
+
+    obj = ReviewNames(min_confidence=min_confidence)
+    return obj.run()
+
+
 def execute_crop_images() -> None:
     """
     Executa Recorte das imagens.
     """
 
+    from src.images.CropImages import CropImages
+
     obj = CropImages()
     obj.run()
 
@@ -36,5 +67,18 @@ def execute_verify_images() -> None:
     Executa verificação e armazenamento das informaçãoes das imagens no Banco de Dados.
     """
 
+    from src.images.VerifyFace import VerifyFace
+
     obj = VerifyFace()
     obj.run()
+
+
+def execute_enroll_images() -> None:
+    """
+    Executa o cadastro das imagens numa única passagem: verificação, armazenamento no Banco de Dados e recorte.
+    """
+
+    from src.images.EnrollImages import EnrollImages
+
+    obj = EnrollImages()
+    obj.run()
@@ -0,0 +1,275 @@
+import bisect
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Sequence, Union
+
+from src.config import METRICS_ENABLED, METRICS_BUCKETS, METRICS_WINDOW, PATH_PROJECT
+
+# Prefixo dos nomes das métricas no formato do Prometheus
+PREFIX = 'facerec'
+
+
+class Histogram:
+    """
+    Histograma de latências de uma etapa: contagens acumuladas por intervalo, como no Prometheus, e as medidas mais
+    recentes, usadas no cálculo dos percentis.
+    """
+
+    _lock: threading.Lock
+    _bounds: Sequence[float]
+    _counts: List[int]
+    _sum: float
+    _count: int
+    _recent: Deque[float]
+
+    def __init__(self, bounds: Sequence[float] = METRICS_BUCKETS, window: int = METRICS_WINDOW) -> None:
+        """
+        Método Construtor da classe.
+
+        :param bounds: Limite superior de cada intervalo, em segundos, em ordem crescente.
+        :param window: Número de medidas recentes mantidas.
+        """
+
+        self._lock = threading.Lock()
+        self._bounds = tuple(bounds)
+        self._counts = [0] * (len(self._bounds) + 1)
+        self._sum, self._count = 0.0, 0
+        self._recent = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        """
+        Registra uma medida.
+
+        :param seconds: Duração, em segundos.
+        """
+
+        position = bisect.bisect_left(self._bounds, seconds)
+        with self._lock:
+            self._counts[position] += 1
+            self._sum += seconds
+            self._count += 1
+            self._recent.append(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Copia o estado do histograma.
+
+        :return: Dicionário com o número de medidas, a soma, as contagens acumuladas por limite e os percentis 50, 90
+        e 99 das medidas recentes, em segundos.
+        """
+
+        with self._lock:
+            counts, total, count, recent = list(self._counts), self._sum, self._count, sorted(self._recent)
+        cumulative, buckets = 0, {}
+        for bound, bucket_count in zip(self._bounds, counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        buckets['+Inf'] = count
+        percentiles = {f'p{p}': recent[min(len(recent) - 1, int(len(recent) * p / 100))] if recent else None
+                       for p in (50, 90, 99)}
+        return {'count': count, 'sum': total, 'buckets': buckets, **percentiles}
+
+
+class Timer:
+    """
+    Gerenciador de contexto que mede a duração do bloco e a registra no histograma da etapa.
+    """
+
+    __slots__ = ('_histogram', '_start')
+
+    def __init__(self, histogram: Histogram) -> None:
+        self._histogram = histogram
+        self._start = 0.0
+
+    def __enter__(self) -> 'Timer':
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._histogram.observe(time.perf_counter() - self._start)
+
+
+class _NullTimer:
+    """
+    Gerenciador de contexto vazio, usado quando a coleta está desativada.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self) -> '_NullTimer':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Registry:
+    """
+    Classe responsável por guardar as métricas de desempenho do processo: histogramas de duração por etapa e
+    contadores de eventos, como frames processados e descartados.
+
+    Com a coleta desativada, timer devolve sempre o mesmo gerenciador vazio e observe e increment retornam
+    imediatamente, então a instrumentação pode ficar no código sem custo relevante.
+    """
+
+    _enabled: bool
+    _lock: threading.Lock
+    _histograms: Dict[str, Histogram]
+    _counters: Dict[str, int]
+
+    def __init__(self, enabled: bool = METRICS_ENABLED) -> None:
+        """
+        Método Construtor da classe.
+
+        :param enabled: Flag indicando se a coleta está ativa.
+        """
+
+        self._enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def set_enabled(self, enabled: bool) -> None:
+        self._enabled = enabled
+
+    def _histogram(self, stage: str) -> Histogram:
+        """
+        Recupera o histograma da etapa, criando-o no primeiro uso.
+
+        :param stage: Nome da etapa.
+        :return: Retorna o histograma.
+        """
+
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, Histogram())
+        return histogram
+
+    def timer(self, stage: str) -> Union[Timer, _NullTimer]:
+        """
+        Mede a duração de um bloco, com "with".
+
+        :param stage: Nome da etapa.
+        :return: Retorna o gerenciador de contexto.
+        """
+
+        if not self._enabled:
+            return _NULL_TIMER
+        return Timer(self._histogram(stage))
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """
+        Registra a duração de uma etapa já medida.
+
+        :param stage: Nome da etapa.
+        :param seconds: Duração, em segundos.
+        """
+
+        if self._enabled:
+            self._histogram(stage).observe(seconds)
+
+    def increment(self, event: str, value: int = 1) -> None:
+        """
+        Incrementa o contador de um evento.
+
+        :param event: Nome do evento.
+        :param value: Valor somado ao contador.
+        """
+
+        if self._enabled:
+            with self._lock:
+                self._counters[event] = self._counters.get(event, 0) + value
+
+    def reset(self) -> None:
+        """
+        Descarta todas as métricas registradas.
+        """
+
+        with self._lock:
+            self._histograms, self._counters = {}, {}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Copia o estado das métricas.
+
+        :return: Dicionário com o estado de cada histograma, por etapa, e o valor de cada contador.
+        """
+
+        with self._lock:
+            histograms, counters = dict(self._histograms), dict(self._counters)
+        return {
+            'stages': {stage: histogram.snapshot() for stage, histogram in sorted(histograms.items())},
+            'counters': dict(sorted(counters.items())),
+        }
+
+    def to_json(self) -> str:
+        """
+        Exporta as métricas em JSON.
+
+        :return: Retorna o texto JSON.
+        """
+
+        return json.dumps(self.snapshot(), ensure_ascii=False)
+
+    def to_prometheus(self) -> str:
+        """
+        Exporta as métricas no formato de texto do Prometheus: um histograma {PREFIX}_stage_seconds e um contador
+        {PREFIX}_events_total, com a etapa e o evento como rótulos.
+
+        :return: Retorna o texto no formato de exposição do Prometheus.
+        """
+
+        snapshot = self.snapshot()
+        lines = [f'# HELP {PREFIX}_stage_seconds Duração de cada etapa do processamento.',
+                 f'# TYPE {PREFIX}_stage_seconds histogram']
+        for stage, histogram in snapshot['stages'].items():
+            for bound, count in histogram['buckets'].items():
+                lines.append(f'{PREFIX}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'{PREFIX}_stage_seconds_sum{{stage="{stage}"}} {histogram["sum"]}')
+            lines.append(f'{PREFIX}_stage_seconds_count{{stage="{stage}"}} {histogram["count"]}')
+        lines += [f'# HELP {PREFIX}_events_total Número de ocorrências de cada evento.',
+                  f'# TYPE {PREFIX}_events_total counter']
+        for event, value in snapshot['counters'].items():
+            lines.append(f'{PREFIX}_events_total{{event="{event}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path: Union[str, Path, None] = None, name: Optional[str] = None) -> Optional[Path]:
+        """
+        Grava as métricas em JSON, se alguma foi registrada. Usado ao final dos comandos da linha de comando, que não
+        têm o endereço /metrics para consulta.
+
+        :param path: Caminho do arquivo. Se None, usa a pasta de logs com a data e o horário no nome.
+        :param name: Identificação acrescentada ao nome do arquivo padrão, como a fonte de frames de um processo.
+        :return: Retorna o caminho do arquivo, ou None se não havia métricas.
+        """
+
+        if not self._histograms and not self._counters:
+            return None
+        if path is None:
+            suffix = '_' + re.sub(r'\W+', '_', name).strip('_') if name else ''
+            path = PATH_PROJECT / 'logs' / f'metrics_{datetime.now().strftime("%Y%m%d-%H%M%S")}{suffix}.json'
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.to_json(), encoding='utf-8')
+        logging.getLogger(__name__).info(f'MÉTRICAS GRAVADAS EM {path}')
+        return path
+
+
+# Métricas do processo, compartilhadas por todos os módulos
+registry = Registry()
+timer = registry.timer
+observe = registry.observe
+increment = registry.increment
@@ -0,0 +1,96 @@
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from src.config import DIR_IMG
+
+
+class DirectoryIndex:
+    """
+    Classe responsável por manter em memória a listagem ordenada de um diretório de imagens.
+
+    A cada consulta apenas a data de modificação do diretório é lida; a listagem só é refeita quando ela muda, isto é,
+    quando uma imagem é criada, apagada ou renomeada. Assim cada página custa uma chamada a os.stat, e não uma leitura
+    completa do diretório.
+    """
+
+    _logger: logging.Logger
+    _directory: Path
+    _lock: threading.Lock
+    _mtime: Optional[int]
+    _listing: Tuple[List[str], Set[str], Dict[str, str]]
+
+    def __init__(self, directory: Union[str, Path] = DIR_IMG) -> None:
+        """
+        Método Construtor da classe.
+
+        :param directory: Diretório das imagens.
+        """
+
+        self._logger = logging.getLogger(__name__)
+        self._directory = Path(directory)
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._listing = ([], set(), {})
+
+    def _refresh(self) -> Tuple[List[str], Set[str], Dict[str, str]]:
+        """
+        Refaz a listagem se a data de modificação do diretório mudou. A lista ordenada, o conjunto de nomes e o mapa
+        de nomes sem extensão são trocados juntos, numa única atribuição, para que as requisições em andamento não
+        vejam uma mistura deles.
+
+        :return: Retorna o nome das imagens, em ordem alfabética, o conjunto dos mesmos nomes e o nome de cada imagem
+        a partir do nome sem extensão.
+        """
+
+        mtime = os.stat(self._directory).st_mtime_ns
+        if mtime == self._mtime:
+            return self._listing
+        with self._lock:
+            if mtime != self._mtime:
+                with os.scandir(self._directory) as entries:
+                    names = sorted(entry.name for entry in entries if entry.is_file())
+                stems = {}
+                for name in names:
+                    stems.setdefault(os.path.splitext(name)[0], name)
+                self._listing = (names, set(names), stems)
+                self._mtime = mtime
+                self._logger.info(f'LISTAGEM DE {self._directory} ATUALIZADA: {len(names)} IMAGENS')
+        return self._listing
+
+    def __len__(self) -> int:
+        return len(self._refresh()[0])
+
+    def __contains__(self, name: str) -> bool:
+        """
+        Verifica se a imagem está no diretório. Apenas nomes listados são aceitos, o que impede o acesso a arquivos
+        fora do diretório.
+
+        :param name: Nome da imagem.
+        :return: Retorna uma flag indicando se a imagem está na listagem.
+        """
+
+        return name in self._refresh()[1]
+
+    def page(self, start: int, stop: int) -> List[str]:
+        """
+        Recupera um intervalo da listagem.
+
+        :param start: Posição inicial.
+        :param stop: Posição final, exclusiva.
+        :return: Retorna o nome das imagens do intervalo.
+        """
+
+        return self._refresh()[0][start:stop]
+
+    def find(self, stem: str) -> Optional[str]:
+        """
+        Procura a imagem de uma pessoa, cujo nome é o nome do arquivo sem a extensão.
+
+        :param stem: Nome da imagem sem a extensão.
+        :return: Retorna o nome da imagem, ou None se não houver imagem com esse nome.
+        """
+
+        return self._refresh()[2].get(stem)
@@ -0,0 +1,201 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set, Tuple, Union
+
+from PIL import Image
+
+from src.config import DIR_IMG, PATH_THUMBNAILS, THUMBNAIL_QUALITY, THUMBNAIL_SIZE, THUMBNAIL_WORKERS
+
+
+class ThumbnailCache:
+    """
+    Classe responsável pelas miniaturas JPEG das imagens exibidas na galeria web.
+
+    Cada miniatura é identificada por um hash do nome, tamanho e data de modificação da imagem original e dos
+    parâmetros da miniatura. O mesmo hash é a ETag da resposta e a versão na URL, então uma imagem alterada ganha uma
+    URL nova e a anterior pode ficar no cache do navegador indefinidamente. As miniaturas são geradas no primeiro
+    acesso ou, para as próximas páginas, por threads em segundo plano.
+
+    O arquivo de cada miniatura começa com um hash do nome da imagem, então a versão anterior é apagada quando uma
+    nova é gerada. As miniaturas de imagens removidas do diretório são apagadas por sweep.
+    """
+
+    _logger: logging.Logger
+    _directory: Path
+    _cache_dir: Path
+    _size: int
+    _quality: int
+    _workers: int
+    _executor: Optional[ThreadPoolExecutor]
+    _in_flight: Set[str]
+    _lock: threading.Lock
+
+    def __init__(self, directory: Union[str, Path] = DIR_IMG, cache_dir: Union[str, Path] = PATH_THUMBNAILS,
+                 size: int = THUMBNAIL_SIZE, quality: int = THUMBNAIL_QUALITY,
+                 workers: int = THUMBNAIL_WORKERS) -> None:
+        """
+        Método Construtor da classe.
+
+        :param directory: Diretório das imagens originais.
+        :param cache_dir: Diretório das miniaturas.
+        :param size: Lado maior das miniaturas, em pixels.
+        :param quality: Qualidade JPEG das miniaturas.
+        :param workers: Número de threads que geram as miniaturas em segundo plano.
+        """
+
+        self._logger = logging.getLogger(__name__)
+        self._directory = Path(directory)
+        self._cache_dir = Path(cache_dir)
+        self._size = size
+        self._quality = quality
+        self._workers = workers
+        self._executor = None
+        self._in_flight = set()
+        self._lock = threading.Lock()
+
+    def version(self, name: str) -> str:
+        """
+        Calcula a versão da miniatura a partir do estado atual da imagem original.
+
+        :param name: Nome da imagem.
+        :return: Retorna o hash que identifica a miniatura, em hexadecimal.
+        """
+
+        stat = os.stat(self._directory / name)
+        key = f'{name}\0{stat.st_size}\0{stat.st_mtime_ns}\0{self._size}\0{self._quality}'
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+
+    def versions(self, names: Iterable[str]) -> Dict[str, str]:
+        """
+        Calcula a versão da miniatura de várias imagens, ignorando as que não existem mais, como as removidas depois
+        da última listagem do diretório.
+
+        :param names: Nome das imagens.
+        :return: Dicionário com a versão da miniatura de cada imagem existente, pelo nome.
+        """
+
+        versions = {}
+        for name in names:
+            try:
+                versions[name] = self.version(name)
+            except FileNotFoundError:
+                continue
+        return versions
+
+    def _path(self, name: str, version: str) -> Path:
+        """
+        Caminho da miniatura, distribuído em subdiretórios para não acumular todos os arquivos num só. Todas as
+        versões da mesma imagem ficam no mesmo subdiretório, com o mesmo início de nome.
+
+        :param name: Nome da imagem.
+        :param version: Versão da miniatura.
+        :return: Retorna o caminho do arquivo JPEG.
+        """
+
+        key = hashlib.blake2b(name.encode('utf-8'), digest_size=16).hexdigest()
+        return self._cache_dir / key[:2] / f'{key}.{version}.jpg'
+
+    @staticmethod
+    def _evict(path: Path) -> None:
+        """
+        Apaga as versões anteriores da miniatura.
+
+        :param path: Caminho da versão atual da miniatura.
+        """
+
+        key = path.name.split('.', 1)[0]
+        for old in path.parent.glob(f'{key}.*.jpg'):
+            if old != path:
+                old.unlink(missing_ok=True)
+
+    def _generate(self, name: str, path: Path) -> None:
+        """
+        Gera a miniatura. O JPEG original é decodificado já reduzido (Image.draft), e o arquivo é escrito com um nome
+        temporário e substituído atomicamente, então gerações simultâneas da mesma miniatura não se atrapalham.
+
+        :param name: Nome da imagem.
+        :param path: Caminho da miniatura.
+        """
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        with Image.open(self._directory / name) as image:
+            image.draft('RGB', (self._size, self._size))
+            image = image.convert('RGB')
+            image.thumbnail((self._size, self._size))
+            image.save(tmp, format='JPEG', quality=self._quality, optimize=True)
+        os.replace(tmp, path)
+        self._evict(path)
+
+    def get(self, name: str) -> Tuple[Path, str]:
+        """
+        Recupera a miniatura, gerando-a se ainda não existir.
+
+        :param name: Nome da imagem.
+        :return: Retorna o caminho da miniatura e a sua versão, usada como ETag.
+        """
+
+        version = self.version(name)
+        path = self._path(name=name, version=version)
+        if not path.exists():
+            self._generate(name=name, path=path)
+        return path, version
+
+    def _prefetch_one(self, name: str) -> None:
+        """
+        Gera a miniatura em segundo plano, registrando eventuais erros sem interromper as demais.
+
+        :param name: Nome da imagem.
+        """
+
+        try:
+            self.get(name)
+        except Exception as e:
+            self._logger.warning(f'ERRO AO GERAR A MINIATURA DE {name}: {e}')
+        finally:
+            with self._lock:
+                self._in_flight.discard(name)
+
+    def prefetch(self, names: Iterable[str]) -> None:
+        """
+        Agenda a geração das miniaturas em segundo plano, ignorando as que já estão agendadas.
+
+        :param names: Nome das imagens.
+        """
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix='thumbnails')
+            for name in names:
+                if name not in self._in_flight:
+                    self._in_flight.add(name)
+                    self._executor.submit(self._prefetch_one, name)
+
+    def sweep(self, names: Iterable[str]) -> int:
+        """
+        Apaga as miniaturas que não correspondem à versão atual de nenhuma imagem, como as de imagens removidas e as
+        de parâmetros de miniatura antigos. Arquivos modificados depois do início da varredura são mantidos, pois
+        podem ser de imagens adicionadas depois da listagem.
+
+        :param names: Nome de todas as imagens do diretório.
+        :return: Retorna o número de miniaturas apagadas.
+        """
+
+        start = time.time()
+        current = {self._path(name=name, version=version) for name, version in self.versions(names).items()}
+        removed = 0
+        for path in self._cache_dir.glob('*/*.jpg'):
+            try:
+                if path not in current and path.stat().st_mtime < start:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        if removed:
+            self._logger.info(f'{removed} MINIATURAS SEM IMAGEM APAGADAS')
+        return removed